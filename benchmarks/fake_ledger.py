@@ -0,0 +1,232 @@
+"""
+Stand-in ledger HTTP server for load and latency benchmarking without a live node.
+
+Implements the subset of the ledger HTTP API used by pocketbook: the server status / version and current block number,
+the token balance and stake queries, transaction submission and transaction status. Every request can be delayed by a
+fixed latency (plus uniform random jitter) and the queries and submissions can be made to fail at a given rate.
+
+A deterministic set of funded accounts is created (see account_address()) so that wallets can be populated with
+addresses which have a balance, every other address has the default balance. Submitted transactions are not decoded or
+applied to the balances, they are recorded and reported as executed.
+
+    python benchmarks/fake_ledger.py [--port 8000] [--accounts N] [--latency S] [--jitter S] [--error-rate R]
+
+The default port matches the `local` network, i.e. `pocketbook -n local ...`
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_ACCOUNTS = 1000
+LEDGER_VERSION = 'v1.0.0'
+
+# the balances of the funded accounts, in canonical units
+FUNDED_BALANCE = 10 ** 10
+FUNDED_STAKE = 10 ** 9
+
+TX_STATUS_PATTERN = re.compile(r'^/api/status/tx/(?:0x)?([0-9a-fA-F]+)$')
+
+
+def account_address(index: int) -> str:
+    """
+    :param index: The index of the funded account
+    :return: The (deterministic) address of the funded account
+    """
+    from fetchai.ledger.crypto import Address
+
+    return str(Address(hashlib.sha256('fake-ledger-account-{}'.format(index).encode()).digest()))
+
+
+class FakeLedger:
+    """
+    The state of the stand-in ledger, shared by all of the request handler threads
+    """
+
+    def __init__(self, accounts=DEFAULT_ACCOUNTS, latency=0.0, jitter=0.0, error_rate=0.0, default_balance=0,
+                 seed=None):
+        """
+        :param accounts: The number of funded accounts
+        :param latency: The fixed delay (in seconds) before every response
+        :param jitter: The maximum additional random delay (in seconds) before every response
+        :param error_rate: The fraction (0 to 1) of queries and submissions which fail with a server error
+        :param default_balance: The balance (in canonical units) of every account which is not funded
+        :param seed: The seed for the random jitter and errors, for repeatable runs
+        """
+        self.latency = float(latency)
+        self.jitter = float(jitter)
+        self.error_rate = float(error_rate)
+        self.default_balance = int(default_balance)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._balances = {account_address(index): (FUNDED_BALANCE * (index + 1), FUNDED_STAKE)
+                          for index in range(accounts)}
+        self._transactions = {}
+
+    @property
+    def block_number(self) -> int:
+        # blocks are produced every second
+        return int(time.time() - self._start) + 1
+
+    def balance(self, address: str) -> int:
+        return self._balances.get(address, (self.default_balance, 0))[0]
+
+    def stake(self, address: str) -> int:
+        return self._balances.get(address, (self.default_balance, 0))[1]
+
+    def submit(self, data: str) -> str:
+        digest = hashlib.sha256(base64.b64decode(data)).hexdigest()
+        with self._lock:
+            self._transactions[digest] = 'Executed'
+        return digest
+
+    def status(self, digest: str) -> str:
+        with self._lock:
+            return self._transactions.get(digest.lower(), 'Unknown')
+
+    def begin_request(self, fallible: bool) -> bool:
+        """
+        Delay a request by the configured latency
+
+        :param fallible: Flag to signal that the request is subject to the error rate
+        :return: True if the request should succeed, otherwise False
+        """
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter > 0 else 0)
+            failed = fallible and self.error_rate > 0 and self._random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+        return not failed
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # keep-alive connections, as used by the pooled session of the connection manager
+    protocol_version = 'HTTP/1.1'
+
+    # the headers and body are written separately, without this each response is held back by delayed acks
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def ledger(self) -> FakeLedger:
+        return self.server.ledger
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+
+        if path == '/api/status':
+            self.ledger.begin_request(False)
+            return self._respond(200, {'version': LEDGER_VERSION, 'lanes': 1})
+
+        if path == '/api/status/chain':
+            self.ledger.begin_request(False)
+            return self._respond(200, {'chain': [{'blockNumber': self.ledger.block_number}]})
+
+        match = TX_STATUS_PATTERN.match(path)
+        if match is not None:
+            self.ledger.begin_request(False)
+            digest = match.group(1)
+            return self._respond(200, {
+                'tx': digest,
+                'status': self.ledger.status(digest),
+                'exit_code': 0,
+                'charge': 0,
+                'charge_rate': 0,
+                'fee': 0,
+            })
+
+        self._respond(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length).decode() or '{}')
+        except ValueError:
+            return self._respond(400, {'error': 'malformed request'})
+
+        if self.path == '/api/contract/fetch/token/balance':
+            if not self.ledger.begin_request(True):
+                return self._respond(500, {'error': 'injected failure'})
+            return self._respond(200, {'balance': self.ledger.balance(request.get('address'))})
+
+        if self.path == '/api/contract/fetch/token/stake':
+            if not self.ledger.begin_request(True):
+                return self._respond(500, {'error': 'injected failure'})
+            return self._respond(200, {'stake': self.ledger.stake(request.get('address'))})
+
+        if self.path == '/api/contract/submit':
+            if not self.ledger.begin_request(True):
+                return self._respond(500, {'error': 'injected failure'})
+            digest = self.ledger.submit(request.get('data', ''))
+            return self._respond(200, {'txs': [digest], 'counts': {'received': 1, 'submitted': 1}})
+
+        self._respond(404, {'error': 'not found'})
+
+    def _respond(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeLedgerServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, ledger: FakeLedger, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        :param ledger: The ledger state to be served
+        :param host: The host to listen on
+        :param port: The port to listen on, 0 selects a free port
+        """
+        self.ledger = ledger
+        super().__init__((host, port), _RequestHandler)
+
+    @property
+    def endpoint(self):
+        return self.server_address[0], self.server_address[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a stand-in ledger HTTP server for benchmarking')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='The host to listen on')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='The port to listen on')
+    parser.add_argument('-a', '--accounts', type=int, default=DEFAULT_ACCOUNTS, help='The number of funded accounts')
+    parser.add_argument('-l', '--latency', type=float, default=0.0, help='The delay (in seconds) of every response')
+    parser.add_argument('-j', '--jitter', type=float, default=0.0,
+                        help='The maximum additional random delay (in seconds) of every response')
+    parser.add_argument('-e', '--error-rate', type=float, default=0.0,
+                        help='The fraction of queries and submissions which fail')
+    parser.add_argument('--default-balance', type=int, default=0,
+                        help='The balance (in canonical units) of every account which is not funded')
+    parser.add_argument('--seed', type=int, help='The random seed for the jitter and failures')
+    args = parser.parse_args()
+
+    ledger = FakeLedger(accounts=args.accounts, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        default_balance=args.default_balance, seed=args.seed)
+    server = FakeLedgerServer(ledger, args.host, args.port)
+    print('Serving a fake ledger with {} funded accounts on {}:{}'.format(args.accounts, *server.endpoint))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Bulk key generation benchmark, reporting the number of keys created per second against the number of workers.
+
+For each worker count a fresh key store is created in a temporary directory and populated with KeyStore.create_keys,
+so that the timings include the encryption of each key, the writing of the key files and the single index write.
+
+    python benchmarks/keygen.py [-n KEYS] [-w WORKERS ...] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pocketbook.key_store import KeyStore  # noqa: E402
+
+BENCHMARK_PASSWORD = 'Fetch!Ai-B3nchm4rk!'
+
+
+def time_key_generation(num_keys, workers):
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as root:
+        key_store = KeyStore(root=root)
+        names = ['key-{}'.format(index) for index in range(num_keys)]
+
+        start = time.perf_counter()
+        key_store.create_keys(names, BENCHMARK_PASSWORD, workers=workers)
+        return time.perf_counter() - start
+
+
+def run_benchmark(num_keys, worker_counts):
+    results = []
+    for workers in worker_counts:
+        elapsed = time_key_generation(num_keys, workers)
+        results.append({
+            'keys': num_keys,
+            'workers': workers,
+            'keys_per_sec': num_keys / elapsed,
+            'elapsed_s': elapsed,
+        })
+    return results
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Measure bulk key generation throughput')
+    parser.add_argument('-n', '--keys', type=int, default=32, help='The number of keys to generate')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=sorted({1, 2, cpus}),
+                        help='The worker counts to be measured')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.keys, sorted(set(args.workers)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:>8} {:>8} {:>10} {:>12}'.format('Keys', 'Workers', 'Keys/s', 'Elapsed (s)'))
+        for result in results:
+            print('{keys:>8} {workers:>8} {keys_per_sec:>10.2f} {elapsed_s:>12.3f}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Network benchmark for the list and transfer commands, run against the stand-in ledger (see fake_ledger.py).
+
+The fake ledger is started in a separate process (so that it does not compete with the commands for the interpreter)
+and pocketbook is pointed at it through the `local` network. The key store root is redirected to a temporary folder so
+that the real wallet is never touched.
+
+For each wallet size the address book is populated with that many funded accounts and run_list is timed, reporting the
+throughput and the latency percentiles of the individual balance requests. A series of transfers is then made with
+run_transfer, reporting the latency percentiles of the complete transfer (validity period, signing, submission and
+waiting for execution). The signing key is decrypted once up front so the (deliberately expensive) key decryption is
+excluded from the transfer timings.
+
+    python benchmarks/ledger.py [-s SIZES ...] [-c CONCURRENCY] [-t TRANSFERS] [--latency S] [--jitter S]
+                                [--error-rate R] [--json]
+
+Wallets of up to 100,000 entries can be measured (e.g. -s 10 1000 100000), the larger sizes take a few minutes.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fake_ledger import FakeLedger, FakeLedgerServer, account_address  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+BENCHMARK_PASSWORD = 'Fetch!Ai-B3nchm4rk!'
+SIGNER_NAME = 'benchmark'
+
+# every address which is not one of the funded accounts (i.e. the signer) has enough funds for all of the transfers
+SIGNER_BALANCE = 10 ** 20
+
+
+def _serve(connection, options):
+    server = FakeLedgerServer(FakeLedger(**options), port=0)
+    connection.send(server.endpoint)
+    server.serve_forever()
+
+
+def start_ledger(options):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, options), daemon=True)
+    process.start()
+    return process, parent.recv()
+
+
+def populate_address_book(root, size):
+    import toml
+    from pocketbook.address_book import AddressBook
+    from pocketbook.journal import atomic_write
+
+    # the address book is written in one go, building it entry by entry is covered by the storage benchmarks
+    addresses = {'account-{}'.format(index): account_address(index) for index in range(size)}
+    atomic_write(os.path.join(root, AddressBook.INDEX_FILE_NAME), toml.dumps(addresses))
+
+
+def _span(summary, name):
+    for entry in summary:
+        if entry['name'] == name:
+            return entry
+    return None
+
+
+def time_list(root, size, concurrency):
+    from pocketbook import timings
+    from pocketbook.commands.list import run_list
+
+    populate_address_book(root, size)
+
+    args = Namespace(network='local', verbose=False, concurrency=concurrency, cached=False, max_age=None, sum=False,
+                     group_by=None, sort=None, top=None, stream=False, format='jsonl', pattern=['*'])
+
+    recorder = timings.enable()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        run_list(args)
+    elapsed = time.perf_counter() - start
+    timings.disable()
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    balance = _span(recorder.summary(), 'network.balance') or {}
+    return {
+        'entries': size,
+        'elapsed_s': elapsed,
+        'entries_per_sec': size / elapsed,
+        'requests_per_sec': 2 * size / elapsed,
+        'p50_ms': balance.get('p50_ms'),
+        'p90_ms': balance.get('p90_ms'),
+        'p99_ms': balance.get('p99_ms'),
+        'max_ms': balance.get('max_ms'),
+        'errors': sum(1 for record in records if record['error'] is not None),
+    }
+
+
+def time_transfers(entity, count):
+    from pocketbook import timings
+    from pocketbook.commands.transfer import run_transfer
+
+    args = Namespace(network='local', destination=account_address(0), amount=1, charge_rate=1, from_address=None,
+                     no_wait=False, format=None, signers=[SIGNER_NAME])
+
+    recorder = timings.enable()
+    failures = 0
+    start = time.perf_counter()
+    with patch('builtins.input', return_value=''), \
+            patch('pocketbook.agent.unseal_keys', return_value={SIGNER_NAME: entity}), \
+            contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(count):
+            try:
+                with timings.span('transfer'):
+                    run_transfer(args)
+            except Exception:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    timings.disable()
+
+    summary = recorder.summary()
+    transfer = _span(summary, 'transfer') or {}
+    submit = _span(summary, 'tx.submit') or {}
+    return {
+        'transfers': count,
+        'elapsed_s': elapsed,
+        'transfers_per_sec': count / elapsed,
+        'p50_ms': transfer.get('p50_ms'),
+        'p90_ms': transfer.get('p90_ms'),
+        'p99_ms': transfer.get('p99_ms'),
+        'submit_p50_ms': submit.get('p50_ms'),
+        'errors': failures,
+    }
+
+
+def run_benchmark(sizes, concurrency, transfers, ledger_options):
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as home:
+        # redirect the key store root before any of the pocketbook modules are loaded
+        os.environ['HOME'] = home
+        root = os.path.join(home, '.pocketbook')
+        os.makedirs(root)
+
+        import warnings
+        from fetchai.ledger.crypto import Entity
+        from pocketbook import connection
+        from pocketbook.key_store import KeyStore
+
+        # the staking API of the SDK generates warnings
+        warnings.simplefilter('ignore')
+
+        ledger_options = dict(ledger_options, accounts=max(sizes), default_balance=SIGNER_BALANCE)
+        process, endpoint = start_ledger(ledger_options)
+        try:
+            connection.LOCAL_ENDPOINT = endpoint
+
+            entity = Entity()
+            KeyStore().add_key(SIGNER_NAME, BENCHMARK_PASSWORD, entity)
+
+            list_results = [time_list(root, size, concurrency) for size in sizes]
+            transfer_results = time_transfers(entity, transfers) if transfers > 0 else None
+        finally:
+            process.terminate()
+            process.join()
+
+    return list_results, transfer_results
+
+
+def _format_ms(value):
+    return '-' if value is None else '{:.2f}'.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure list and transfer throughput against a fake ledger')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='The numbers of address book entries to be listed')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='The maximum number of requests in flight when listing')
+    parser.add_argument('-t', '--transfers', type=int, default=20, help='The number of transfers to be made')
+    parser.add_argument('-l', '--latency', type=float, default=0.0,
+                        help='The delay (in seconds) added by the ledger to every response')
+    parser.add_argument('-j', '--jitter', type=float, default=0.0,
+                        help='The maximum additional random delay (in seconds) of every response')
+    parser.add_argument('-e', '--error-rate', type=float, default=0.0,
+                        help='The fraction of ledger queries and submissions which fail')
+    parser.add_argument('--seed', type=int, default=1, help='The random seed for the jitter and failures')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    args = parser.parse_args()
+
+    ledger_options = {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate, 'seed': args.seed}
+    list_results, transfer_results = run_benchmark(sorted(set(args.sizes)), args.concurrency, args.transfers,
+                                                   ledger_options)
+
+    if args.json:
+        print(json.dumps({'list': list_results, 'transfer': transfer_results}, indent=2))
+        return
+
+    print('list (request latencies in ms)')
+    print('{:>8} {:>11} {:>10} {:>10} {:>8} {:>8} {:>8} {:>8} {:>7}'.format(
+        'Entries', 'Elapsed (s)', 'Entries/s', 'Requests/s', 'p50', 'p90', 'p99', 'Max', 'Errors'))
+    for result in list_results:
+        print('{:>8} {:>11.3f} {:>10.1f} {:>10.1f} {:>8} {:>8} {:>8} {:>8} {:>7}'.format(
+            result['entries'], result['elapsed_s'], result['entries_per_sec'], result['requests_per_sec'],
+            _format_ms(result['p50_ms']), _format_ms(result['p90_ms']), _format_ms(result['p99_ms']),
+            _format_ms(result['max_ms']), result['errors']))
+
+    if transfer_results is not None:
+        print()
+        print('transfer (latencies in ms)')
+        print('{:>9} {:>11} {:>11} {:>8} {:>8} {:>8} {:>11} {:>7}'.format(
+            'Transfers', 'Elapsed (s)', 'Transfers/s', 'p50', 'p90', 'p99', 'Submit p50', 'Errors'))
+        print('{:>9} {:>11.3f} {:>11.1f} {:>8} {:>8} {:>8} {:>11} {:>7}'.format(
+            transfer_results['transfers'], transfer_results['elapsed_s'], transfer_results['transfers_per_sec'],
+            _format_ms(transfer_results['p50_ms']), _format_ms(transfer_results['p90_ms']),
+            _format_ms(transfer_results['p99_ms']), _format_ms(transfer_results['submit_p50_ms']),
+            transfer_results['errors']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Signing throughput benchmark, comparing serial and parallel (process pool) signing.
+
+For each signer count a batch of transfers is built and signed, first in process and then with a SigningPool of each
+of the requested worker counts. The time taken to decrypt the signers' key files serially and in parallel is also
+measured, since with the default key derivation parameters this usually dominates a multi-sig transfer.
+
+    python benchmarks/signing.py [-s SIGNERS ...] [-w WORKERS ...] [-t TRANSACTIONS] [--skip-decrypt] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fetchai.ledger.crypto import Entity, Address  # noqa: E402
+
+from pocketbook.signing import SigningPool, decrypt_key_files  # noqa: E402
+from pocketbook.transactions import build_transfer  # noqa: E402
+
+BENCHMARK_PASSWORD = 'Fetch!Ai-B3nchm4rk!'
+
+
+def create_transfers(signers, count):
+    source = Address(signers[0])
+    destination = Address(Entity())
+    return [build_transfer(source, destination, amount + 1, 1, signers) for amount in range(count)]
+
+
+def time_signing(signers, transactions, workers):
+    # the pool start up cost is included since it is paid on every run of the command
+    start = time.perf_counter()
+    with SigningPool(signers, workers=workers) as pool:
+        pool.sign_all(transactions)
+    return time.perf_counter() - start
+
+
+def time_decryption(signers, workers):
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as root:
+        credentials = {}
+        for index, signer in enumerate(signers):
+            path = os.path.join(root, 'key{}.key'.format(index))
+            with open(path, 'w') as key_file:
+                key_file.write(signer.dumps(BENCHMARK_PASSWORD))
+            credentials[index] = (path, BENCHMARK_PASSWORD)
+
+        start = time.perf_counter()
+        decrypt_key_files(credentials, workers=workers)
+        return time.perf_counter() - start
+
+
+def run_benchmark(signer_counts, worker_counts, num_transactions, decrypt):
+    results = []
+    for num_signers in signer_counts:
+        signers = [Entity() for _ in range(num_signers)]
+        signatures = num_signers * num_transactions
+
+        for workers in [1] + [w for w in worker_counts if w > 1]:
+            elapsed = time_signing(signers, create_transfers(signers, num_transactions), workers)
+            result = {
+                'signers': num_signers,
+                'workers': workers,
+                'transactions': num_transactions,
+                'signatures_per_sec': signatures / elapsed,
+                'sign_s': elapsed,
+            }
+            if decrypt:
+                result['decrypt_s'] = time_decryption(signers, workers)
+            results.append(result)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare serial and parallel signing throughput')
+    parser.add_argument('-s', '--signers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='The signer counts to be measured')
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[2, os.cpu_count() or 1],
+                        help='The worker counts to compare against serial signing')
+    parser.add_argument('-t', '--transactions', type=int, default=200, help='The number of transactions to sign')
+    parser.add_argument('--skip-decrypt', action='store_true', help='Do not measure the key decryption time')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.signers, sorted(set(args.workers)), args.transactions, not args.skip_decrypt)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:>8} {:>8} {:>14} {:>10} {:>12}'.format('Signers', 'Workers', 'Signatures/s', 'Sign (s)', 'Decrypt (s)'))
+        for result in results:
+            print('{signers:>8} {workers:>8} {signatures_per_sec:>14.1f} {sign_s:>10.3f} {decrypt:>12}'.format(
+                decrypt='-' if 'decrypt_s' not in result else '{:.3f}'.format(result['decrypt_s']), **result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Startup time benchmark for the pocketbook command line.
+
+Each subcommand is invoked with --help in a fresh interpreter, which measures the cost of the interpreter startup,
+module imports and command line parsing (i.e. everything before the command handler is dispatched). The key store root
+is redirected to a temporary folder so that the real wallet is never touched.
+
+    python benchmarks/startup.py [-r REPEATS] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS = [
+    [],
+    ['--version'],
+    ['list'],
+    ['create'],
+    ['add'],
+    ['transfer'],
+    ['rename'],
+    ['delete'],
+    ['import'],
+    ['export'],
+    ['batch-transfer'],
+    ['status'],
+    ['tx', 'build'],
+    ['tx', 'sign'],
+    ['tx', 'broadcast'],
+    ['serve'],
+    ['call'],
+    ['agent'],
+    ['migrate'],
+]
+
+LAUNCHER = 'import sys; from pocketbook.cli import main; sys.argv = ["pocketbook"] + sys.argv[1:]; main()'
+
+
+def time_invocation(command, env):
+    args = [sys.executable, '-c', LAUNCHER] + command
+    if command != ['--version']:
+        args.append('--help')
+
+    start = time.perf_counter()
+    subprocess.run(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def run_benchmark(repeats):
+    results = []
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as home:
+        # create the key store folder so that the disclaimer is not displayed
+        os.makedirs(os.path.join(home, '.pocketbook'))
+
+        env = dict(os.environ)
+        env['HOME'] = home
+
+        for command in COMMANDS:
+            # discard the first run to warm the file system / bytecode caches
+            time_invocation(command, env)
+
+            samples = [time_invocation(command, env) for _ in range(repeats)]
+            results.append({
+                'command': ' '.join(command) or '(none)',
+                'min_ms': min(samples) * 1e3,
+                'median_ms': statistics.median(samples) * 1e3,
+                'max_ms': max(samples) * 1e3,
+            })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time of each pocketbook subcommand')
+    parser.add_argument('-r', '--repeats', type=int, default=10, help='The number of timed runs per command')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeats)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print('{:<16} {:>10} {:>10} {:>10}'.format('Command', 'Min (ms)', 'Med (ms)', 'Max (ms)'))
+        for result in results:
+            print('{command:<16} {min_ms:>10.1f} {median_ms:>10.1f} {max_ms:>10.1f}'.format(**result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Scaling benchmark for the KeyStore and AddressBook, with each of the storage backends.
+
+For each size a store is built in a temporary root and then the hot paths are timed: opening the store, listing the
+names, lookups by name (and by address for the key store), and adding, renaming and removing single entries. The peak
+memory allocated (by Python) while opening and listing the store and the size of the files on disk are also recorded.
+
+Every key in the key store shares the same encrypted contents and, when adding keys, the encryption is replaced with a
+copy of them: the key derivation is a fixed ~1s cost per key (see keygen.py) which would otherwise hide the cost of
+maintaining the index.
+
+The results can be saved (--output) and compared against a previous run (--baseline), any timing which is slower than
+the baseline by more than the threshold is reported as a regression and results in a non-zero exit code.
+
+    python benchmarks/storage.py [-s SIZES ...] [-b BACKENDS ...] [-r REPEATS] [--json]
+                                 [--output FILE] [--baseline FILE] [--threshold FRACTION]
+
+Stores of up to 100,000 entries can be measured (e.g. -s 100 1000 100000), the larger sizes take several minutes.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fetchai.ledger.crypto import Entity  # noqa: E402
+
+from fake_ledger import account_address  # noqa: E402
+from pocketbook import __version__  # noqa: E402
+from pocketbook.address_book import AddressBook  # noqa: E402
+from pocketbook.key_store import KeyStore  # noqa: E402
+from pocketbook.storage import STORAGE_BACKENDS, open_address_storage, open_key_storage  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_REPEATS = 5
+DEFAULT_LOOKUPS = 1000
+DEFAULT_THRESHOLD = 0.25
+BENCHMARK_PASSWORD = 'Fetch!Ai-B3nchm4rk!'
+
+# the timings compared against the baseline, the lookups are per lookup (in microseconds)
+TIMING_METRICS = ('open_ms', 'list_ms', 'lookup_us', 'reverse_lookup_us', 'add_ms', 'rename_ms', 'remove_ms')
+
+
+def _median_time(fn, repeats):
+    samples = []
+    for n in range(repeats):
+        start = time.perf_counter()
+        fn(n)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def _disk_usage(root):
+    return sum(entry.stat().st_size for entry in os.scandir(root) if entry.is_file())
+
+
+def _peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def build_key_store(root, backend, size, key_data, public_key):
+    storage = open_key_storage(root, backend)
+    storage.add_all([
+        ({'name': 'key-{}'.format(index), 'address': account_address(index), 'public_key': public_key}, key_data)
+        for index in range(size)
+    ])
+    storage.close()
+
+
+def build_address_book(root, backend, size):
+    storage = open_address_storage(root, backend)
+    with storage.batch():
+        for index in range(size):
+            storage.add('address-{}'.format(index), account_address(index))
+    storage.close()
+
+
+def measure_key_store(backend, size, repeats, lookups, key_data, public_key):
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as root:
+        build_key_store(root, backend, size, key_data, public_key)
+
+        rng, keys = random.Random(size), ['key-{}'.format(index) for index in range(size)]
+        names = [rng.choice(keys) for _ in range(lookups)]
+        addresses = [account_address(int(name.split('-')[1])) for name in names]
+
+        open_ms = _median_time(lambda _: KeyStore(root=root).close(), repeats)
+        peak_memory = _peak_memory(lambda: KeyStore(root=root).list_keys())
+
+        key_store = KeyStore(root=root)
+        list_ms = _median_time(lambda _: key_store.list_keys(), repeats)
+        lookup_us = _median_time(lambda _: [key_store.lookup_address(name) for name in names], repeats) * 1e3 / lookups
+        reverse_lookup_us = _median_time(
+            lambda _: [key_store.lookup_name(address) for address in addresses], repeats) * 1e3 / lookups
+
+        # the key encryption is replaced with the pre-encrypted contents, see above
+        entities = [Entity() for _ in range(repeats)]
+        with patch.object(Entity, 'dumps', return_value=key_data):
+            add_ms = _median_time(
+                lambda n: key_store.add_key('new-{}'.format(n), BENCHMARK_PASSWORD, entities[n]), repeats)
+        rename_ms = _median_time(lambda n: key_store.rename_key('new-{}'.format(n), 'renamed-{}'.format(n)), repeats)
+        remove_ms = _median_time(lambda n: key_store.remove_key('renamed-{}'.format(n)), repeats)
+
+        disk_bytes = _disk_usage(root)
+        key_store.close()
+
+    return {
+        'store': 'key_store',
+        'backend': backend,
+        'size': size,
+        'open_ms': open_ms,
+        'list_ms': list_ms,
+        'lookup_us': lookup_us,
+        'reverse_lookup_us': reverse_lookup_us,
+        'add_ms': add_ms,
+        'rename_ms': rename_ms,
+        'remove_ms': remove_ms,
+        'peak_memory_bytes': peak_memory,
+        'disk_bytes': disk_bytes,
+    }
+
+
+def measure_address_book(backend, size, repeats, lookups):
+    with tempfile.TemporaryDirectory(prefix='pocketbook_bench_') as root:
+        build_address_book(root, backend, size)
+
+        rng, entries = random.Random(size), ['address-{}'.format(index) for index in range(size)]
+        names = [rng.choice(entries) for _ in range(lookups)]
+        new_address = account_address(size)
+
+        open_ms = _median_time(lambda _: AddressBook(root=root).close(), repeats)
+        peak_memory = _peak_memory(lambda: AddressBook(root=root).keys())
+
+        address_book = AddressBook(root=root)
+        list_ms = _median_time(lambda _: address_book.keys(), repeats)
+        lookup_us = _median_time(
+            lambda _: [address_book.lookup_address(name) for name in names], repeats) * 1e3 / lookups
+        add_ms = _median_time(lambda n: address_book.add('new-{}'.format(n), new_address), repeats)
+        rename_ms = _median_time(lambda n: address_book.rename('new-{}'.format(n), 'renamed-{}'.format(n)), repeats)
+        remove_ms = _median_time(lambda n: address_book.remove('renamed-{}'.format(n)), repeats)
+
+        disk_bytes = _disk_usage(root)
+        address_book.close()
+
+    return {
+        'store': 'address_book',
+        'backend': backend,
+        'size': size,
+        'open_ms': open_ms,
+        'list_ms': list_ms,
+        'lookup_us': lookup_us,
+        'reverse_lookup_us': None,
+        'add_ms': add_ms,
+        'rename_ms': rename_ms,
+        'remove_ms': remove_ms,
+        'peak_memory_bytes': peak_memory,
+        'disk_bytes': disk_bytes,
+    }
+
+
+def run_benchmark(sizes, backends, repeats, lookups):
+    entity = Entity()
+    key_data = entity.dumps(BENCHMARK_PASSWORD)
+
+    results = []
+    for backend in backends:
+        for size in sizes:
+            results.append(measure_key_store(backend, size, repeats, lookups, key_data, entity.public_key))
+            results.append(measure_address_book(backend, size, repeats, lookups))
+
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare the timings of a run against a baseline run
+
+    :param report: The report of this run
+    :param baseline: The report of the baseline run
+    :param threshold: The fraction by which a timing can be slower than the baseline before it is a regression
+    :return: The list of (store, backend, size, metric, baseline, current, ratio) tuples for the regressions
+    """
+    previous = {(result['store'], result['backend'], result['size']): result for result in baseline['results']}
+
+    regressions = []
+    for result in report['results']:
+        reference = previous.get((result['store'], result['backend'], result['size']))
+        if reference is None:
+            continue
+
+        for metric in TIMING_METRICS:
+            current, expected = result.get(metric), reference.get(metric)
+            if current is None or not expected:
+                continue
+
+            ratio = current / expected
+            if ratio > 1.0 + threshold:
+                regressions.append(
+                    (result['store'], result['backend'], result['size'], metric, expected, current, ratio))
+
+    return regressions
+
+
+def _format_time(value):
+    return '-' if value is None else '{:.3f}'.format(value)
+
+
+def display(report):
+    print('pocketbook {version} (python {python}), timings in ms, lookups in us per lookup'.format(**report))
+    print('{:<12} {:<7} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>10} {:>11}'.format(
+        'Store', 'Backend', 'Size', 'Open', 'List', 'Lookup', 'Reverse', 'Add', 'Rename', 'Remove', 'Peak (KiB)',
+        'Disk (KiB)'))
+    for result in report['results']:
+        print('{:<12} {:<7} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>10.1f} {:>11.1f}'.format(
+            result['store'], result['backend'], result['size'],
+            *[_format_time(result[metric]) for metric in TIMING_METRICS],
+            result['peak_memory_bytes'] / 1024, result['disk_bytes'] / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how the key store and address book scale with their size')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='The numbers of entries in the stores')
+    parser.add_argument('-b', '--backends', nargs='+', choices=STORAGE_BACKENDS, default=list(STORAGE_BACKENDS),
+                        help='The storage backends to be measured')
+    parser.add_argument('-r', '--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='The number of timed runs of each operation')
+    parser.add_argument('--lookups', type=int, default=DEFAULT_LOOKUPS,
+                        help='The number of lookups in each timed run (the time per lookup is reported)')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    parser.add_argument('-o', '--output', help='Save the results (as JSON) to this file')
+    parser.add_argument('--baseline', help='Compare the timings against previously saved results')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='The fraction by which a timing can be slower than the baseline before it is reported')
+    args = parser.parse_args()
+
+    report = run_benchmark(sorted(set(args.sizes)), args.backends, max(1, args.repeats), max(1, args.lookups))
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        display(report)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(report, baseline, args.threshold)
+        print(file=sys.stderr)
+        if len(regressions) == 0:
+            print('No regressions against {} (pocketbook {})'.format(args.baseline, baseline['version']),
+                  file=sys.stderr)
+            return
+
+        print('Regressions against {} (pocketbook {}):'.format(args.baseline, baseline['version']), file=sys.stderr)
+        for store, backend, size, metric, expected, current, ratio in regressions:
+            print('  {} {} {} {}: {:.3f} -> {:.3f} ({:+.0f}%)'.format(
+                store, backend, size, metric, expected, current, (ratio - 1.0) * 100), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
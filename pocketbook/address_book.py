@@ -1,24 +1,35 @@
-import os
-
-import toml
-
 from .constants import DEFAULT_KEY_STORE_ROOT
+from .storage import ADDRESS_INDEX_FILE_NAME, open_address_storage
+from .timings import span
 
 
 class AddressBook:
-    INDEX_FILE_NAME = 'addresses.toml'
+    INDEX_FILE_NAME = ADDRESS_INDEX_FILE_NAME
 
-    def __init__(self, root=None):
+    def __init__(self, root=None, storage=None):
+        """
+        :param root: The key store root directory
+        :param storage: The AddressStorage backend, by default determined from the contents of the root
+        """
         self._root = root or DEFAULT_KEY_STORE_ROOT
-        self._address_book_path = os.path.join(self._root, self.INDEX_FILE_NAME)
-        self._address_book = self._load()
+        with span('address_book.open'):
+            self._storage = storage or open_address_storage(self._root)
+
+    def batch(self):
+        """
+        Group a series of mutations together so that they are committed once
+        """
+        return self._storage.batch()
+
+    def close(self):
+        self._storage.close()
 
     def add(self, name, address):
-        if name in self._address_book:
+        if self._storage.get(name) is not None:
             raise RuntimeError('Address already exists')
 
-        self._address_book[name] = str(address)
-        self._save()
+        if not self._storage.add(name, str(address)):
+            raise RuntimeError('Address already exists')
 
     def rename(self, old: str, new: str) -> bool:
         """
@@ -28,15 +39,7 @@ class AddressBook:
         :param new: The new name for the address
         :return: True if successful, otherwise False
         """
-        success = False
-
-        if old in self._address_book and new not in self._address_book:
-            self._address_book[new] = self._address_book[old]
-            del self._address_book[old]
-            self._save()
-            success = True
-
-        return success
+        return self._storage.rename(old, new)
 
     def remove(self, name: str) -> bool:
         """
@@ -45,31 +48,20 @@ class AddressBook:
         :param name: The name of the address to remove
         :return: True if successful, otherwise False
         """
-        success = False
-        if name in self._address_book:
-            del self._address_book[name]
-            self._save()
-            success = True
-        return success
+        return self._storage.remove(name)
 
     def keys(self):
-        return self._address_book.keys()
+        return self._storage.names()
 
     def items(self):
-        return self._address_book.items()
+        return self._storage.items()
+
+    def has_address(self, name: str) -> bool:
+        return self._storage.get(name) is not None
 
     def lookup_address(self, name):
-        if name not in self._address_book:
+        address = self._storage.get(name)
+        if address is None:
             raise RuntimeError('Unable to lookup requested address: {}'.format(name))
 
-        return self._address_book[name]
-
-    def _save(self):
-        with open(self._address_book_path, 'w') as output_file:
-            toml.dump(self._address_book, output_file)
-
-    def _load(self):
-        if not os.path.exists(self._address_book_path):
-            return {}
-        with open(self._address_book_path, 'r') as input_file:
-            return toml.load(input_file)
+        return address
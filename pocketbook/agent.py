@@ -0,0 +1,264 @@
+import base64
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from fetchai.ledger.crypto import Address, Identity
+
+from .constants import AGENT_SOCKET_ENV, DEFAULT_AGENT_IDLE_TIMEOUT, DEFAULT_AGENT_SOCKET_PATH
+
+# linux constants for process hardening
+_PR_SET_DUMPABLE = 4
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+
+def agent_socket_path():
+    return os.environ.get(AGENT_SOCKET_ENV) or DEFAULT_AGENT_SOCKET_PATH
+
+
+def harden_process():
+    """
+    Best effort protection of the decrypted keys held in the memory of the current process. Core dumps are disabled,
+    the process is marked as non-dumpable (preventing other processes of the same user from attaching to it) and, if
+    the memory lock limit allows it, all current and future pages are locked into RAM so that they are never swapped.
+
+    :return: The list of measures that could not be applied
+    """
+    failures = []
+
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    except (ImportError, ValueError, OSError):
+        failures.append('disable core dumps')
+
+    libc_name = ctypes.util.find_library('c')
+    libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name and sys.platform.startswith('linux') else None
+
+    if libc is None or libc.prctl(_PR_SET_DUMPABLE, 0, 0, 0, 0) != 0:
+        failures.append('mark process as non-dumpable')
+
+    # locking future pages with a finite limit would cause allocations to start failing once it is reached
+    try:
+        import resource
+        unlimited = resource.getrlimit(resource.RLIMIT_MEMLOCK)[0] == resource.RLIM_INFINITY
+    except (ImportError, ValueError, OSError):
+        unlimited = False
+
+    if libc is None or not unlimited or libc.mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+        failures.append('lock memory')
+
+    return failures
+
+
+class KeyAgent:
+    """
+    Holds decrypted keys in memory so that they can be used for signing without decrypting the key file (and prompting
+    for the password) each time. In the same way as ssh-agent the private keys never leave the agent, clients send the
+    payload to be signed and receive the signature.
+
+    Keys which have not been used for `idle_timeout` seconds are dropped.
+    """
+
+    def __init__(self, root=None, idle_timeout=None, clock=None):
+        self._root = root
+        self._idle_timeout = DEFAULT_AGENT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self._clock = clock or time.monotonic
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._last_used = {}
+
+    def methods(self) -> dict:
+        return {
+            'unlock': self.unlock,
+            'lock': self.lock,
+            'list': self.list,
+            'identity': self.identity,
+            'sign': self.sign,
+        }
+
+    def unlock(self, name: str, password: str):
+        """
+        Decrypt a key from the key store and hold it in the agent
+
+        :param name: The name of the key
+        :param password: The password for the key
+        :return: The address of the key
+        """
+        from pocketbook.key_store import KeyStore
+
+        entity = KeyStore(root=self._root).load_key(name, password)
+        with self._lock:
+            self._keys[name] = entity
+            self._last_used[name] = self._clock()
+
+        return str(Address(entity))
+
+    def lock(self, names=None):
+        """
+        Drop keys from the agent
+
+        :param names: The list of key names to drop (all keys if not specified)
+        :return: The list of names of the keys which were dropped
+        """
+        with self._lock:
+            names = list(self._keys.keys()) if names is None else [names] if isinstance(names, str) else names
+            return [name for name in names if self._drop(name)]
+
+    def list(self):
+        self.expire()
+        now = self._clock()
+        with self._lock:
+            return [
+                {'name': name, 'address': str(Address(entity)), 'idle': int(now - self._last_used[name])}
+                for name, entity in sorted(self._keys.items())
+            ]
+
+    def identity(self, name: str):
+        """
+        Lookup the public key of an unlocked key
+
+        :param name: The name of the key
+        :return: The base64 encoded public key or None if the key is not unlocked
+        """
+        entity = self._use(name)
+        return None if entity is None else entity.public_key
+
+    def sign(self, name: str, payload: str):
+        """
+        Sign a payload with an unlocked key
+
+        :param name: The name of the key
+        :param payload: The base64 encoded payload
+        :return: The base64 encoded signature
+        """
+        entity = self._use(name)
+        if entity is None:
+            raise RuntimeError('Key is not unlocked: {}'.format(name))
+
+        return base64.b64encode(entity.sign(base64.b64decode(payload))).decode()
+
+    def expire(self):
+        """
+        Drop all the keys which have been idle for longer than the timeout
+
+        :return: The list of names of the keys which were dropped
+        """
+        cutoff = self._clock() - self._idle_timeout
+        with self._lock:
+            return [name for name, last_used in list(self._last_used.items()) if last_used < cutoff and self._drop(name)]
+
+    def _use(self, name: str):
+        self.expire()
+        with self._lock:
+            entity = self._keys.get(name)
+            if entity is not None:
+                self._last_used[name] = self._clock()
+            return entity
+
+    def _drop(self, name: str) -> bool:
+        self._last_used.pop(name, None)
+        return self._keys.pop(name, None) is not None
+
+
+class RemoteSigner(Identity):
+    """
+    Signer whose private key is held by a key agent. It can be used wherever an Entity would be used for signing.
+
+    A connection to the agent is made for each signature, so no connection is held open between uses and the signer can
+    be used concurrently from multiple threads.
+    """
+
+    def __init__(self, socket_path: str, name: str, public_key: str):
+        super().__init__(base64.b64decode(public_key))
+        self._socket_path = socket_path
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def sign(self, message: bytes) -> bytes:
+        from pocketbook.rpc import RpcClient
+
+        with RpcClient(self._socket_path) as client:
+            signature = client.call('sign', name=self._name, payload=base64.b64encode(message).decode())
+        return base64.b64decode(signature)
+
+
+def connect_agent(socket_path=None):
+    """
+    Connect to the key agent if one is running
+
+    :param socket_path: The path of the agent socket (defaults to the agent_socket_path())
+    :return: The RpcClient for the agent or None if the agent is not running
+    """
+    from pocketbook.rpc import RpcClient
+
+    socket_path = socket_path or agent_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    try:
+        return RpcClient(socket_path)
+    except OSError:
+        return None
+
+
+def _matches_key_store(key_store, name: str, public_key: str) -> bool:
+    # keys created before the public keys were recorded can only be checked against their address
+    expected = key_store.lookup_public_key(name)
+    if expected is not None:
+        return expected == public_key
+
+    address = key_store.lookup_address(name)
+    return address is not None and Address(address) == Address(Identity(base64.b64decode(public_key)))
+
+
+def unseal_keys(key_store, names, socket_path=None, workers=None):
+    """
+    Obtain signers for the specified keys. Keys which are unlocked in the key agent are used via the agent, provided
+    that the agent holds the same key as the key store. The passwords for the remaining keys are all collected up front
+    and then the keys are decrypted in parallel.
+
+    :param key_store: The key store
+    :param names: The names of the keys
+    :param socket_path: The path of the agent socket (defaults to the agent_socket_path())
+    :param workers: The maximum number of worker processes used to decrypt the keys
+    :return: The ordered dict of key name to signer
+    """
+    from getpass import getpass
+
+    socket_path = socket_path or agent_socket_path()
+    client = connect_agent(socket_path)
+
+    public_keys = {}
+    if client is not None:
+        with client:
+            for name in names:
+                public_keys[name] = client.call('identity', name=name)
+
+    signers, credentials = {}, {}
+    for name in names:
+        public_key = public_keys.get(name)
+        if public_key is not None and not _matches_key_store(key_store, name, public_key):
+            print('Warning: the key agent holds a different key for {}, ignoring it'.format(name), file=sys.stderr)
+            public_key = None
+
+        if public_key is not None:
+            signers[name] = RemoteSigner(socket_path, name, public_key)
+        else:
+            credentials[name] = getpass('Enter password for key {}: '.format(name))
+
+    if len(credentials) == 1:
+        signers.update((name, key_store.load_key(name, password)) for name, password in credentials.items())
+    elif len(credentials) > 1:
+        signers.update(key_store.load_keys(credentials, workers=workers))
+
+    # preserve the order of the signers
+    return OrderedDict((name, signers[name]) for name in names)
@@ -0,0 +1,113 @@
+import heapq
+import os
+import time
+
+import toml
+
+from .constants import DEFAULT_KEY_STORE_ROOT
+from .journal import atomic_write
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class BalanceCache:
+    """
+    Persistent cache of the last known balance and stake for addresses on a given network.
+
+    The cache lives alongside the key store index files and is keyed by network and then address. Each entry records
+    the time at which it was fetched so that callers can decide how stale a value they are prepared to accept. The
+    total number of entries (across all networks) is bounded, the oldest entries being evicted first.
+    """
+    CACHE_FILE_NAME = 'balances.toml'
+
+    def __init__(self, network: str, root=None, ttl=None, max_entries=None, clock=None):
+        self._network = str(network)
+        self._root = root or DEFAULT_KEY_STORE_ROOT
+        self._cache_path = os.path.join(self._root, self.CACHE_FILE_NAME)
+        self._ttl = DEFAULT_TTL if ttl is None else ttl
+        self._max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self._clock = clock or time.time
+        self._cache = self._load()
+        self._dirty = False
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    def get(self, address, max_age=None):
+        """
+        Lookup the cached balance and stake for an address
+
+        :param address: The address to lookup
+        :param max_age: The maximum age (in seconds) of an acceptable entry, defaults to the cache TTL
+        :return: The (balance, stake) tuple if a fresh entry is present, otherwise None
+        """
+        max_age = self._ttl if max_age is None else max_age
+
+        entry = self._cache.get(self._network, {}).get(str(address))
+        if entry is None:
+            return None
+        if (self._clock() - entry['timestamp']) > max_age:
+            return None
+
+        # entries written by older versions held (inexact) floating point amounts, these are treated as missing
+        if not isinstance(entry['balance'], int) or not isinstance(entry['stake'], int):
+            return None
+
+        return entry['balance'], entry['stake']
+
+    def requires_refresh(self, addresses, max_age=None) -> bool:
+        """
+        Determine if any of the specified addresses do not have a fresh entry in the cache
+
+        :param addresses: The addresses to check
+        :param max_age: The maximum age (in seconds) of an acceptable entry, None implies always refresh
+        :return: True if one or more addresses need to be fetched from the network, otherwise False
+        """
+        if max_age is None:
+            return True
+        return any(self.get(address, max_age) is None for address in addresses)
+
+    def put(self, address, balance, stake, timestamp=None):
+        timestamp = self._clock() if timestamp is None else timestamp
+        self._cache.setdefault(self._network, {})[str(address)] = {
+            'balance': balance,
+            'stake': stake,
+            'timestamp': timestamp,
+        }
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        self._evict()
+
+        os.makedirs(self._root, exist_ok=True)
+        atomic_write(self._cache_path, toml.dumps(self._cache))
+        self._dirty = False
+
+    def _evict(self):
+        entries = [(entry['timestamp'], network, address)
+                   for network, addresses in self._cache.items()
+                   for address, entry in addresses.items()]
+
+        excess = len(entries) - self._max_entries
+        if excess <= 0:
+            return
+
+        for _, network, address in heapq.nsmallest(excess, entries):
+            del self._cache[network][address]
+            if len(self._cache[network]) == 0:
+                del self._cache[network]
+
+    def _load(self):
+        if not os.path.exists(self._cache_path):
+            return {}
+        try:
+            with open(self._cache_path, 'r') as cache_file:
+                return toml.load(cache_file)
+        except toml.TomlDecodeError:
+            # the cache is purely advisory, a damaged file is simply discarded
+            return {}
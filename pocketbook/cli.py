@@ -3,12 +3,29 @@ import sys
 
 from . import __version__
 from .commands.add import run_add
+from .commands.agent import run_agent
+from .commands.batch_transfer import run_batch_transfer
+from .commands.call import run_call
 from .commands.create import run_create
 from .commands.delete import run_delete
+from .commands.export import run_export
+from .commands.import_ import run_import
 from .commands.list import run_list
+from .commands.migrate import run_migrate
 from .commands.rename import run_rename
+from .commands.serve import run_serve
+from .commands.status import run_status
 from .commands.transfer import run_transfer
+from .commands.tx import run_tx
+from .connection import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, configure
+from .constants import DEFAULT_AGENT_IDLE_TIMEOUT, DEFAULT_CONCURRENCY, DEFAULT_SOCKET_PATH
 from .disclaimer import display_disclaimer
+from .formats import OUTPUT_FORMATS, RECORD_FORMATS
+from .payouts import DEFAULT_CONFIRMATION_TIMEOUT, DEFAULT_WINDOW
+from .portfolio import GROUP_KEYS, SORT_KEYS
+from .storage import STORAGE_BACKENDS
+from .timings import TEXT_TIMINGS, TIMINGS_FORMATS
+from .transactions import DEFAULT_VALIDITY_PERIOD
 from .utils import NetworkUnavailableError, checked_address, to_canonical, MINIMUM_FRACTIONAL_FET
 
 
@@ -16,14 +33,43 @@ def parse_commandline():
     parser = argparse.ArgumentParser(prog='pocketbook')
     parser.add_argument('-v', '--version', action='version', version=__version__)
     parser.add_argument('-n', '--network', default='mainnet', help='The name of the target being addressed')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='The timeout (in seconds) for each request made to the network')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help='The maximum number of keep-alive connections held open to the network')
+    parser.add_argument('--timings', action='store_true',
+                        help='Display a breakdown of where the time was spent (on stderr)')
+    parser.add_argument('--timings-format', choices=TIMINGS_FORMATS, default=TEXT_TIMINGS,
+                        help='The format of the timings breakdown')
     subparsers = parser.add_subparsers()
 
     parser_list = subparsers.add_parser('list', aliases=['ls'], help='Lists all the balances and addresses')
     parser_list.add_argument('-v', '--verbose', action='store_true', help='Display extra information (if available)')
+    parser_list.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                             help='The maximum number of network requests in flight at any one time')
+    parser_list.add_argument('--cached', action='store_true',
+                             help='Use recently cached balances where available, only fetching stale entries')
+    parser_list.add_argument('--max-age', type=int, help='The maximum age (in seconds) of cached balances to be used')
+    parser_list.add_argument('--sum', action='store_true', help='Display the total balance and stake')
+    parser_list.add_argument('--group-by', choices=GROUP_KEYS, help='Group the entries, displaying a subtotal for each')
+    parser_list.add_argument('--sort', choices=SORT_KEYS, help='Order the entries (largest balance or stake first)')
+    parser_list.add_argument('--top', type=int, help='Only display the first N entries (by balance by default)')
+    parser_list.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                             help='Output the entries in a machine readable format instead of a table')
+    parser_list.add_argument('--stream', action='store_true',
+                             help='Display each entry as soon as its balance is known (in no particular order)')
     parser_list.add_argument('pattern', nargs='*', default=['*'])
     parser_list.set_defaults(handler=run_list)
 
     parser_create = subparsers.add_parser('create', aliases=['new'], help='Create a new key')
+    parser_create.add_argument('--count', type=int, help='Create this many keys non-interactively')
+    parser_create.add_argument('--name-template', default='key-{}',
+                               help='The template for the names of the keys, {} is replaced by the index')
+    parser_create.add_argument('--start', type=int, default=1, help='The index of the first key')
+    parser_create.add_argument('--password-file', help='Read the password for the keys from a file (- for stdin)')
+    parser_create.add_argument('--password-env', help='Read the password for the keys from an environment variable')
+    parser_create.add_argument('--workers', type=int,
+                               help='The maximum number of processes used to generate the keys')
     parser_create.set_defaults(handler=run_create)
 
     parser_add = subparsers.add_parser('add', help='Adds an address to the address book')
@@ -38,9 +84,40 @@ def parse_commandline():
     parser_transfer.add_argument('--from', dest='from_address', help='The signing account, required for multi-sig')
     parser_transfer.add_argument('-R', '--charge-rate', type=to_canonical, default=to_canonical(MINIMUM_FRACTIONAL_FET),
                                  help='The charge rate associated with this transaction')
+    parser_transfer.add_argument('--no-wait', action='store_true',
+                                 help='Do not wait for the transaction to be executed, track it with the status command')
+    parser_transfer.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                                 help='Output the result of the transfer in a machine readable format')
     parser_transfer.add_argument('signers', nargs='+', help='The series of key names needed to sign the transaction')
     parser_transfer.set_defaults(handler=run_transfer)
 
+    parser_status = subparsers.add_parser('status', help='Tracks the status of pending transactions')
+    parser_status.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                               help='The maximum number of network requests in flight at any one time')
+    parser_status.add_argument('--once', action='store_true', help='Poll the transactions once rather than waiting')
+    parser_status.add_argument('--max-wait', type=float,
+                               help='The maximum time (in seconds) to wait for the transactions to complete')
+    parser_status.add_argument('digests', nargs='*', help='The digests to track (all pending transactions by default)')
+    parser_status.set_defaults(handler=run_status)
+
+    parser_batch = subparsers.add_parser('batch-transfer', help='Pays out funds to many destinations from a CSV/JSONL file')
+    parser_batch.add_argument('path', help='The payout file containing destination and amount columns')
+    parser_batch.add_argument('-f', '--format', choices=RECORD_FORMATS,
+                              help='The format of the payout file (determined from the extension by default)')
+    parser_batch.add_argument('--from', dest='from_address', help='The signing account, required for multi-sig')
+    parser_batch.add_argument('-R', '--charge-rate', type=to_canonical, default=to_canonical(MINIMUM_FRACTIONAL_FET),
+                              help='The charge rate associated with each transaction')
+    parser_batch.add_argument('--ledger', help='The file used to record the results (<path>.results.jsonl by default)')
+    parser_batch.add_argument('-w', '--window', type=int, default=DEFAULT_WINDOW,
+                              help='The maximum number of submissions in flight at any one time')
+    parser_batch.add_argument('--confirm-timeout', type=float, default=DEFAULT_CONFIRMATION_TIMEOUT,
+                              help='The time (in seconds) to wait for the transfers to be executed')
+    parser_batch.add_argument('--workers', type=int,
+                              help='The maximum number of processes used to sign (the number of CPUs by default)')
+    parser_batch.add_argument('-y', '--yes', action='store_true', help='Do not prompt for confirmation')
+    parser_batch.add_argument('signers', nargs='+', help='The series of key names needed to sign the transactions')
+    parser_batch.set_defaults(handler=run_batch_transfer)
+
     parser_rename = subparsers.add_parser('rename', aliases=['mv'], help='Renames and address or key to another name')
     parser_rename.add_argument('old', help='The name of the old account name')
     parser_rename.add_argument('new', help='The new name of the account')
@@ -50,17 +127,118 @@ def parse_commandline():
     parser_delete.add_argument('name', help='The name of the account to remove')
     parser_delete.set_defaults(handler=run_delete)
 
+    parser_import = subparsers.add_parser('import',
+                                          help='Imports addresses into the address book from a CSV/JSON/JSONL file')
+    parser_import.add_argument('path', help='The file to be imported (- for stdin)')
+    parser_import.add_argument('-f', '--format', choices=RECORD_FORMATS,
+                               help='The format of the input file (determined from the extension by default)')
+    parser_import.set_defaults(handler=run_import)
+
+    parser_export = subparsers.add_parser('export', help='Exports the keys and addresses to a CSV/JSON/JSONL file')
+    parser_export.add_argument('path', nargs='?', default='-', help='The output file (stdout by default)')
+    parser_export.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                               help='The format of the output file (determined from the extension by default)')
+    parser_export.add_argument('--addresses-only', action='store_true',
+                               help='Only export the address book, not the key metadata')
+    parser_export.set_defaults(handler=run_export)
+
+    parser_migrate = subparsers.add_parser('migrate', help='Moves the keys and addresses to another storage backend')
+    parser_migrate.add_argument('backend', choices=STORAGE_BACKENDS, help='The storage backend to migrate to')
+    parser_migrate.set_defaults(handler=run_migrate)
+
+    parser_serve = subparsers.add_parser('serve', help='Runs pocketbook as a daemon serving requests on a local socket')
+    parser_serve.add_argument('-s', '--socket', default=DEFAULT_SOCKET_PATH, help='The path of the unix socket')
+    parser_serve.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                              help='The maximum number of network requests in flight at any one time')
+    parser_serve.set_defaults(handler=run_serve)
+
+    parser_call = subparsers.add_parser('call', help='Makes a request to a running pocketbook daemon')
+    parser_call.add_argument('-s', '--socket', default=DEFAULT_SOCKET_PATH, help='The path of the unix socket')
+    parser_call.add_argument('method', choices=['list', 'lookup', 'balance', 'transfer', 'reload'],
+                             help='The daemon method to call')
+    parser_call.add_argument('params', nargs='*', help='The method parameters in the form name=value')
+    parser_call.set_defaults(handler=run_call)
+
+    parser_tx = subparsers.add_parser('tx', help='Builds, signs and broadcasts transactions as separate steps')
+    tx_subparsers = parser_tx.add_subparsers(dest='tx_action')
+    tx_subparsers.required = True
+    parser_tx.set_defaults(handler=run_tx)
+
+    parser_tx_build = tx_subparsers.add_parser('build', help='Builds unsigned transfers into a transaction file')
+    parser_tx_build.add_argument('output', help='The transaction file to be written')
+    parser_tx_build.add_argument('--payouts', help='A CSV/JSONL file of destination and amount columns')
+    parser_tx_build.add_argument('-f', '--format', choices=RECORD_FORMATS,
+                                 help='The format of the payout file (determined from the extension by default)')
+    parser_tx_build.add_argument('--to', dest='destination', help='The destination of a single transfer')
+    parser_tx_build.add_argument('--amount', type=to_canonical, help='The amount of FET of a single transfer')
+    parser_tx_build.add_argument('--from', dest='from_address', help='The signing account, required for multi-sig')
+    parser_tx_build.add_argument('-R', '--charge-rate', type=to_canonical,
+                                 default=to_canonical(MINIMUM_FRACTIONAL_FET),
+                                 help='The charge rate associated with each transaction')
+    parser_tx_build.add_argument('--valid-from', type=int,
+                                 help='The block from which the transactions are valid (queried from the network '
+                                      'by default)')
+    parser_tx_build.add_argument('--validity-period', type=int, default=DEFAULT_VALIDITY_PERIOD,
+                                 help='The number of blocks for which the transactions are valid')
+    parser_tx_build.add_argument('signers', nargs='+', help='The series of key names needed to sign the transactions')
+
+    parser_tx_sign = tx_subparsers.add_parser('sign', help='Signs the transactions in a transaction file (offline)')
+    parser_tx_sign.add_argument('input', help='The transaction file to be signed')
+    parser_tx_sign.add_argument('-o', '--output', help='The signed transaction file (updated in place by default)')
+    parser_tx_sign.add_argument('--workers', type=int,
+                                help='The maximum number of processes used to sign (the number of CPUs by default)')
+    parser_tx_sign.add_argument('-y', '--yes', action='store_true', help='Do not prompt for confirmation')
+    parser_tx_sign.add_argument('signers', nargs='+', help='The keys to sign the transactions with')
+
+    parser_tx_broadcast = tx_subparsers.add_parser('broadcast', help='Submits the signed transactions in a file')
+    parser_tx_broadcast.add_argument('input', help='The signed transaction file')
+    parser_tx_broadcast.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                                     help='The maximum number of network requests in flight at any one time')
+    parser_tx_broadcast.add_argument('--no-wait', action='store_true',
+                                     help='Do not wait for the transactions to be executed, track them with the '
+                                          'status command')
+    parser_tx_broadcast.add_argument('--timeout', type=float, default=DEFAULT_CONFIRMATION_TIMEOUT,
+                                     help='The time (in seconds) to wait for the transactions to be executed')
+
+    parser_agent = subparsers.add_parser('agent', help='Holds unlocked keys in memory so that they can be used to sign')
+    parser_agent.add_argument('action', choices=['start', 'unlock', 'lock', 'list'],
+                              help='Start the agent, unlock or lock keys in it, or list the unlocked keys')
+    parser_agent.add_argument('names', nargs='*', help='The names of the keys to unlock or lock')
+    parser_agent.add_argument('-s', '--socket',
+                              help='The path of the agent socket (defaults to $POCKETBOOK_AGENT_SOCKET)')
+    parser_agent.add_argument('-t', '--idle-timeout', type=int, default=DEFAULT_AGENT_IDLE_TIMEOUT,
+                              help='The time (in seconds) after which unused keys are dropped by the agent')
+    parser_agent.set_defaults(handler=run_agent)
+
     return parser, parser.parse_args()
 
 
+def _enable_timings():
+    from . import timings
+
+    timings.enable()
+
+    # load the ledger SDK up front so that its (significant) import cost is reported on its own, rather than being
+    # included in the first phase of the command which happens to use it
+    with timings.span('import'):
+        import fetchai.ledger.api  # noqa: F401
+        import fetchai.ledger.crypto  # noqa: F401
+
+
 def main():
     # run the specified command
     exit_code = 1
+    args = None
     try:
         display_disclaimer()
 
         # parse the command line
         parser, args = parse_commandline()
+        if args.timings:
+            _enable_timings()
+
+        # apply the network connection settings
+        configure(pool_size=args.pool_size, timeout=args.timeout)
 
         # select the command handler
         if hasattr(args, 'handler'):
@@ -70,8 +248,11 @@ def main():
             handler = None
 
         if handler is not None:
+            from .timings import span
+
             # execute the handler
-            ret = handler(args)
+            with span('command'):
+                ret = handler(args)
 
             # update the exit code based on the return value
             if isinstance(ret, int):
@@ -88,5 +269,9 @@ def main():
     except Exception as ex:
         print('Error:', ex)
 
+    if args is not None and args.timings:
+        from .timings import report
+        report(args.timings_format)
+
     # close the program with the given exit code
     sys.exit(int(exit_code))
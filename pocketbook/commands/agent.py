@@ -0,0 +1,70 @@
+import threading
+
+# the interval (in seconds) at which idle keys are checked for expiry
+EXPIRY_CHECK_INTERVAL = 5
+
+
+def _run_start(args, socket_path):
+    from pocketbook.agent import KeyAgent, harden_process
+    from pocketbook.rpc import RpcServer, interrupt_on_terminate
+
+    for failure in harden_process():
+        print('Warning: unable to {}'.format(failure))
+
+    agent = KeyAgent(idle_timeout=args.idle_timeout)
+
+    # drop idle keys even when the agent is not being used
+    stopped = threading.Event()
+
+    def expire_loop():
+        while not stopped.wait(EXPIRY_CHECK_INTERVAL):
+            agent.expire()
+
+    expiry_thread = threading.Thread(target=expire_loop, daemon=True)
+    expiry_thread.start()
+
+    server = RpcServer(socket_path, agent.methods())
+    interrupt_on_terminate()
+    try:
+        print('Key agent listening on {} (Ctrl-C to stop)'.format(socket_path))
+        server.serve_forever()
+    finally:
+        stopped.set()
+        agent.lock()
+        server.server_close()
+
+
+def _run_unlock(args, client):
+    from getpass import getpass
+
+    for name in args.names:
+        address = client.call('unlock', name=name, password=getpass('Enter password for key {}: '.format(name)))
+        print('Unlocked {} ({})'.format(name, address))
+
+
+def _run_lock(args, client):
+    names = client.call('lock', names=args.names or None)
+    print('Locked {}'.format(', '.join(names) if len(names) > 0 else 'no keys'))
+
+
+def _run_list(args, client):
+    keys = client.call('list')
+    if len(keys) == 0:
+        print('No keys are unlocked')
+    for key in keys:
+        print('{name} {address} (idle {idle}s)'.format(**key))
+
+
+def run_agent(args):
+    from pocketbook.agent import agent_socket_path, connect_agent
+
+    socket_path = args.socket or agent_socket_path()
+    if args.action == 'start':
+        return _run_start(args, socket_path)
+
+    client = connect_agent(socket_path)
+    if client is None:
+        raise RuntimeError('The key agent is not running, start it with: pocketbook agent start')
+
+    with client:
+        {'unlock': _run_unlock, 'lock': _run_lock, 'list': _run_list}[args.action](args, client)
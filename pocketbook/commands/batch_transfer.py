@@ -0,0 +1,91 @@
+import sys
+
+
+def run_batch_transfer(args):
+    from fetchai.ledger.crypto import Address
+
+    from pocketbook.address_book import AddressBook
+    from pocketbook.agent import unseal_keys
+    from pocketbook.directory import Directory
+    from pocketbook.formats import detect_format
+    from pocketbook.key_store import KeyStore
+    from pocketbook.payouts import BatchTransferEngine, ResultLedger, read_payouts, EXECUTED
+    from pocketbook.transactions import check_funds, determine_from_account
+    from pocketbook.utils import canonical_token_amount, create_api
+
+    address_book = AddressBook()
+    key_store = KeyStore()
+    directory = Directory(key_store, address_book)
+
+    # Step 1. Read and validate the complete payout file before anything is paid
+    fmt = args.format or detect_format(args.path)
+    payouts, invalid = read_payouts(args.path, fmt, directory)
+    if len(invalid) > 0:
+        for row, reason in invalid:
+            print('Row {}: invalid payout: {}'.format(row, reason))
+        print('Unable to process payout file, {} invalid rows'.format(len(invalid)))
+        return 1
+
+    # check all the signers make sense and determine the from account
+    from_address_name = determine_from_account(key_store, address_book, args.signers, args.from_address)
+
+    # Step 2. Determine what is left to be done (if this is a resumed run)
+    ledger = ResultLedger(args.ledger or '{}.results.jsonl'.format(args.path))
+    to_submit, to_confirm = ledger.pending(payouts)
+
+    charge_rate = args.charge_rate
+    amount = sum(payout.amount for payout in to_submit)
+    fee = len(to_submit) * len(args.signers) * charge_rate
+    total = amount + fee
+
+    print('Network....:', args.network)
+    print('From.......:', str(from_address_name))
+    print('Signer(s)..:', ','.join(args.signers))
+    print('Payouts....: {} ({} to submit, {} awaiting confirmation)'.format(
+        len(payouts), len(to_submit), len(to_confirm)))
+    print('Amount.....:', canonical_token_amount(amount))
+    print('Fee........:', canonical_token_amount(fee))
+    print('Total......:', canonical_token_amount(total), '(Amount + Fee)')
+    print()
+
+    if len(to_submit) == 0 and len(to_confirm) == 0:
+        print('All payouts have already been executed')
+        return 0
+
+    if not args.yes:
+        input('Press enter to continue')
+
+    api = create_api(args.network)
+
+    # Step 3. Unseal each of the private keys once for the whole run (or use the copies held by the key agent)
+    entities = unseal_keys(key_store, args.signers, workers=args.workers)
+
+    if from_address_name in entities:
+        from_address = Address(entities[from_address_name])
+    else:
+        from_address = Address(directory.lookup_address(from_address_name))
+
+    engine = BatchTransferEngine(api, ledger, from_address, entities.values(), charge_rate, window=args.window,
+                                 timeout=args.confirm_timeout, workers=args.workers)
+
+    # Step 4. Submit the outstanding payouts, checking that the source account is able to fund them
+    if len(to_submit) > 0:
+        check_funds(api, from_address, from_address_name, total)
+
+        print('Submitting {} transfers...'.format(len(to_submit)))
+        to_confirm.update(engine.submit(to_submit))
+
+    # Step 5. Wait for all the submitted transfers to be executed
+    print('Waiting for {} transfers to be confirmed...'.format(len(to_confirm)))
+    remaining = engine.confirm(to_confirm)
+
+    # Step 6. Report the outcome
+    counts = ledger.summary()
+    print('Executed {} of {} payouts ({} failed, {} unconfirmed)'.format(
+        counts.get(EXECUTED, 0), len(payouts), len(payouts) - counts.get(EXECUTED, 0) - len(remaining),
+        len(remaining)))
+    if counts.get(EXECUTED, 0) != len(payouts):
+        print('Results recorded in {}, re-run the command to retry'.format(ledger.path), file=sys.stderr)
+        return 1
+
+    return 0
@@ -0,0 +1,34 @@
+import json
+
+
+def _parse_param(param: str):
+    if '=' not in param:
+        raise RuntimeError('Parameters must be of the form name=value: {}'.format(param))
+
+    name, value = param.split('=', 1)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass  # treat as a plain string
+
+    return name, value
+
+
+def run_call(args):
+    from getpass import getpass
+    from pocketbook.rpc import RpcClient
+
+    params = dict(_parse_param(param) for param in args.params)
+
+    # passwords are always collected locally rather than being passed on the command line
+    if args.method == 'transfer':
+        signers = params.get('signers', [])
+        signers = [signers] if isinstance(signers, str) else signers
+        params['passwords'] = {
+            signer: getpass('Enter password for key {}: '.format(signer)) for signer in signers
+        }
+
+    with RpcClient(args.socket) as client:
+        result = client.call(args.method, **params)
+
+    print(json.dumps(result, indent=2))
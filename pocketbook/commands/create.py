@@ -1,8 +1,90 @@
+import os
+import sys
+import time
+
+
+# the maximum number of names listed in an error message
+MAX_REPORTED_NAMES = 10
+
+
+def _expand_names(template: str, count: int, start: int):
+    try:
+        names = [template.format(index) for index in range(start, start + count)]
+    except (IndexError, KeyError, ValueError):
+        raise RuntimeError('Invalid name template: {}, the only placeholder must be the index, e.g. deposit-{{}} or '
+                           'deposit-{{:03}}'.format(template))
+
+    if len(set(names)) != len(names):
+        raise RuntimeError('The name template must contain a placeholder for the index, e.g. deposit-{}')
+    return names
+
+
+def _describe_names(names):
+    described = ', '.join(names[:MAX_REPORTED_NAMES])
+    if len(names) > MAX_REPORTED_NAMES:
+        described += ' and {} more'.format(len(names) - MAX_REPORTED_NAMES)
+    return described
+
+
+def _read_password(args):
+    from getpass import getpass
+
+    if args.password_file is not None:
+        if args.password_file == '-':
+            return sys.stdin.readline().rstrip('\n')
+        with open(args.password_file, 'r') as password_file:
+            return password_file.readline().rstrip('\n')
+
+    if args.password_env is not None:
+        password = os.environ.get(args.password_env)
+        if password is None:
+            raise RuntimeError('The environment variable {} is not set'.format(args.password_env))
+        return password
+
+    password = getpass('Enter password for keys...: ')
+    if password != getpass('Confirm password for keys.: '):
+        raise RuntimeError('Passwords did not match')
+    return password
+
+
+def _run_bulk_create(args):
+    from fetchai.ledger.crypto import Entity
+    from pocketbook.key_store import KeyStore
+
+    if args.count < 1:
+        raise RuntimeError('The number of keys must be at least 1')
+
+    key_store = KeyStore()
+
+    names = _expand_names(args.name_template, args.count, args.start)
+    existing = [name for name in names if key_store.has_key(name)]
+    if len(existing) > 0:
+        raise RuntimeError('{} of the key names already exist: {}'.format(len(existing), _describe_names(existing)))
+
+    stray = key_store.stray_keys(names)
+    if len(stray) > 0:
+        raise RuntimeError('Key files which are not in the key store already exist for {} of the names: {}'.format(
+            len(stray), _describe_names(stray)))
+
+    password = _read_password(args)
+    if not Entity.is_strong_password(password):
+        raise RuntimeError('Password too simple')
+
+    start = time.perf_counter()
+    key_store.create_keys(names, password, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print('Created {} keys ({} to {}) in {:.1f}s'.format(len(names), names[0], names[-1], elapsed))
+
+
 def run_create(args):
     from getpass import getpass
     from fetchai.ledger.crypto import Entity
     from pocketbook.key_store import KeyStore
 
+    # non-interactive bulk creation of keys
+    if args.count is not None:
+        return _run_bulk_create(args)
 
     key_store = KeyStore()
     existing_keys = set(key_store.list_keys())
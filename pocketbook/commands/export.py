@@ -0,0 +1,36 @@
+import sys
+
+EXPORT_FIELDS = ('name', 'type', 'address')
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout, False
+    return open(path, 'w', newline=''), True
+
+
+def run_export(args):
+    from pocketbook.address_book import AddressBook
+    from pocketbook.formats import RecordWriter, detect_format
+    from pocketbook.key_store import KeyStore
+
+    address_book = AddressBook()
+    key_store = KeyStore()
+
+    fmt = args.format or detect_format(args.path)
+
+    stream, should_close = _open_output(args.path)
+    try:
+        writer = RecordWriter(stream, fmt, EXPORT_FIELDS)
+
+        if not args.addresses_only:
+            for name, address in key_store.items():
+                writer.write({'name': name, 'type': 'key', 'address': str(address)})
+
+        for name, address in address_book.items():
+            writer.write({'name': name, 'type': 'addr', 'address': str(address)})
+
+        writer.close()
+    finally:
+        if should_close:
+            stream.close()
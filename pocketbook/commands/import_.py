@@ -0,0 +1,78 @@
+import sys
+
+
+def _open_input(path):
+    if path == '-':
+        return sys.stdin, False
+    return open(path, 'r', newline=''), True
+
+
+def run_import(args):
+    from pocketbook.address_book import AddressBook
+    from pocketbook.formats import detect_format, read_records
+    from pocketbook.key_store import KeyStore
+    from pocketbook.utils import checked_address
+
+    address_book = AddressBook()
+    key_store = KeyStore()
+
+    fmt = args.format or detect_format(args.path)
+
+    # Step 1. Read and validate all the rows before making any changes
+    existing_names = set(address_book.keys()) | set(key_store.list_keys())
+    seen_names = set()
+    valid, duplicates, keys, invalid = [], [], [], []
+
+    stream, should_close = _open_input(args.path)
+    try:
+        for row, record in read_records(stream, fmt):
+            if record is None:
+                invalid.append((row, 'unable to parse row'))
+                continue
+
+            name = str(record.get('name') or '').strip()
+            address = str(record.get('address') or '').strip()
+
+            # keys (e.g. in the output of export or list) can not be imported into the address book
+            if str(record.get('type') or '').strip() == 'key':
+                keys.append((row, name))
+                continue
+
+            if len(name) == 0 or len(address) == 0:
+                invalid.append((row, 'missing name or address'))
+                continue
+
+            try:
+                address = checked_address(address)
+            except RuntimeError as ex:
+                invalid.append((row, str(ex)))
+                continue
+
+            # names must be unique across both the keys and the address book
+            if name in existing_names or name in seen_names:
+                duplicates.append((row, name))
+                continue
+
+            seen_names.add(name)
+            valid.append((name, address))
+    finally:
+        if should_close:
+            stream.close()
+
+    # Step 2. Apply all the valid entries with a single index write
+    with address_book.batch():
+        for name, address in valid:
+            address_book.add(name, address)
+
+    # Step 3. Report the outcome
+    for row, name in keys:
+        print('Row {}: skipping key: {}'.format(row, name))
+    for row, name in duplicates:
+        print('Row {}: skipping duplicate name: {}'.format(row, name))
+    for row, reason in invalid:
+        print('Row {}: invalid entry: {}'.format(row, reason))
+
+    print('Imported {} addresses ({} duplicates, {} keys skipped, {} invalid)'.format(
+        len(valid), len(duplicates), len(keys), len(invalid)))
+
+    return 1 if len(invalid) > 0 else 0
@@ -1,15 +1,123 @@
 from fnmatch import fnmatch
+import sys
 import warnings
 
+LIST_FIELDS = ('name', 'type', 'address', 'balance', 'stake', 'error')
+
 def _should_display(item, patterns):
     return any([fnmatch(item, p) for p in patterns])
 
 
+def _list_record(name, entry_type, address, result):
+    from pocketbook.utils import format_canonical
+
+    # amounts are exact decimal strings (in FET) rather than lossy floating point numbers
+    return {
+        'name': name,
+        'type': entry_type,
+        'address': str(address),
+        'balance': format_canonical(result.balance) if result.error is None else None,
+        'stake': format_canonical(result.stake) if result.error is None else None,
+        'error': None if result.error is None else str(result.error),
+    }
+
+
+def _is_aggregated(args):
+    return args.sum or args.group_by is not None or args.sort is not None or args.top is not None
+
+
+def _display_rows(args, entries, results):
+    """
+    Determine the rows to be displayed, sorting, selecting and totalling the entries if requested
+
+    :return: The list of (name, type, address, result) tuples
+    """
+    from pocketbook.portfolio import Portfolio
+
+    if not _is_aggregated(args):
+        return [(name, entry_type, address, results[str(address)]) for name, entry_type, address in entries]
+
+    portfolio = Portfolio(sort=args.sort, top=args.top, group_by=args.group_by)
+    for name, entry_type, address in entries:
+        portfolio.add(name, entry_type, address, results[str(address)])
+
+    rows = [(row.name, row.type, row.address, row) for row in portfolio.rows(include_totals=args.sum)]
+
+    totals = portfolio.totals
+    if args.sum and totals.errors > 0:
+        print('Warning: the totals exclude {} entries which could not be queried'.format(totals.errors),
+              file=sys.stderr)
+
+    return rows
+
+
+def _write_records(args, query, entries, addresses):
+    from pocketbook.formats import JSONL_FORMAT, RecordWriter
+
+    writer = RecordWriter(sys.stdout, args.format, LIST_FIELDS)
+
+    if args.format == JSONL_FORMAT and not _is_aggregated(args):
+        # stream each of the records as soon as the balance and stake of the address are known
+        by_address = {}
+        for name, entry_type, address in entries:
+            by_address.setdefault(str(address), []).append((name, entry_type, address))
+
+        for key, result in query.stream(addresses):
+            for name, entry_type, address in by_address.get(key, []):
+                writer.write(_list_record(name, entry_type, address, result))
+    else:
+        for row in _display_rows(args, entries, query.fetch(addresses)):
+            writer.write(_list_record(*row))
+
+    writer.close()
+
+
+def _table_row(name, entry_type, address, result):
+    from pocketbook.utils import canonical_token_amount
+
+    if result.error is None:
+        balance = canonical_token_amount(result.balance)
+        stake = canonical_token_amount(result.stake)
+    else:
+        balance = 'Error: {}'.format(result.error)
+        stake = ''
+
+    return {
+        'name': name,
+        'type': entry_type,
+        'balance': balance,
+        'stake': stake,
+        'address': str(address),
+    }
+
+
+def _stream_table(cols, query, entries, addresses):
+    from pocketbook.table import StreamingTable
+
+    by_address = {}
+    for name, entry_type, address in entries:
+        by_address.setdefault(str(address), []).append((name, entry_type, address))
+
+    # the widths of the names, types and addresses are already known, only the amounts need to be sampled
+    widths = {
+        'name': max(len(name) for name, _, _ in entries),
+        'type': max(len(entry_type) for _, entry_type, _ in entries),
+        'address': max(len(str(address)) for _, _, address in entries),
+    }
+
+    with StreamingTable(cols, widths=widths) as table:
+        for key, result in query.stream(addresses):
+            for name, entry_type, address in by_address.get(key, []):
+                table.add_row(**_table_row(name, entry_type, address, result))
+
+
 def run_list(args):
     from pocketbook.address_book import AddressBook
+    from pocketbook.balance_cache import BalanceCache
     from pocketbook.key_store import KeyStore
+    from pocketbook.query import BalanceQuery
     from pocketbook.table import Table
-    from pocketbook.utils import create_api, get_balance, get_stake, token_amount
+    from pocketbook.utils import create_api
 
     # the latest version of SDK will generate warning because we are using the staking API
     warnings.simplefilter('ignore')
@@ -18,7 +126,10 @@ def run_list(args):
     key_store = KeyStore()
     keys = key_store.list_keys()
 
-    if len(keys) == 0:
+    if args.stream and (args.format is not None or _is_aggregated(args)):
+        raise RuntimeError('Streaming can not be combined with an output format, --sum, --group-by, --sort or --top')
+
+    if len(keys) == 0 and args.format is None:
         print('No keys present')
     else:
 
@@ -27,42 +138,47 @@ def run_list(args):
         if args.verbose:
             cols.append('address')
 
-        api = create_api(args.network)
-
-        table = Table(cols)
+        # collect the entries to be displayed (in display order)
+        entries = []
         for key in keys:
             if not _should_display(key, args.pattern):
                 continue
-
-            address = key_store.lookup_address(key)
-            balance = get_balance(api, address)
-            stake = get_stake(api, address)
-
-            row_data = {
-                'name': key,
-                'type': 'key',
-                'balance': token_amount(balance),
-                'stake': token_amount(stake),
-                'address': str(address),
-            }
-
-            table.add_row(**row_data)
+            entries.append((key, 'key', key_store.lookup_address(key)))
 
         for name, address in address_book.items():
             if not _should_display(name, args.pattern):
                 continue
+            entries.append((name, 'addr', address))
+
+        addresses = [address for _, _, address in entries]
 
-            balance = get_balance(api, address)
-            stake = get_stake(api, address)
+        # in cached mode only the entries which are missing or stale are fetched from the network
+        cache = BalanceCache(args.network)
+        max_age = None
+        if args.cached or args.max_age is not None:
+            max_age = cache.ttl if args.max_age is None else args.max_age
 
-            row_data = {
-                'name': name,
-                'type': 'addr',
-                'balance': token_amount(balance),
-                'stake': token_amount(stake),
-                'address': str(address),
-            }
+        api = None
+        if cache.requires_refresh(addresses, max_age):
+            api = create_api(args.network)
 
-            table.add_row(**row_data)
+        # query all the balances and stakes concurrently
+        query = BalanceQuery(api, concurrency=args.concurrency, cache=cache, max_age=max_age)
+
+        # machine readable output
+        if args.format is not None:
+            _write_records(args, query, entries, addresses)
+            return
+
+        # display each of the entries as soon as it has been queried, in the order in which they complete
+        if args.stream and len(entries) > 0:
+            _stream_table(cols, query, entries, addresses)
+            return
+
+        results = query.fetch(addresses)
+
+        table = Table(cols)
+        for row in _display_rows(args, entries, results):
+            table.add_row(**_table_row(*row))
 
         table.display()
@@ -0,0 +1,6 @@
+def run_migrate(args):
+    from pocketbook.constants import DEFAULT_KEY_STORE_ROOT
+    from pocketbook.storage import migrate_storage
+
+    num_keys, num_addresses = migrate_storage(DEFAULT_KEY_STORE_ROOT, args.backend)
+    print('Migrated {} keys and {} addresses to the {} backend'.format(num_keys, num_addresses, args.backend))
@@ -0,0 +1,13 @@
+def run_serve(args):
+    from pocketbook.daemon import Daemon
+    from pocketbook.rpc import RpcServer, interrupt_on_terminate
+
+    daemon = Daemon(args.network, concurrency=args.concurrency)
+
+    server = RpcServer(args.socket, daemon.methods())
+    interrupt_on_terminate()
+    try:
+        print('Serving {} on {} (Ctrl-C to stop)'.format(args.network, args.socket))
+        server.serve_forever()
+    finally:
+        server.server_close()
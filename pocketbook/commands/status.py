@@ -0,0 +1,45 @@
+def run_status(args):
+    from pocketbook.pending import PendingStore, StatusPoller
+    from pocketbook.utils import create_api
+
+    store = PendingStore()
+
+    pending = store.items(network=args.network)
+    if len(args.digests) > 0:
+        wanted = {digest[2:] if digest.startswith('0x') else digest for digest in args.digests}
+        pending = [(digest, details) for digest, details in pending if digest in wanted]
+
+    if len(pending) == 0:
+        print('No pending transactions')
+        return 0
+
+    print('Tracking {} pending transaction(s)...'.format(len(pending)))
+
+    api = create_api(args.network)
+
+    details = dict(pending)
+    failed = []
+    completed = []
+
+    def on_complete(digest, status):
+        info = details[digest]
+        print('TX: 0x{} {} ({} -> {})'.format(
+            digest, status.status, info.get('from', '?'), info.get('destination', '?')))
+
+        completed.append(digest)
+        if not status.successful:
+            failed.append(digest)
+
+    poller = StatusPoller(api, concurrency=args.concurrency, timeout=0 if args.once else args.max_wait)
+    try:
+        remaining = poller.poll(details.keys(), on_complete)
+    finally:
+        # only forget about the transactions whose outcome has been observed
+        store.remove(completed)
+
+    for digest in remaining:
+        print('TX: 0x{} pending'.format(digest))
+
+    print('{} executed, {} failed, {} pending'.format(len(completed) - len(failed), len(failed), len(remaining)))
+
+    return 1 if len(failed) > 0 else 0
@@ -1,101 +1,116 @@
-def run_transfer(args):
-    from getpass import getpass
+import sys
+
+TRANSFER_FIELDS = ('network', 'from', 'destination', 'amount', 'fee', 'total', 'digest', 'status')
 
+
+def run_transfer(args):
     from fetchai.ledger.crypto import Address
-    from fetchai.ledger.api.token import TokenTxFactory
 
     from pocketbook.address_book import AddressBook
+    from pocketbook.agent import unseal_keys
     from pocketbook.key_store import KeyStore
-    from pocketbook.utils import create_api, from_canonical, token_amount
+    from pocketbook.pending import PendingStore
+    from pocketbook.signing import SigningPool, choose_workers, MIN_PARALLEL_SIGNATURES
+    from pocketbook.timings import span
+    from pocketbook.transactions import build_transfer, check_funds, determine_from_account
+    from pocketbook.utils import canonical_token_amount, create_api, format_canonical
 
     address_book = AddressBook()
     key_store = KeyStore()
 
     # choose the destination
     destination_name = '{}:'.format(args.destination)
-    if args.destination in address_book.keys():
+    if address_book.has_address(args.destination):
         destination = address_book.lookup_address(args.destination)
     else:
         destination = key_store.lookup_address(args.destination)
         if destination is None:
             destination = Address(args.destination)
-            destination_name = ''
 
-    # convert the amount
+            # display the name of the destination if the address is already known
+            known_name = key_store.lookup_name(destination)
+            if known_name is None:
+                known_name = next((name for name, address in address_book.items() if address == str(destination)), None)
+            destination_name = '' if known_name is None else '{}:'.format(known_name)
+
+    # all amounts are in canonical units
     amount = args.amount
     charge_rate = args.charge_rate
-    computed_amount = from_canonical(amount)
-
-    # check all the signers make sense
-    for signer in args.signers:
-        if signer not in key_store.list_keys():
-            raise RuntimeError('Unknown key: {}'.format(signer))
-
-    # determine the from account
-    from_address_name = None
-    if len(args.signers) == 1 and args.from_address is None:
-        from_address_name = args.signers[0]
-    elif len(args.signers) >= 1 and args.from_address is not None:
-        present = args.from_address in key_store.list_keys() or args.from_address in address_book.keys()
-        from_address_name = args.from_address
-        if not present:
-            raise RuntimeError('Unknown from address: {}'.format(args.from_address))
-    else:
-        raise RuntimeError('Unable to determine from account')
+
+    # check all the signers make sense and determine the from account
+    from_address_name = determine_from_account(key_store, address_book, args.signers, args.from_address)
 
     required_ops = len(args.signers)
     fee = required_ops * charge_rate
-    computed_fee = from_canonical(fee)
-    computed_total = computed_amount + computed_fee
-    computed_charge_rate = from_canonical(charge_rate)
+    total = amount + fee
 
-    print('Network....:', args.network)
-    print('From.......:', str(from_address_name))
-    print('Signer(s)..:', ','.join(args.signers))
-    print('Destination:', destination_name, str(destination))
-    print('Amount.....:', token_amount(computed_amount))
-    print('Fee........:', token_amount(computed_fee))
+    # when machine readable output has been requested the human readable output is moved to stderr, so that stdout
+    # only contains the record of the transfer
+    out = sys.stdout if args.format is None else sys.stderr
+
+    print('Network....:', args.network, file=out)
+    print('From.......:', str(from_address_name), file=out)
+    print('Signer(s)..:', ','.join(args.signers), file=out)
+    print('Destination:', destination_name, str(destination), file=out)
+    print('Amount.....:', canonical_token_amount(amount), file=out)
+    print('Fee........:', canonical_token_amount(fee), file=out)
 
     # only display extended fee information if something other than the default it selected
     if charge_rate != 1:
-        print('           : {} ops @ {}'.format(required_ops, token_amount(computed_charge_rate)))
+        print('           : {} ops @ {}'.format(required_ops, canonical_token_amount(charge_rate)), file=out)
 
-    print('Total......:', token_amount(computed_total), '(Amount + Fee)')
-    print()
-    input('Press enter to continue')
+    print('Total......:', canonical_token_amount(total), '(Amount + Fee)', file=out)
+    print(file=out)
+    if args.format is None:
+        input('Press enter to continue')
+    else:
+        print('Press enter to continue', end='', file=out, flush=True)
+        input()
 
     api = create_api(args.network)
 
-    # start unsealing the private keys
-    entities = {}
-    for signer in args.signers:
-        entity = key_store.load_key(signer, getpass('Enter password for key {}: '.format(signer)))
-        entities[signer] = entity
+    # start unsealing the private keys (or use the copies held by the key agent)
+    entities = unseal_keys(key_store, args.signers)
 
     from_address = None
     if from_address_name in entities:
         from_address = Address(entities[from_address_name])
-    elif from_address_name in address_book.keys():
+    elif address_book.has_address(from_address_name):
         from_address = Address(address_book.lookup_address(from_address_name))
 
+    # check that the source account is able to fund the transfer
+    check_funds(api, from_address, from_address_name, total)
+
     # cache the signers
     signers = list(entities.values())
 
     # build up the basic transaction information
-    tx = TokenTxFactory.transfer(Address(from_address), destination, amount, 0, signers)
-    tx.charge_rate = charge_rate
-    tx.charge_limit = required_ops
-    api.set_validity_period(tx)
-    for entity in signers:
-        tx.sign(entity)
-
-    tx_digest = api.submit_signed_tx(tx)
-    print('TX: 0x{} submitted'.format(tx_digest))
-
-    # submit the transaction
-    print('Waiting for transaction to be confirmed...')
-    api.sync(tx_digest)
-    print('Waiting for transaction to be confirmed...complete')
+    tx = build_transfer(from_address, destination, amount, charge_rate, signers)
+    with span('tx.validity_period'):
+        api.set_validity_period(tx)
+
+    # large multi-sig signer sets are signed for in parallel
+    with span('tx.sign'), SigningPool(signers, workers=choose_workers(len(signers), MIN_PARALLEL_SIGNATURES)) as pool:
+        pool.sign(tx)
+
+    with span('tx.submit'):
+        tx_digest = api.submit_signed_tx(tx)
+    print('TX: 0x{} submitted'.format(tx_digest), file=out)
+
+    if args.no_wait:
+        # record the transaction so that it can be tracked later with the status command
+        PendingStore().add(tx_digest, args.network, **{
+            'from': str(from_address_name),
+            'destination': str(destination),
+            'amount': amount,
+        })
+        print('Run `pocketbook status` to track the transaction', file=out)
+    else:
+        # wait for the transaction to be executed
+        print('Waiting for transaction to be confirmed...', file=out)
+        with span('tx.sync'):
+            api.sync(tx_digest)
+        print('Waiting for transaction to be confirmed...complete', file=out)
 
     # determine if there is a block explorer link to be printed
     explorer_link = None
@@ -105,5 +120,21 @@ def run_transfer(args):
         explorer_link = 'https://explore-testnet.fetch.ai/transactions/0x{}'.format(tx_digest)
 
     if explorer_link is not None:
-        print()
-        print('See {} for more details'.format(explorer_link))
\ No newline at end of file
+        print(file=out)
+        print('See {} for more details'.format(explorer_link), file=out)
+
+    if args.format is not None:
+        from pocketbook.formats import RecordWriter
+
+        writer = RecordWriter(sys.stdout, args.format, TRANSFER_FIELDS)
+        writer.write({
+            'network': args.network,
+            'from': str(from_address),
+            'destination': str(destination),
+            'amount': format_canonical(amount),
+            'fee': format_canonical(fee),
+            'total': format_canonical(total),
+            'digest': '0x{}'.format(tx_digest),
+            'status': 'submitted' if args.no_wait else 'executed',
+        })
+        writer.close()
@@ -0,0 +1,215 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _transfer_total(transactions) -> int:
+    return sum(amount for tx in transactions for amount in tx.transfers.values())
+
+
+def _signer_identities(key_store, names):
+    from fetchai.ledger.crypto import Identity
+    from pocketbook.agent import unseal_keys
+
+    identities = {}
+    for name in names:
+        if not key_store.has_key(name):
+            raise RuntimeError('Unknown key: {}'.format(name))
+
+        public_key = key_store.lookup_public_key(name)
+        if public_key is not None:
+            identities[name] = Identity.from_base64(public_key)
+
+    # keys created before public keys were recorded in the index need to be unsealed to determine their identity
+    missing = [name for name in names if name not in identities]
+    if len(missing) > 0:
+        print('The public keys for {} are not known, unlocking them'.format(', '.join(missing)))
+        identities.update((name, Identity(signer)) for name, signer in unseal_keys(key_store, missing).items())
+
+    return [identities[name] for name in names]
+
+
+def _run_build(args):
+    from fetchai.ledger.crypto import Address
+
+    from pocketbook.address_book import AddressBook
+    from pocketbook.directory import Directory
+    from pocketbook.formats import detect_format
+    from pocketbook.key_store import KeyStore
+    from pocketbook.payouts import Payout, read_payouts
+    from pocketbook.planner import ValidityPlanner
+    from pocketbook.transactions import build_transfer, determine_from_account
+    from pocketbook.tx_file import write_tx_file
+    from pocketbook.utils import checked_address, create_api, format_canonical
+
+    address_book = AddressBook()
+    key_store = KeyStore()
+    directory = Directory(key_store, address_book)
+
+    # determine the transfers to be made
+    if args.payouts is not None:
+        payouts, invalid = read_payouts(args.payouts, args.format or detect_format(args.payouts), directory)
+        if len(invalid) > 0:
+            for row, reason in invalid:
+                print('Row {}: invalid payout: {}'.format(row, reason))
+            print('Unable to process payout file, {} invalid rows'.format(len(invalid)))
+            return 1
+    elif args.destination is not None and args.amount is not None:
+        destination = directory.lookup_address(args.destination) or checked_address(args.destination)
+        payouts = [Payout(1, None, str(destination), args.amount)]
+    else:
+        raise RuntimeError('Either a payout file or a destination and amount must be specified')
+
+    # check all the signers make sense and determine the from account
+    from_address_name = determine_from_account(key_store, address_book, args.signers, args.from_address)
+    from_address = directory.lookup_address(from_address_name)
+
+    signers = _signer_identities(key_store, args.signers)
+
+    # the validity period is either based on an explicit block (fully offline) or the current block, which is only
+    # queried once for all the transactions
+    if args.valid_from is not None:
+        planner = ValidityPlanner(lambda: args.valid_from, validity_period=args.validity_period)
+    else:
+        planner = ValidityPlanner.from_api(create_api(args.network), validity_period=args.validity_period)
+
+    transactions = []
+    valid_until = None
+    for payout in payouts:
+        tx = build_transfer(from_address, Address(payout.destination), payout.amount, args.charge_rate, signers)
+        valid_until = planner.plan(tx)
+        transactions.append(tx)
+
+    write_tx_file(args.output, args.network, transactions)
+
+    print('Built {} transactions from {} totalling {} (valid until block {})'.format(
+        len(transactions), from_address_name, format_canonical(_transfer_total(transactions)),
+        valid_until))
+
+
+def _run_sign(args):
+    from fetchai.ledger.crypto import Identity
+
+    from pocketbook.agent import unseal_keys
+    from pocketbook.key_store import KeyStore
+    from pocketbook.signing import SigningPool, choose_workers, MIN_PARALLEL_SIGNATURES
+    from pocketbook.tx_file import read_tx_file, write_tx_file
+    from pocketbook.utils import canonical_token_amount
+
+    key_store = KeyStore()
+
+    for signer in args.signers:
+        if not key_store.has_key(signer):
+            raise RuntimeError('Unknown key: {}'.format(signer))
+
+    network, transactions = read_tx_file(args.input)
+
+    print('Network......:', network)
+    print('Transactions.:', len(transactions))
+    print('Total........:', canonical_token_amount(_transfer_total(transactions)))
+    print('Signer(s)....:', ','.join(args.signers))
+    print()
+    if not args.yes:
+        input('Press enter to continue')
+
+    signers = unseal_keys(key_store, args.signers, workers=args.workers)
+
+    # every transaction must require the signatures of all the keys being used
+    for index, tx in enumerate(transactions):
+        for name, signer in signers.items():
+            if Identity(signer) not in tx.signers:
+                raise RuntimeError('Key {} is not a signer of transaction {}'.format(name, index + 1))
+
+    workers = choose_workers(len(transactions) * len(signers), MIN_PARALLEL_SIGNATURES, args.workers)
+    with SigningPool(signers.values(), workers=workers) as pool:
+        pool.sign_all(transactions)
+
+    output = args.output or args.input
+    write_tx_file(output, network, transactions)
+
+    complete = sum(1 for tx in transactions if not tx.is_incomplete)
+    print('Signed {} transactions ({} complete) written to {}'.format(len(transactions), complete, output))
+
+
+def _run_broadcast(args):
+    from pocketbook.address_book import AddressBook
+    from pocketbook.directory import Directory
+    from pocketbook.key_store import KeyStore
+    from pocketbook.pending import PendingStore, StatusPoller
+    from pocketbook.tx_file import read_tx_file
+    from pocketbook.utils import create_api
+
+    network, transactions = read_tx_file(args.input)
+    if network != args.network:
+        raise RuntimeError('The transactions were built for {} not {}'.format(network, args.network))
+
+    for index, tx in enumerate(transactions):
+        if tx.is_incomplete:
+            raise RuntimeError('Transaction {} has not been signed by all of its signers'.format(index + 1))
+        if not tx.is_valid():
+            raise RuntimeError('Transaction {} has an invalid signature'.format(index + 1))
+
+    api = create_api(args.network)
+
+    # transactions which have passed their validity period would simply be dropped by the ledger
+    current_block = api.tokens.current_block_number()
+    expired = [index + 1 for index, tx in enumerate(transactions) if tx.valid_until <= current_block]
+    if len(expired) > 0:
+        raise RuntimeError('{} transactions have expired (first: {}), they need to be rebuilt'.format(
+            len(expired), expired[0]))
+
+    def submit(tx):
+        try:
+            return api.submit_signed_tx(tx), None
+        except Exception as ex:
+            return None, ex
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        results = list(executor.map(submit, transactions))
+
+    submitted = {}
+    for index, (tx, (digest, error)) in enumerate(zip(transactions, results)):
+        if error is not None:
+            print('Transaction {}: submission failed: {}'.format(index + 1, error))
+        else:
+            submitted[digest] = tx
+
+    print('Submitted {} of {} transactions'.format(len(submitted), len(transactions)))
+
+    failures = len(transactions) - len(submitted)
+    if args.no_wait:
+        store = PendingStore()
+        directory = Directory(KeyStore(), AddressBook())
+        for digest, tx in submitted.items():
+            # the from account is recorded by name (as the transfer command does) whenever it is known
+            from_address_name = directory.lookup_name(tx.from_address) or str(tx.from_address)
+            destination, amount = next(iter(tx.transfers.items()))
+            store.add(digest, args.network, **{
+                'from': from_address_name,
+                'destination': str(destination),
+                'amount': amount,
+            })
+        print('Run `pocketbook status` to track the transactions')
+    else:
+        def on_complete(digest, status):
+            nonlocal failures
+            if not status.successful:
+                print('TX: 0x{} {}'.format(digest, status.status))
+                failures += 1
+
+        print('Waiting for transactions to be confirmed...')
+        poller = StatusPoller(api, concurrency=args.concurrency, timeout=args.timeout)
+        remaining = poller.poll(submitted.keys(), on_complete)
+        for digest in remaining:
+            print('TX: 0x{} unconfirmed after {:g}s'.format(digest, args.timeout))
+        failures += len(remaining)
+        print('{} executed, {} failed or unconfirmed'.format(len(transactions) - failures, failures))
+
+    return 1 if failures > 0 else 0
+
+
+def run_tx(args):
+    handlers = {
+        'build': _run_build,
+        'sign': _run_sign,
+        'broadcast': _run_broadcast,
+    }
+    return handlers[args.tx_action](args)
@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .constants import DEFAULT_KEY_STORE_ROOT
+from .journal import atomic_write
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30
+DEFAULT_ENDPOINT_TTL = 3600
+
+LOCAL_NETWORK = 'local'
+LOCAL_ENDPOINT = ('127.0.0.1', 8000)
+
+# process wide connection settings, updated from the command line
+_settings = {
+    'pool_size': DEFAULT_POOL_SIZE,
+    'timeout': DEFAULT_TIMEOUT,
+}
+
+# the pooled HTTP sessions shared by all the ledger APIs created by the process, by (pool size, timeout)
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def configure(pool_size=None, timeout=None):
+    """
+    Update the process wide connection settings
+
+    :param pool_size: The maximum number of keep-alive connections to be held open to the ledger
+    :param timeout: The timeout (in seconds) applied to every request
+    """
+    if pool_size is not None:
+        _settings['pool_size'] = int(pool_size)
+    if timeout is not None:
+        _settings['timeout'] = float(timeout)
+
+
+def shared_session(pool_size=None, timeout=None):
+    """
+    Get the pooled, keep-alive HTTP session shared by all of the ledger APIs in the process
+
+    :param pool_size: The maximum number of keep-alive connections (defaults to the process wide setting)
+    :param timeout: The default timeout (in seconds) of every request (defaults to the process wide setting)
+    :return: The requests session
+    """
+    settings = (pool_size or _settings['pool_size'], timeout or _settings['timeout'])
+    with _sessions_lock:
+        session = _sessions.get(settings)
+        if session is None:
+            session = _sessions[settings] = _create_session(*settings)
+        return session
+
+
+def _create_session(pool_size: int, timeout: float):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class TimeoutAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            if kwargs.get('timeout') is None:
+                kwargs['timeout'] = timeout
+            return super().send(request, **kwargs)
+
+    adapter = TimeoutAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class _SdkRequests:
+    """
+    Stands in for the requests module used by the API endpoints of the SDK, so that the endpoints it creates use the
+    shared session rather than each creating a session of their own
+    """
+
+    def __init__(self, requests_module, session):
+        self._requests = requests_module
+        self._session = session
+
+    def session(self):
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._requests, name)
+
+
+@contextmanager
+def _sdk_session(session):
+    from fetchai.ledger.api import common
+
+    with _sessions_lock:
+        original = common.requests
+        common.requests = _SdkRequests(original, session)
+        try:
+            yield
+        finally:
+            common.requests = original
+
+
+class EndpointCache:
+    """
+    On disk cache of the ledger endpoints resolved for named networks (via the bootstrap server)
+    """
+    CACHE_FILE_NAME = 'endpoints.toml'
+
+    def __init__(self, root=None, ttl=None, clock=None):
+        self._root = root or DEFAULT_KEY_STORE_ROOT
+        self._cache_path = os.path.join(self._root, self.CACHE_FILE_NAME)
+        self._ttl = DEFAULT_ENDPOINT_TTL if ttl is None else ttl
+        self._clock = clock or time.time
+
+    def get(self, network: str):
+        entry = self._load().get(network)
+        if entry is None or (self._clock() - entry['timestamp']) > self._ttl:
+            return None
+        return entry['host'], entry['port']
+
+    def put(self, network: str, host: str, port: int):
+        import toml
+
+        cache = self._load()
+        cache[network] = {'host': str(host), 'port': int(port), 'timestamp': self._clock()}
+
+        os.makedirs(self._root, exist_ok=True)
+        atomic_write(self._cache_path, toml.dumps(cache))
+
+    def invalidate(self, network: str):
+        import toml
+
+        cache = self._load()
+        if cache.pop(network, None) is not None:
+            atomic_write(self._cache_path, toml.dumps(cache))
+
+    def _load(self):
+        import toml
+
+        if not os.path.exists(self._cache_path):
+            return {}
+        try:
+            with open(self._cache_path, 'r') as cache_file:
+                return toml.load(cache_file)
+        except toml.TomlDecodeError:
+            return {}
+
+
+class ConnectionManager:
+    """
+    Creates ledger API instances whose endpoints all share a single pooled, keep-alive HTTP session (per process) with
+    a default timeout. The session is used from the start, including for the version check made by the SDK when the
+    API is created. The endpoints for named networks are resolved through the bootstrap server at most once per TTL.
+    """
+
+    def __init__(self, root=None, pool_size=None, timeout=None, endpoint_cache=None):
+        self._pool_size = pool_size or _settings['pool_size']
+        self._timeout = timeout or _settings['timeout']
+        self._endpoints = endpoint_cache or EndpointCache(root=root)
+
+    def resolve(self, network: str, refresh: bool = False):
+        """
+        Determine the host and port of the ledger for a given network
+
+        :param network: The name of the network
+        :param refresh: Flag to signal that any cached endpoint should be ignored
+        :return: The (host, port) tuple
+        """
+        from fetchai.ledger.api import bootstrap
+
+        if network == LOCAL_NETWORK:
+            return LOCAL_ENDPOINT
+
+        endpoint = None if refresh else self._endpoints.get(network)
+        if endpoint is None:
+            endpoint = bootstrap.server_from_name(network)
+            self._endpoints.put(network, *endpoint)
+
+        return endpoint
+
+    def create(self, network: str):
+        """
+        Create a ledger API for the specified network
+
+        :param network: The name of the network
+        :return: The ledger API instance
+        """
+        from fetchai.ledger.api import LedgerApi
+
+        session = shared_session(self._pool_size, self._timeout)
+
+        try:
+            api = self._create_api(LedgerApi, network, session)
+        except Exception:
+            if network == LOCAL_NETWORK:
+                raise
+
+            # the cached endpoint might be out of date, try again with a freshly resolved one
+            self._endpoints.invalidate(network)
+            api = self._create_api(LedgerApi, network, session, refresh=True)
+
+        # ensure every endpoint uses the shared session, whichever way the SDK created them
+        for endpoint in (api.tokens, api.contracts, api.tx, api.server):
+            if hasattr(endpoint, '_session'):
+                endpoint._session = session
+
+        return api
+
+    def _create_api(self, api_class, network: str, session, refresh: bool = False):
+        host, port = self.resolve(network, refresh=refresh)
+        with _sdk_session(session):
+            return api_class(host, port)
@@ -1,3 +1,14 @@
 import os
 
 DEFAULT_KEY_STORE_ROOT = os.path.abspath(os.path.expanduser('~/.pocketbook'))
+DEFAULT_SOCKET_PATH = os.path.join(DEFAULT_KEY_STORE_ROOT, 'pocketbook.sock')
+
+# the default maximum number of concurrent network requests
+DEFAULT_CONCURRENCY = 8
+
+# the key agent socket, can be overridden with the POCKETBOOK_AGENT_SOCKET environment variable
+DEFAULT_AGENT_SOCKET_PATH = os.path.join(DEFAULT_KEY_STORE_ROOT, 'agent.sock')
+AGENT_SOCKET_ENV = 'POCKETBOOK_AGENT_SOCKET'
+
+# the default time (in seconds) after which unused keys are dropped by the agent
+DEFAULT_AGENT_IDLE_TIMEOUT = 900
@@ -0,0 +1,203 @@
+import threading
+from fnmatch import fnmatch
+
+
+class Daemon:
+    """
+    Long running service that keeps the key store, address book and ledger API connection warm and exposes the common
+    wallet operations as RPC methods (see pocketbook.rpc).
+
+    The stores are loaded once at startup. Changes made by other pocketbook processes are picked up by calling the
+    reload method.
+    """
+
+    def __init__(self, network: str, root=None, concurrency=None):
+        self._network = network
+        self._root = root
+        self._concurrency = concurrency
+        self._lock = threading.RLock()
+        self._api = None
+        self._planner = None
+        self._key_store = None
+        self._address_book = None
+        self.reload()
+
+    @property
+    def network(self):
+        return self._network
+
+    @property
+    def api(self):
+        from pocketbook.utils import create_api
+
+        with self._lock:
+            if self._api is None:
+                self._api = create_api(self._network)
+            return self._api
+
+    @property
+    def planner(self):
+        from pocketbook.planner import ValidityPlanner
+
+        # the chain height is shared across all the transfers made through the daemon
+        with self._lock:
+            if self._planner is None:
+                self._planner = ValidityPlanner.from_api(self.api)
+            return self._planner
+
+    def methods(self) -> dict:
+        return {
+            'list': self.list,
+            'lookup': self.lookup,
+            'balance': self.balance,
+            'transfer': self.transfer,
+            'reload': self.reload,
+        }
+
+    def reload(self):
+        from pocketbook.address_book import AddressBook
+        from pocketbook.directory import Directory
+        from pocketbook.key_store import KeyStore
+
+        with self._lock:
+            # the previous stores are only ever used under the lock, so they can be closed before being replaced
+            for store in (self._key_store, self._address_book):
+                if store is not None:
+                    store.close()
+
+            self._key_store = KeyStore(root=self._root)
+            self._address_book = AddressBook(root=self._root)
+            self._directory = Directory(self._key_store, self._address_book)
+
+        return True
+
+    def list(self, pattern='*', balances=True):
+        """
+        List the keys and addresses, optionally with their balances and stakes
+
+        :param pattern: The glob pattern (or list of patterns) of names to be listed
+        :param balances: Flag to signal if the balances and stakes should be queried
+        :return: The list of entries
+        """
+        patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+
+        with self._lock:
+            entries = [
+                {'name': name, 'type': entry_type, 'address': str(address)}
+                for entry_type, items in (('key', self._key_store.items()), ('addr', self._address_book.items()))
+                for name, address in items
+                if any(fnmatch(name, p) for p in patterns)
+            ]
+
+        if balances:
+            results = self._fetch([entry['address'] for entry in entries])
+            for entry in entries:
+                entry.update(results[entry['address']])
+
+        return entries
+
+    def lookup(self, name=None, address=None):
+        """
+        Lookup an entry either by name or by address
+
+        :param name: The name of the key or address
+        :param address: The address to lookup
+        :return: The entry {name, type, address} for a name lookup or {address, names} for an address lookup
+        """
+        with self._lock:
+            if name is not None:
+                entry = self._directory.entry(name)
+                return None if entry is None else dict(entry._asdict())
+            elif address is not None:
+                return {'address': str(address), 'names': self._directory.lookup_names(address)}
+
+        raise RuntimeError('Either a name or address must be specified')
+
+    def balance(self, targets):
+        """
+        Query the balance and stake of a series of names or addresses
+
+        :param targets: The list of names or addresses
+        :return: A mapping of each target to its address, balance, stake and error (if any)
+        """
+        from pocketbook.utils import checked_address
+
+        targets = [targets] if isinstance(targets, str) else list(targets)
+
+        with self._lock:
+            addresses = {}
+            for target in targets:
+                address = self._directory.lookup_address(target)
+                addresses[target] = str(checked_address(target) if address is None else address)
+
+        results = self._fetch(addresses.values())
+        return {target: dict(address=address, **results[address]) for target, address in addresses.items()}
+
+    def transfer(self, destination, amount, signers, passwords, from_address=None, charge_rate=None, wait=True):
+        """
+        Build, sign and submit a transfer
+
+        :param destination: The destination name or address
+        :param amount: The amount of FET to be transferred
+        :param signers: The list of key names required to sign the transaction
+        :param passwords: The mapping of key name to password for each of the signers
+        :param from_address: The name of the funding account (required for multi-sig)
+        :param charge_rate: The charge rate in FET (defaults to the minimum)
+        :param wait: Flag to signal if the call should block until the transaction has been executed
+        :return: The transaction digest and status
+        """
+        from fetchai.ledger.crypto import Address
+        from pocketbook.key_store import unseal_key
+        from pocketbook.pending import PendingStore
+        from pocketbook.transactions import build_transfer, determine_from_account
+        from pocketbook.utils import to_canonical, MINIMUM_FRACTIONAL_FET
+
+        signers = [signers] if isinstance(signers, str) else list(signers)
+        amount = to_canonical(amount)
+        charge_rate = to_canonical(MINIMUM_FRACTIONAL_FET if charge_rate is None else charge_rate)
+
+        with self._lock:
+            from_address = determine_from_account(self._key_store, self._address_book, signers, from_address)
+            source = self._directory.lookup_address(from_address)
+
+            target = self._directory.lookup_address(destination)
+            target = Address(destination if target is None else target)
+
+            sealed = [self._key_store.read_sealed_key(signer) for signer in signers]
+
+        # the (deliberately expensive) decryption is made without holding the lock, so other requests are not blocked
+        entities = [unseal_key(key, passwords.get(signer, '')) for signer, key in zip(signers, sealed)]
+
+        api = self.api
+        tx = build_transfer(source, target, amount, charge_rate, entities)
+        self.planner.plan(tx)
+        for entity in entities:
+            tx.sign(entity)
+
+        tx_digest = api.submit_signed_tx(tx)
+        if wait:
+            api.sync(tx_digest)
+        else:
+            # record the transaction so that it can be tracked with the status command
+            PendingStore(root=self._root).add(tx_digest, self._network, **{
+                'from': from_address,
+                'destination': str(target),
+                'amount': amount,
+            })
+
+        return {'digest': tx_digest, 'status': 'executed' if wait else 'submitted'}
+
+    def _fetch(self, addresses):
+        from pocketbook.query import BalanceQuery
+        from pocketbook.utils import format_canonical
+
+        # amounts are returned as exact decimal strings (in FET)
+        results = BalanceQuery(self.api, concurrency=self._concurrency).fetch(addresses)
+        return {
+            address: {
+                'balance': None if result.balance is None else format_canonical(result.balance),
+                'stake': None if result.stake is None else format_canonical(result.stake),
+                'error': None if result.error is None else str(result.error),
+            }
+            for address, result in results.items()
+        }
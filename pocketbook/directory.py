@@ -0,0 +1,182 @@
+from collections import namedtuple
+
+Entry = namedtuple('Entry', ['name', 'type', 'address'])
+
+KEY_ENTRY = 'key'
+ADDRESS_ENTRY = 'addr'
+
+
+class Directory:
+    """
+    Unified bi-directional index over the key store and the address book.
+
+    The index is built lazily the first time that it is needed. Mutations that are made through the directory are
+    forwarded to the underlying store and then applied incrementally to the index (if it has been built) so that it
+    never needs to be rebuilt from scratch.
+
+    The key store and the address book are separate namespaces, so the same name can be both a key and an address book
+    entry. Both entries are kept in the index, and lookups by that name (as well as renames and removals) resolve to the
+    key.
+    """
+
+    def __init__(self, key_store, address_book):
+        self._key_store = key_store
+        self._address_book = address_book
+        self._by_name = None
+        self._by_address = None
+
+    def __contains__(self, name):
+        return name in self._index()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index().values())
+
+    def entry(self, name: str):
+        """
+        Lookup the directory entry for a given name
+
+        :param name: The name of the key or address
+        :return: The Entry (the key if the name is used for both) if present, otherwise None
+        """
+        entries = self._index().get(name)
+        if not entries:
+            return None
+        return entries[0]
+
+    def lookup_address(self, name: str):
+        entry = self.entry(name)
+        if entry is None:
+            return None
+        return entry.address
+
+    def lookup_names(self, address):
+        """
+        Lookup all the names associated with a given address. Keys are listed before address book entries.
+
+        :param address: The address to lookup
+        :return: The list of names for the address (empty if the address is unknown)
+        """
+        self._index()
+        return [entry.name for entry in self._by_address.get(str(address), [])]
+
+    def lookup_name(self, address):
+        """
+        Lookup the preferred name for a given address
+
+        :param address: The address to lookup
+        :return: The name of the key (or address book entry) if present, otherwise None
+        """
+        self._index()
+        entries = self._by_address.get(str(address))
+        if not entries:
+            return None
+        return entries[0].name
+
+    def add_address(self, name: str, address):
+        self._address_book.add(name, address)
+        self._insert(Entry(name, ADDRESS_ENTRY, str(address)))
+
+    def add_key(self, name: str, password: str, entity):
+        from fetchai.ledger.crypto import Address
+
+        self._key_store.add_key(name, password, entity)
+        self._insert(Entry(name, KEY_ENTRY, str(Address(entity))))
+
+    def rename(self, old: str, new: str) -> bool:
+        """
+        Rename a key or address book entry
+
+        :param old: The existing name
+        :param new: The new name
+        :return: True if successful, otherwise False
+        """
+        entry = self.entry(old)
+        if entry is None:
+            return False
+
+        # the keys and the address book are separate namespaces, so only the store that owns the entry can conflict
+        if any(existing.type == entry.type for existing in self._by_name.get(new, [])):
+            return False
+
+        if entry.type == KEY_ENTRY:
+            success = self._key_store.rename_key(old, new)
+        else:
+            success = self._address_book.rename(old, new)
+
+        if success:
+            self._erase(entry)
+            self._insert(entry._replace(name=new))
+
+        return success
+
+    def remove(self, name: str) -> bool:
+        """
+        Remove a key or address book entry
+
+        :param name: The name to be removed
+        :return: True if successful, otherwise False
+        """
+        entry = self.entry(name)
+        if entry is None:
+            return False
+
+        if entry.type == KEY_ENTRY:
+            success = self._key_store.remove_key(name)
+        else:
+            success = self._address_book.remove(name)
+
+        if success:
+            self._erase(entry)
+
+        return success
+
+    def invalidate(self):
+        """
+        Discard the index, it will be rebuilt on next use. Only required when the underlying stores are modified
+        directly rather than through the directory.
+        """
+        self._by_name = None
+        self._by_address = None
+
+    def _index(self):
+        if self._by_name is None:
+            self._by_name = {}
+            self._by_address = {}
+
+            for name, address in self._key_store.items():
+                self._insert(Entry(name, KEY_ENTRY, str(address)))
+            for name, address in self._address_book.items():
+                self._insert(Entry(name, ADDRESS_ENTRY, str(address)))
+
+        return self._by_name
+
+    def _insert(self, entry: Entry):
+        if self._by_name is None:
+            return
+
+        _add_entry(self._by_name, entry.name, entry)
+        _add_entry(self._by_address, entry.address, entry)
+
+    def _erase(self, entry: Entry):
+        if self._by_name is None:
+            return
+
+        _remove_entry(self._by_name, entry.name, entry)
+        _remove_entry(self._by_address, entry.address, entry)
+
+
+def _add_entry(index: dict, key: str, entry: Entry):
+    # keys are always listed before address book entries
+    entries = index.setdefault(key, [])
+    if entry.type == KEY_ENTRY:
+        entries.insert(0, entry)
+    else:
+        entries.append(entry)
+
+
+def _remove_entry(index: dict, key: str, entry: Entry):
+    entries = index.get(key, [])
+    if entry in entries:
+        entries.remove(entry)
+    if len(entries) == 0:
+        index.pop(key, None)
@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+
+CSV_FORMAT = 'csv'
+JSONL_FORMAT = 'jsonl'
+JSON_FORMAT = 'json'
+RECORD_FORMATS = (CSV_FORMAT, JSONL_FORMAT, JSON_FORMAT)
+
+# the machine readable formats in which command output can be generated
+OUTPUT_FORMATS = (JSON_FORMAT, JSONL_FORMAT, CSV_FORMAT)
+
+
+def detect_format(path: str, default: str = CSV_FORMAT) -> str:
+    """
+    Determine the record format from the extension of the path
+
+    :param path: The path to the file ('-' for stdin / stdout)
+    :param default: The format to use if it can not be determined from the path
+    :return: The name of the record format
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'json':
+        return JSON_FORMAT
+    if extension in ('jsonl', 'ndjson'):
+        return JSONL_FORMAT
+    if extension == 'csv':
+        return CSV_FORMAT
+    return default
+
+
+def read_records(stream, fmt: str):
+    """
+    Stream the records (dicts) from an input file
+
+    :param stream: The input file object
+    :param fmt: The format of the records
+    :return: Generator of (row number, record) tuples, the record is None if the row could not be parsed
+    """
+    if fmt == CSV_FORMAT:
+        for index, row in enumerate(csv.DictReader(stream)):
+            yield index + 1, {k.strip(): (v or '').strip() for k, v in row.items() if k is not None}
+
+    elif fmt == JSONL_FORMAT:
+        for index, line in enumerate(stream):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = None
+            yield index + 1, record
+
+    elif fmt == JSON_FORMAT:
+        # a single array of records, as written by the RecordWriter
+        try:
+            records = json.load(stream)
+        except ValueError:
+            records = None
+        if not isinstance(records, list):
+            yield 1, None
+            return
+
+        for index, record in enumerate(records):
+            yield index + 1, (record if isinstance(record, dict) else None)
+
+    else:
+        raise RuntimeError('Unknown record format: {}'.format(fmt))
+
+
+class RecordWriter:
+    """
+    Streams records (dicts) out to a file in the specified format. CSV and JSONL records are written (and flushed) as
+    soon as they are available. JSON output is a single array and so is only written when the writer is closed.
+    """
+
+    def __init__(self, stream, fmt: str, fields):
+        if fmt not in RECORD_FORMATS:
+            raise RuntimeError('Unknown record format: {}'.format(fmt))
+
+        self._stream = stream
+        self._format = fmt
+        self._fields = list(fields)
+        self._csv = None
+        self._records = []
+
+        if fmt == CSV_FORMAT:
+            self._csv = csv.DictWriter(stream, fieldnames=self._fields, extrasaction='ignore', lineterminator='\n')
+            self._csv.writeheader()
+
+    def write(self, record: dict):
+        if self._csv is not None:
+            self._csv.writerow(record)
+            self._stream.flush()
+        elif self._format == JSON_FORMAT:
+            self._records.append({field: record.get(field) for field in self._fields})
+        else:
+            self._stream.write(json.dumps({field: record.get(field) for field in self._fields}) + '\n')
+            self._stream.flush()
+
+    def close(self):
+        if self._format == JSON_FORMAT:
+            self._stream.write(json.dumps(self._records, indent=2) + '\n')
+            self._records = []
+        self._stream.flush()
@@ -0,0 +1,245 @@
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from .locking import FileLock
+
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+
+def atomic_write(path: str, contents: str):
+    """
+    Write the contents to the specified path such that readers (and crashes) will only ever observe either the
+    previous or the new file contents, never a partially written file.
+
+    :param path: The path to be written
+    :param contents: The new contents of the file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.{}.'.format(os.path.basename(path)), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as output_file:
+            output_file.write(contents)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+
+        os.replace(temp_path, path)
+    except:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    # ensure the rename itself is durable (not supported on all platforms)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Append-only log of mutations stored as one JSON record per line.
+
+    By default records are synced to disk as they are appended. A series of records can instead be appended without
+    syncing and then synced together once (see sync). A partially written trailing record (for example after a crash)
+    is ignored when the journal is read back.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = None
+        self._length = len(self.read())
+
+    def __len__(self):
+        return self._length
+
+    def read(self):
+        if not os.path.exists(self._path):
+            self._length = 0
+            return []
+
+        records = []
+        with open(self._path, 'r') as journal_file:
+            for line in journal_file:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        self._length = len(records)
+        return records
+
+    def append(self, record: dict, sync: bool = True):
+        """
+        Append a record to the journal
+
+        :param record: The record to be appended
+        :param sync: Flag to signal if the record should be synced to disk immediately, otherwise it is only synced on
+                     the next call to sync
+        """
+        if self._file is None:
+            self._file = open(self._path, 'a')
+
+        self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+        self._length += 1
+
+        if sync:
+            self.sync()
+
+    def sync(self):
+        """
+        Sync all of the appended records to disk
+        """
+        if self._file is not None:
+            try:
+                os.fsync(self._file.fileno())
+            finally:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        self._length = 0
+
+
+class JournaledIndex(ABC):
+    """
+    Base class for the index files (key store and address book).
+
+    Outside of a batch every mutation results in the complete index being atomically rewritten. Inside a batch
+    mutations are only appended to the journal (which is synced to disk once, when the batch ends) and the index is
+    rewritten (compacted) once at the end of the batch, or whenever the journal grows beyond the compaction threshold. Any journal records left over from an interrupted
+    batch are replayed and compacted when the index is next loaded.
+
+    The index can be shared between processes. It is loaded under a shared lock, so any number of readers can load it
+    at the same time. Every mutation (or complete batch) is made under an exclusive lock, and if the index has been
+    changed by another process since it was loaded it is re-read before the mutation is applied, so that writers never
+    overwrite each other's changes.
+
+    Subclasses implement _load_index() to (re)build their state from the index file, _flush_index() to write the full
+    index and _replay() to apply a journal record.
+    """
+    JOURNAL_SUFFIX = '.journal'
+    LOCK_SUFFIX = '.lock'
+    COMPACT_THRESHOLD = DEFAULT_COMPACT_THRESHOLD
+
+    def _init_journal(self, index_path: str):
+        self._index_file_path = index_path
+        self._journal = Journal(index_path + self.JOURNAL_SUFFIX)
+        self._lock = FileLock(index_path + self.LOCK_SUFFIX)
+        self._batch_depth = 0
+        self._signature = None
+
+        with self._lock.shared():
+            self._reload()
+            interrupted = len(self._journal.read()) > 0
+
+        # apply any changes left over from an interrupted batch
+        if interrupted:
+            with self._lock.exclusive():
+                self._refresh()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group a series of mutations together so that the index is only rewritten once
+        """
+        with self._write_lock():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and len(self._journal) > 0:
+                    # the records of the batch are synced together, once, before the index is rewritten
+                    self._journal.sync()
+                    self._compact()
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Hold the exclusive lock over a mutation, ensuring that the in memory index is up to date with the file
+        """
+        with self._lock.exclusive():
+            if self._batch_depth == 0:
+                self._refresh()
+            yield
+
+    def _refresh(self):
+        if self._index_signature() != self._signature:
+            self._reload()
+        self._recover()
+
+    def _reload(self):
+        self._load_index()
+        self._signature = self._index_signature()
+
+    def _index_signature(self):
+        # the index is always replaced (never modified in place) so any change results in a new signature
+        try:
+            stat = os.stat(self._index_file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _recover(self):
+        records = self._journal.read()
+        for record in records:
+            self._replay(record)
+
+        if len(records) > 0:
+            self._compact()
+
+    def _commit(self, record: dict):
+        if self._batch_depth > 0:
+            self._journal.append(record, sync=False)
+            if len(self._journal) >= self.COMPACT_THRESHOLD:
+                self._compact()
+        else:
+            self._write_index()
+
+    def _commit_all(self, records):
+        # a series of mutations made together only results in a single rewrite of the index outside of a batch
+        if self._batch_depth > 0:
+            for record in records:
+                self._commit(record)
+        elif len(records) > 0:
+            self._write_index()
+
+    def _compact(self):
+        self._write_index()
+        self._journal.clear()
+
+    def _write_index(self):
+        self._flush_index()
+        self._signature = self._index_signature()
+
+    @abstractmethod
+    def _load_index(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _flush_index(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _replay(self, record: dict):
+        raise NotImplementedError()
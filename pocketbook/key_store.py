@@ -1,149 +1,207 @@
-import os
-from copy import deepcopy
+from collections import namedtuple
 
-import toml
 from fetchai.ledger.crypto import Entity, Address
 
 from .constants import DEFAULT_KEY_STORE_ROOT
+from .storage import KEY_INDEX_FILE_NAME, open_key_storage
+# the errors are raised by the storage backends too, they are defined alongside them and re-exported here
+from .storage import (KeyStoreError, DuplicateKeyNameError, KeyNotFoundError, UnableToDecodeKeyError,  # noqa: F401
+                      KeyFileExistsError)
+from .timings import span
 
+# the encrypted contents of a key, along with the address that it is expected to decrypt to
+SealedKey = namedtuple('SealedKey', ['address', 'data'])
 
-class KeyStoreError(Exception):
-    pass
 
+def unseal_key(sealed: SealedKey, password: str) -> Entity:
+    """
+    Decrypt a key which has been read with KeyStore.read_sealed_key
 
-class DuplicateKeyNameError(KeyStoreError):
-    def __str__(self):
-        return 'Duplicate key name found'
+    :param sealed: The sealed key
+    :param password: The password for the key
+    :return: The Entity for the key
+    """
+    with span('key.decrypt'):
+        entity = Entity.loads(sealed.data, password)
 
+    # check the key against the metadata
+    if sealed.address != str(Address(entity)):
+        raise UnableToDecodeKeyError()
 
-class KeyNotFoundError(KeyStoreError):
-    def __str__(self):
-        return 'Unable to find key in store'
-
-
-class UnableToDecodeKeyError(KeyStoreError):
-    def __str__(self):
-        return 'Unable to decode key from key store'
+    return entity
 
 
 class KeyStore:
-    INDEX_FILE_NAME = 'index.toml'
+    INDEX_FILE_NAME = KEY_INDEX_FILE_NAME
 
-    def __init__(self, root=None):
+    def __init__(self, root=None, storage=None):
+        """
+        :param root: The key store root directory
+        :param storage: The KeyStorage backend, by default determined from the contents of the root
+        """
         self._root = root or DEFAULT_KEY_STORE_ROOT
-        self._index_path = os.path.join(self._root, self.INDEX_FILE_NAME)
+        with span('key_store.open'):
+            self._storage = storage or open_key_storage(self._root)
 
-        os.makedirs(self._root, exist_ok=True)
+    def batch(self):
+        """
+        Group a series of mutations together so that they are committed once
+        """
+        return self._storage.batch()
 
-        if os.path.exists(self._index_path):
-            with open(self._index_path, 'r') as index_file:
-                self._index = toml.load(index_file)
-        else:
-            self._index = {'key': []}
+    def close(self):
+        self._storage.close()
 
     def list_keys(self):
-        return list([item['name'] for item in self._index['key']])
+        return self._storage.names()
+
+    def items(self):
+        return self._storage.items()
+
+    def has_key(self, name: str) -> bool:
+        return self._lookup_meta_data(name) is not None
 
     def lookup_address(self, name):
-        address = None
-        for item in self._index['key']:
-            if item['name'] == name:
-                address = item['address']
-                break
-        return address
+        metadata = self._lookup_meta_data(name)
+        if metadata is None:
+            return None
+        return metadata['address']
+
+    def lookup_public_key(self, name):
+        """
+        Lookup the public key of a key without needing to decrypt it
+
+        :param name: The name of the key
+        :return: The base64 encoded public key or None if the key is unknown or predates public keys being recorded
+        """
+        metadata = self._lookup_meta_data(name)
+        if metadata is None:
+            return None
+        return metadata.get('public_key')
+
+    def lookup_name(self, address):
+        """
+        Reverse lookup of the key name for a given address
+
+        :param address: The address of the key
+        :return: The name of the key if present, otherwise None
+        """
+        return self._storage.lookup_name(str(address))
 
     def load_key(self, name: str, password: str) -> Entity:
-        if name not in self.list_keys():
+        return unseal_key(self.read_sealed_key(name), password)
+
+    def read_sealed_key(self, name: str) -> SealedKey:
+        """
+        Read a key without decrypting it, so that the (deliberately expensive) decryption can be made separately with
+        unseal_key
+
+        :param name: The name of the key
+        :return: The SealedKey
+        """
+        metadata = self._lookup_meta_data(name)
+        if metadata is None:
             raise KeyNotFoundError()
 
-        key_file_path = self._format_key_path(name)
-        assert os.path.exists(key_file_path)
+        return SealedKey(metadata['address'], self._storage.read_key(name))
+
+    def load_keys(self, credentials: dict, workers=None) -> dict:
+        """
+        Load a series of keys, the (deliberately expensive) decryption of the keys is performed in parallel
+
+        :param credentials: The dict of key name to password
+        :param workers: The maximum number of worker processes
+        :return: The dict of key name to Entity
+        """
+        from .signing import decrypt_keys
+
+        metadata = {name: self._lookup_meta_data(name) for name in credentials}
+        if any(value is None for value in metadata.values()):
+            raise KeyNotFoundError()
 
-        with open(key_file_path, 'r') as key_file:
-            entity = Entity.load(key_file, password)
-            address = Address(entity)
+        with span('key.decrypt_all'):
+            entities = decrypt_keys(
+                {name: (self._storage.read_key(name), password) for name, password in credentials.items()},
+                workers=workers)
 
-            # lookup the metadata for this
-            metadata = self._lookup_meta_data(name)
-            if metadata['address'] != str(address):
+        for name, entity in entities.items():
+            if metadata[name]['address'] != str(Address(entity)):
                 raise UnableToDecodeKeyError()
 
-            return entity
+        return entities
 
     def add_key(self, name: str, password: str, entity: Entity):
-        if name in self.list_keys():
+        if self.has_key(name):
             raise DuplicateKeyNameError()
 
-        key_file_path = self._format_key_path(name)
-        assert not os.path.exists(key_file_path)
-
-        # dump out the file
-        with open(key_file_path, 'w') as key_file:
-            entity.dump(key_file, password)
-
-        # update the index
-        self._index['key'].append({
+        metadata = {
             'name': name,
             'address': str(Address(entity)),
-        })
-        self._flush_index()
+            'public_key': entity.public_key,
+        }
+        # the name is checked again when the key is added, in case another process has added it in the meantime
+        if not self._storage.add(metadata, entity.dumps(password)):
+            raise DuplicateKeyNameError()
 
-    def rename_key(self, old_name: str, new_name: str) -> bool:
+    def stray_keys(self, names):
+        """
+        Lookup the names which are not in the key store but for which a key file already exists (for example, left
+        behind by an earlier failure). Keys with these names can not be added until the files are removed.
 
-        # do some basic checks
-        if old_name not in self.list_keys():
-            return False
-        if new_name in self.list_keys():
-            return False
-
-        # extract the old key metadata
-        old_metadata = self._lookup_meta_data(old_name)
-        if old_metadata is None:
-            return False
+        :param names: The names to be checked
+        :return: The list of names with stray key files
+        """
+        return self._storage.stray_keys(list(names))
 
-        # move the key file
-        old_key_file_path = self._format_key_path(old_name)
-        new_key_file_path = self._format_key_path(new_name)
-        os.rename(old_key_file_path, new_key_file_path)
+    def create_keys(self, names, password: str, workers=None):
+        """
+        Generate and add a series of new keys, all encrypted with the same password.
 
-        # remove the old entries to the metadata
-        self._remove_key_from_index(old_name)
+        The (deliberately expensive) key generation and encryption is performed in parallel and the keys are only
+        committed to the index once all of them have been generated.
 
-        # update and insert the new meta data into place
-        new_metadata = deepcopy(old_metadata)
-        new_metadata['name'] = new_name
-        self._index['key'].append(new_metadata)
-        self._flush_index()
+        :param names: The names of the new keys
+        :param password: The password used to encrypt the keys
+        :param workers: The maximum number of worker processes
+        :return: The list of addresses of the new keys
+        """
+        from .signing import generate_key_files
 
-        return True
+        names = list(names)
+        if len(set(names)) != len(names) or any(self.has_key(name) for name in names):
+            raise DuplicateKeyNameError()
 
-    def remove_key(self, name: str) -> bool:
-        if name not in self.list_keys():
-            return False
+        # checked before any of the keys are generated, rather than when they are added
+        stray = self.stray_keys(names)
+        if len(stray) > 0:
+            raise KeyFileExistsError(stray)
+
+        keys = []
+        for name, (contents, address, public_key) in zip(names, generate_key_files(password, len(names), workers)):
+            metadata = {
+                'name': name,
+                'address': address,
+                'public_key': public_key,
+            }
+            keys.append((metadata, contents))
+
+        if not self._storage.add_all(keys):
+            raise DuplicateKeyNameError()
 
-        # remove the key path from the disk
-        key_file_path = self._format_key_path(name)
-        if not os.path.exists(key_file_path):
-            raise RuntimeError('Key not present on disk, unable to remove')
-        os.remove(key_file_path)
+        return [metadata['address'] for metadata, _ in keys]
 
-        # update the index
-        self._remove_key_from_index(name)
-        self._flush_index()
+    def rename_key(self, old_name: str, new_name: str) -> bool:
 
-        return True
+        # do some basic checks
+        if not self.has_key(old_name):
+            return False
+        if self.has_key(new_name):
+            return False
 
-    def _remove_key_from_index(self, name: str):
-        self._index['key'] = list(filter(lambda x: x['name'] != name, self._index['key']))
+        return self._storage.rename(old_name, new_name)
 
-    def _format_key_path(self, name: str):
-        return os.path.join(self._root, '{}.key'.format(name))
+    def remove_key(self, name: str) -> bool:
+        return self._storage.remove(name)
 
     def _lookup_meta_data(self, name: str):
-        for item in self._index['key']:
-            if item['name'] == name:
-                return item
-
-    def _flush_index(self):
-        with open(self._index_path, 'w') as index_file:
-            toml.dump(self._index, index_file)
+        return self._storage.get(name)
@@ -0,0 +1,99 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Reader / writer lock shared between processes, backed by a lock file next to the file being protected.
+
+    Any number of processes can hold the shared (reader) lock at the same time, while the exclusive (writer) lock is
+    only held by a single process and excludes all readers. Locks are advisory, they only protect against other users
+    of the same lock file. Where shared locks are not supported by the platform the exclusive lock is used for both.
+
+    The lock file is only created by a writer, so processes that only read never write anything to disk. Until then
+    there is nothing for a reader to wait for and the shared lock is a no-op (the protected files are always replaced
+    atomically so a reader racing the first writer still never observes a partially written file).
+
+    The lock is reentrant within an instance, nested acquisitions reuse the lock that is already held (a shared lock
+    is never upgraded, an exclusive lock must be taken at the outermost level).
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fd = None
+        self._depth = 0
+        self._exclusive = False
+        self._thread_lock = threading.RLock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @contextmanager
+    def shared(self):
+        with self._acquire(False):
+            yield self
+
+    @contextmanager
+    def exclusive(self):
+        with self._acquire(True):
+            yield self
+
+    @contextmanager
+    def _acquire(self, exclusive: bool):
+        with self._thread_lock:
+            if self._depth == 0:
+                self._lock(exclusive)
+            elif exclusive and not self._exclusive:
+                raise RuntimeError('Unable to upgrade a shared lock to an exclusive lock')
+
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._unlock()
+
+    def _lock(self, exclusive: bool):
+        self._exclusive = exclusive
+        if exclusive:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        else:
+            try:
+                fd = os.open(self._path, os.O_RDONLY)
+            except FileNotFoundError:
+                return
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            else:  # pragma: no cover
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        except:
+            os.close(fd)
+            raise
+
+        self._fd = fd
+
+    def _unlock(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
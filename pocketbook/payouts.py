@@ -0,0 +1,294 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .journal import Journal
+from .utils import get_tx_status
+
+DEFAULT_WINDOW = 16
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_CONFIRMATION_TIMEOUT = 120
+
+SUBMITTED = 'submitted'
+EXECUTED = 'executed'
+FAILED = 'failed'
+
+Payout = namedtuple('Payout', ['row', 'name', 'destination', 'amount'])
+
+
+def read_payouts(path: str, fmt: str, directory):
+    """
+    Read and validate a payout file, destinations can either be names (keys or address book entries) or addresses
+
+    :param path: The path to the payout file
+    :param fmt: The format of the payout file
+    :param directory: The directory used to resolve destination names
+    :return: The tuple of (list of payouts, list of (row, reason) for the invalid rows)
+    """
+    from pocketbook.formats import read_records
+    from pocketbook.utils import checked_address, to_canonical
+
+    payouts, invalid = [], []
+    with open(path, 'r', newline='') as input_file:
+        for row, record in read_records(input_file, fmt):
+            if record is None:
+                invalid.append((row, 'unable to parse row'))
+                continue
+
+            target = str(record.get('destination') or '').strip()
+            amount = str(record.get('amount') or '').strip()
+            if len(target) == 0 or len(amount) == 0:
+                invalid.append((row, 'missing destination or amount'))
+                continue
+
+            try:
+                destination = directory.lookup_address(target)
+                if destination is None:
+                    destination = checked_address(target)
+                    name = directory.lookup_name(destination)
+                else:
+                    name = target
+
+                payouts.append(Payout(row, name, str(destination), to_canonical(amount)))
+            except (RuntimeError, ValueError) as ex:
+                invalid.append((row, str(ex)))
+
+    return payouts, invalid
+
+
+class ResultLedger:
+    """
+    Append-only record of the outcome of each row of a payout file.
+
+    Each state change of a row is durably appended before the engine moves on, so that an interrupted payout run can
+    be resumed. A row is recorded as submitted (with the digest computed locally) before the transaction is sent, rows
+    which were executed are never paid again and rows which were (possibly) submitted are only checked for
+    confirmation rather than being resubmitted. Only rows which certainly failed are retried.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._journal = Journal(path)
+        self._lock = threading.Lock()
+        self._latest = {}
+        for record in self._journal.read():
+            self._latest[record['row']] = record
+
+    @property
+    def path(self):
+        return self._path
+
+    def latest(self, row: int):
+        return self._latest.get(row)
+
+    def check(self, payout: Payout):
+        """
+        Ensure that the ledger entry (if any) refers to the same payout, i.e. that the payout file has not been changed
+        between runs
+        """
+        record = self._latest.get(payout.row)
+        if record is None:
+            return
+        if record['destination'] != str(payout.destination) or record['amount'] != payout.amount:
+            raise RuntimeError('Result ledger does not match the payout file at row {}'.format(payout.row))
+
+    def pending(self, payouts):
+        """
+        Split the payouts into those that need to be submitted and those that only need to be confirmed
+
+        :param payouts: The complete list of payouts
+        :return: The tuple of (list of payouts to be submitted, dict of digest to payout awaiting confirmation)
+        """
+        to_submit, to_confirm = [], {}
+        for payout in payouts:
+            self.check(payout)
+            record = self._latest.get(payout.row)
+            if record is None or record['status'] == FAILED:
+                to_submit.append(payout)
+            elif record['status'] == SUBMITTED:
+                to_confirm[record['digest']] = payout
+        return to_submit, to_confirm
+
+    def summary(self):
+        counts = {}
+        for record in self._latest.values():
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+        return counts
+
+    def record(self, payout: Payout, status: str, digest=None, error=None, valid_until=None):
+        record = {
+            'row': payout.row,
+            'name': payout.name,
+            'destination': str(payout.destination),
+            'amount': payout.amount,
+            'status': status,
+            'digest': digest,
+            'valid_until': valid_until,
+            'error': None if error is None else str(error),
+            'timestamp': time.time(),
+        }
+        with self._lock:
+            self._journal.append(record)
+            self._latest[payout.row] = record
+
+
+class BatchTransferEngine:
+    """
+    Builds, signs and submits a series of transfers from a single account and then tracks their confirmation.
+
+    Submissions are pipelined, up to `window` requests being in flight at any one time. For large runs the
+    transactions are signed in a pool of worker processes (see SigningPool). Once all the transactions have
+    been submitted the statuses of all the outstanding transactions are polled concurrently (see StatusPoller) until
+    they are all executed, have failed or the timeout expires.
+    """
+
+    def __init__(self, api, ledger: ResultLedger, from_address, signers, charge_rate: int, window=None,
+                 poll_interval=None, timeout=None, sleep=None, workers=None, planner=None):
+        self._api = api
+        self._ledger = ledger
+        self._from_address = from_address
+        self._signers = list(signers)
+        self._charge_rate = charge_rate
+        self._window = max(1, int(window or DEFAULT_WINDOW))
+        self._poll_interval = DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._timeout = DEFAULT_CONFIRMATION_TIMEOUT if timeout is None else timeout
+        self._sleep = sleep or time.sleep
+        self._workers = workers
+        self._planner = planner
+
+    def submit(self, payouts):
+        """
+        Build, sign and submit the transfers for the specified payouts
+
+        :param payouts: The payouts to be submitted
+        :return: The dict of transaction digest to payout for the successfully submitted transactions
+        """
+        from fetchai.ledger.api import ApiError
+
+        from pocketbook.planner import ValidityPlanner
+        from pocketbook.signing import SigningPool, choose_workers, MIN_PARALLEL_SIGNATURES
+        from pocketbook.transactions import build_transfer, tx_digest
+
+        payouts = list(payouts)
+        workers = choose_workers(len(payouts) * len(self._signers), MIN_PARALLEL_SIGNATURES, self._workers)
+
+        # the chain height is fetched once for the whole burst rather than once per transaction
+        if self._planner is None:
+            self._planner = ValidityPlanner.from_api(self._api)
+
+        def submit_one(payout):
+            try:
+                tx = build_transfer(self._from_address, payout.destination, payout.amount, self._charge_rate,
+                                    self._signers)
+                valid_until = self._planner.plan(tx)
+                signing_pool.sign(tx)
+                if not tx.is_valid():
+                    raise RuntimeError('Signed transaction failed validation checks')
+
+                digest = tx_digest(tx)
+            except Exception as ex:
+                # nothing has been sent, so the payout can safely be retried
+                self._ledger.record(payout, FAILED, error=ex)
+                return payout, None
+
+            # record the submission before it is sent, so that if the run is interrupted (or the outcome of the request
+            # is unknown) the transaction is confirmed rather than resubmitted
+            self._ledger.record(payout, SUBMITTED, digest=digest, valid_until=valid_until)
+
+            try:
+                reported = self._api.submit_signed_tx(tx)
+            except ApiError as ex:
+                # the ledger explicitly rejected the transaction
+                self._ledger.record(payout, FAILED, digest=digest, error=ex)
+                return payout, None
+            except Exception as ex:
+                # e.g. a connection error or timeout, the transaction may still have been received
+                self._ledger.record(payout, SUBMITTED, digest=digest, valid_until=valid_until, error=ex)
+                return payout, digest
+
+            # the ledger is authoritative for the digest of the transaction
+            if reported and _normalise_digest(reported) != digest:
+                digest = reported
+                self._ledger.record(payout, SUBMITTED, digest=digest, valid_until=valid_until)
+
+            return payout, digest
+
+        submitted = {}
+        with SigningPool(self._signers, workers=workers) as signing_pool, \
+                ThreadPoolExecutor(max_workers=self._window) as executor:
+            for payout, digest in executor.map(submit_one, payouts):
+                if digest is not None:
+                    submitted[digest] = payout
+
+        return submitted
+
+    def confirm(self, submitted: dict):
+        """
+        Wait for the submitted transactions to be executed
+
+        :param submitted: The dict of transaction digest to payout
+        :return: The dict of digests which remain unconfirmed after the timeout
+        """
+        from pocketbook.pending import StatusPoller
+
+        def on_complete(digest, status):
+            payout = submitted[digest]
+            if status.successful:
+                self._ledger.record(payout, EXECUTED, digest=digest)
+            else:
+                self._ledger.record(payout, FAILED, digest=digest, error=status.status)
+
+        poller = StatusPoller(self._api, concurrency=self._window, interval=self._poll_interval,
+                              max_interval=self._poll_interval, timeout=self._timeout, sleep=self._sleep)
+        remaining = poller.poll(submitted.keys(), on_complete)
+        if len(remaining) > 0:
+            remaining = self._expire(remaining, submitted, on_complete)
+
+        return {digest: submitted[digest] for digest in remaining}
+
+    def _expire(self, remaining, submitted: dict, on_complete):
+        """
+        Mark the unconfirmed transactions whose validity period has passed as failed. Such a transaction can no longer
+        be executed (e.g. it never reached the ledger) so the payout can safely be retried.
+
+        :return: The list of digests which remain unconfirmed
+        """
+        expiring = {}
+        for digest in remaining:
+            record = self._ledger.latest(submitted[digest].row) or {}
+            if record.get('valid_until') is not None:
+                expiring[digest] = record['valid_until']
+        if len(expiring) == 0:
+            return list(remaining)
+
+        # the height is fetched before the final status check, so a transaction executed in its last valid block is
+        # still reported as executed
+        try:
+            height = int(self._api.tokens.current_block_number())
+        except Exception:
+            return list(remaining)
+
+        unconfirmed = []
+        for digest in remaining:
+            if digest in expiring and height > expiring[digest]:
+                try:
+                    status = get_tx_status(self._api, digest)
+                except Exception:
+                    unconfirmed.append(digest)
+                    continue
+
+                if status.successful or status.failed:
+                    on_complete(digest, status)
+                else:
+                    self._ledger.record(submitted[digest], FAILED, digest=digest,
+                                        error='expired at block {}'.format(expiring[digest]))
+                continue
+            unconfirmed.append(digest)
+
+        return unconfirmed
+
+
+def _normalise_digest(digest: str) -> str:
+    digest = digest.lower()
+    return digest[2:] if digest.startswith('0x') else digest
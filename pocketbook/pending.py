@@ -0,0 +1,139 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import DEFAULT_KEY_STORE_ROOT, DEFAULT_CONCURRENCY
+from .journal import atomic_write
+from .locking import FileLock
+from .utils import get_tx_status
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_MAX_POLL_INTERVAL = 30.0
+DEFAULT_BACKOFF = 2.0
+
+
+class PendingStore:
+    """
+    On disk record of the transactions which have been submitted but whose outcome has not yet been observed.
+
+    Every change is made under an exclusive lock and the file is re-read once the lock is held, so that transfers made
+    by separate pocketbook processes at the same time are not lost.
+    """
+    PENDING_FILE_NAME = 'pending.toml'
+    LOCK_SUFFIX = '.lock'
+
+    def __init__(self, root=None, clock=None):
+        self._root = root or DEFAULT_KEY_STORE_ROOT
+        self._pending_path = os.path.join(self._root, self.PENDING_FILE_NAME)
+        self._lock = FileLock(self._pending_path + self.LOCK_SUFFIX)
+        self._clock = clock or time.time
+
+    def __len__(self):
+        return len(self._load())
+
+    def items(self, network=None):
+        """
+        List the pending transactions
+
+        :param network: The name of the network to filter by (all networks if not specified)
+        :return: The list of (digest, details) tuples ordered by submission time
+        """
+        pending = self._load()
+        return sorted(
+            ((digest, details) for digest, details in pending.items()
+             if network is None or details.get('network') == network),
+            key=lambda item: item[1].get('submitted', 0)
+        )
+
+    def add(self, digest: str, network: str, **details):
+        """
+        Record a newly submitted transaction
+
+        :param digest: The transaction digest
+        :param network: The name of the network the transaction was submitted to
+        :param details: Extra information to be displayed (from, destination, amount, etc.)
+        """
+        import toml
+
+        with self._lock.exclusive():
+            pending = self._load()
+            pending[str(digest)] = dict(details, network=network, submitted=self._clock())
+            atomic_write(self._pending_path, toml.dumps(pending))
+
+    def remove(self, digests):
+        import toml
+
+        with self._lock.exclusive():
+            pending = self._load()
+            removed = [digest for digest in digests if pending.pop(str(digest), None) is not None]
+            if len(removed) > 0:
+                atomic_write(self._pending_path, toml.dumps(pending))
+        return removed
+
+    def _load(self):
+        import toml
+
+        with self._lock.shared():
+            if not os.path.exists(self._pending_path):
+                return {}
+            with open(self._pending_path, 'r') as pending_file:
+                return toml.load(pending_file)
+
+
+class StatusPoller:
+    """
+    Polls the statuses of a set of transactions concurrently until they have all reached a terminal state.
+
+    The interval between polls starts at `interval` and grows by the `backoff` factor after every round, up to
+    `max_interval`, so that long running transactions are not polled aggressively.
+    """
+
+    def __init__(self, api, concurrency=None, interval=None, max_interval=None, backoff=None, timeout=None,
+                 sleep=None, clock=None):
+        self._api = api
+        self._concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+        self._interval = DEFAULT_POLL_INTERVAL if interval is None else interval
+        self._max_interval = max(self._interval, DEFAULT_MAX_POLL_INTERVAL if max_interval is None else max_interval)
+        self._backoff = DEFAULT_BACKOFF if backoff is None else backoff
+        self._timeout = timeout
+        self._sleep = sleep or time.sleep
+        self._clock = clock or time.monotonic
+
+    def poll(self, digests, on_complete):
+        """
+        Poll the specified transactions
+
+        :param digests: The transaction digests to be polled
+        :param on_complete: Callback invoked with (digest, status) as each transaction reaches a terminal state
+        :return: The list of digests which are still pending when the timeout expires
+        """
+        remaining = list(digests)
+        interval = self._interval
+        deadline = None if self._timeout is None else self._clock() + self._timeout
+
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            while len(remaining) > 0:
+                statuses = list(executor.map(self._status, remaining))
+
+                still_pending = []
+                for digest, status in zip(remaining, statuses):
+                    if status is not None and (status.successful or status.failed):
+                        on_complete(digest, status)
+                    else:
+                        still_pending.append(digest)
+                remaining = still_pending
+
+                if len(remaining) == 0 or (deadline is not None and self._clock() >= deadline):
+                    break
+
+                self._sleep(interval)
+                interval = min(interval * self._backoff, self._max_interval)
+
+        return remaining
+
+    def _status(self, digest: str):
+        try:
+            return get_tx_status(self._api, digest)
+        except Exception:
+            # transient errors are simply retried on the next poll
+            return None
@@ -0,0 +1,87 @@
+import random
+import threading
+import time
+
+from .transactions import DEFAULT_VALIDITY_PERIOD
+
+# the number of blocks before the end of the validity window at which the chain height is queried again
+DEFAULT_REFRESH_MARGIN = 10
+
+# a deliberately pessimistic (i.e. fast) estimate of the block interval, used to decide when the window is near expiry
+DEFAULT_BLOCK_INTERVAL = 1.0
+
+MAX_COUNTER = 2 ** 64
+
+
+class ValidityPlanner:
+    """
+    Assigns validity periods and counters to transactions without a network round trip per transaction.
+
+    The chain height is fetched once and reused for a whole burst of transactions. The planner estimates how far the
+    chain has advanced since then (using a pessimistic block interval) and only fetches the height again once the
+    validity window of newly planned transactions would be close to expiring.
+
+    Each transaction is also given a counter from a sequence, starting at a random value. Transactions with the same
+    contents (for example repeated identical payouts) therefore never collide on the same digest.
+    """
+
+    def __init__(self, current_block, validity_period=None, refresh_margin=None, block_interval=None, clock=None):
+        """
+        :param current_block: Callable returning the current block number, e.g. api.tokens.current_block_number
+        :param validity_period: The number of blocks for which each transaction is valid
+        :param refresh_margin: The number of blocks before the expiry at which the height is fetched again
+        :param block_interval: The estimated interval (in seconds) between blocks
+        :param clock: The monotonic clock
+        """
+        self._current_block = current_block
+        self._validity_period = DEFAULT_VALIDITY_PERIOD if validity_period is None else int(validity_period)
+        self._refresh_margin = min(self._validity_period - 1,
+                                   DEFAULT_REFRESH_MARGIN if refresh_margin is None else int(refresh_margin))
+        self._block_interval = DEFAULT_BLOCK_INTERVAL if block_interval is None else block_interval
+        self._clock = clock or time.monotonic
+        self._lock = threading.Lock()
+        self._height = None
+        self._fetched_at = None
+        self._counter = random.getrandbits(64)
+
+    @classmethod
+    def from_api(cls, api, **kwargs):
+        return cls(api.tokens.current_block_number, **kwargs)
+
+    @property
+    def validity_period(self):
+        return self._validity_period
+
+    def plan(self, tx):
+        """
+        Set the validity period and counter of a transaction
+
+        :param tx: The transaction to be updated
+        :return: The block until which the transaction is valid
+        """
+        with self._lock:
+            height = self._current_height()
+
+            self._counter = (self._counter + 1) % MAX_COUNTER
+            tx.counter = self._counter
+
+        tx.valid_from = height
+        tx.valid_until = height + self._validity_period
+        return tx.valid_until
+
+    def invalidate(self):
+        """
+        Force the chain height to be fetched again for the next transaction
+        """
+        with self._lock:
+            self._height = None
+
+    def _current_height(self):
+        if self._height is not None:
+            elapsed_blocks = (self._clock() - self._fetched_at) / self._block_interval
+            if elapsed_blocks < self._validity_period - self._refresh_margin:
+                return self._height
+
+        self._height = int(self._current_block())
+        self._fetched_at = self._clock()
+        return self._height
@@ -0,0 +1,133 @@
+import heapq
+from collections import namedtuple, OrderedDict
+
+SORT_KEYS = ('name', 'balance', 'stake')
+GROUP_KEYS = ('type',)
+
+PortfolioEntry = namedtuple('PortfolioEntry', ['name', 'type', 'address', 'balance', 'stake', 'error'])
+Totals = namedtuple('Totals', ['balance', 'stake', 'addresses', 'errors'])
+
+TOTAL_TYPE = 'total'
+SUBTOTAL_TYPE = 'subtotal'
+
+
+class _Accumulator:
+    def __init__(self):
+        self.balance = 0
+        self.stake = 0
+        self.errors = 0
+        self.addresses = set()
+
+    def add(self, entry: PortfolioEntry):
+        if entry.error is not None:
+            self.errors += 1
+            return
+
+        # the same address can appear more than once (e.g. a key and an address book entry) but only counts once
+        if entry.address in self.addresses:
+            return
+        self.addresses.add(entry.address)
+        self.balance += entry.balance
+        self.stake += entry.stake
+
+    def totals(self) -> Totals:
+        return Totals(self.balance, self.stake, len(self.addresses), self.errors)
+
+
+def _sort_key(field: str):
+    if field == 'name':
+        return lambda entry: entry.name
+
+    # entries which could not be queried are always ordered last
+    return lambda entry: -1 if entry.error is not None else getattr(entry, field)
+
+
+class Portfolio:
+    """
+    Aggregates the balances and stakes of a series of entries in a single pass.
+
+    Totals are maintained (per group and overall) as entries are added. Entries are held per group in the order they
+    are added, and are only ordered when the rows are requested. When only the top N entries are required they are
+    selected with a heap rather than sorting every entry.
+    """
+
+    def __init__(self, sort=None, top=None, group_by=None):
+        """
+        :param sort: The field to order the entries by (name ascending, balance or stake descending)
+        :param top: The maximum number of entries (per group) to be displayed
+        :param group_by: The field to group the entries by
+        """
+        if sort is not None and sort not in SORT_KEYS:
+            raise RuntimeError('Unable to sort by: {}'.format(sort))
+        if group_by is not None and group_by not in GROUP_KEYS:
+            raise RuntimeError('Unable to group by: {}'.format(group_by))
+        if top is not None and top < 1:
+            raise RuntimeError('The number of entries to display must be at least 1')
+
+        # selecting the top entries only makes sense with an order, the largest balances by default
+        self._sort = 'balance' if sort is None and top is not None else sort
+        self._top = top
+        self._group_by = group_by
+        self._groups = OrderedDict()
+        self._totals = _Accumulator()
+
+    @property
+    def totals(self) -> Totals:
+        return self._totals.totals()
+
+    def add(self, name, entry_type, address, result):
+        """
+        Add an entry to the portfolio
+
+        :param name: The name of the entry
+        :param entry_type: The type of the entry (key or addr)
+        :param address: The address of the entry
+        :param result: The BalanceResult for the address
+        """
+        entry = PortfolioEntry(name, entry_type, str(address), result.balance, result.stake, result.error)
+        group = None if self._group_by is None else getattr(entry, self._group_by)
+
+        entries, accumulator = self._groups.get(group, (None, None))
+        if entries is None:
+            entries, accumulator = self._groups[group] = ([], _Accumulator())
+
+        entries.append(entry)
+        accumulator.add(entry)
+        self._totals.add(entry)
+
+    def groups(self):
+        """
+        :return: Generator of (group, ordered list of entries, Totals) tuples, the group is None if not grouping
+        """
+        for group, (entries, accumulator) in self._groups.items():
+            yield group, self._select(entries), accumulator.totals()
+
+    def rows(self, include_totals=False):
+        """
+        Build the rows to be displayed, including subtotal rows (when grouping) and a total row if requested
+
+        :param include_totals: Flag to signal if the overall total row should be included
+        :return: Generator of PortfolioEntry, total rows have a type of either subtotal or total
+        """
+        for group, entries, totals in self.groups():
+            yield from entries
+            if group is not None:
+                yield PortfolioEntry(group, SUBTOTAL_TYPE, '', totals.balance, totals.stake, None)
+
+        if include_totals:
+            totals = self.totals
+            yield PortfolioEntry('Total', TOTAL_TYPE, '', totals.balance, totals.stake, None)
+
+    def _select(self, entries):
+        if self._sort is None:
+            return entries
+
+        key = _sort_key(self._sort)
+        if self._sort == 'name':
+            if self._top is not None:
+                return heapq.nsmallest(self._top, entries, key=key)
+            return sorted(entries, key=key)
+
+        if self._top is not None:
+            return heapq.nlargest(self._top, entries, key=key)
+        return sorted(entries, key=key, reverse=True)
@@ -0,0 +1,101 @@
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .constants import DEFAULT_CONCURRENCY
+
+BalanceResult = namedtuple('BalanceResult', ['balance', 'stake', 'error'])
+
+
+def _lookup(fn, api, address):
+    try:
+        return fn(api, address), None
+    except Exception as ex:
+        return None, ex
+
+
+class BalanceQuery:
+    """
+    Batch query for the balances and stakes of a set of addresses.
+
+    Addresses are de-duplicated before any requests are made so that each unique address is only queried once
+    regardless of how many times (or in what form) it appears in the input. The individual lookups are issued
+    concurrently over a bounded thread pool.
+
+    When a BalanceCache is provided, successful results are recorded in it. If a max_age is also specified then
+    addresses which have a sufficiently fresh cache entry are served from the cache and not queried at all.
+    """
+
+    def __init__(self, api, concurrency=None, cache=None, max_age=None):
+        self._api = api
+        self._concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+        self._cache = cache
+        self._max_age = max_age
+
+    def fetch(self, addresses):
+        """
+        Query the balance and stake of the specified addresses
+
+        :param addresses: The sequence of addresses to be queried, duplicates are permitted
+        :return: An ordered mapping of the (string) address to the BalanceResult for that address
+        """
+        results = OrderedDict((str(address), None) for address in addresses)
+        for key, result in self.stream(addresses):
+            results[key] = result
+        return results
+
+    def stream(self, addresses):
+        """
+        Query the balance and stake of the specified addresses, yielding each result as soon as it is available
+
+        :param addresses: The sequence of addresses to be queried, duplicates are permitted
+        :return: Generator of ((string) address, BalanceResult) tuples in completion order, cached entries first
+        """
+        from pocketbook import utils
+
+        # de-duplicate the addresses preserving the order in which they were first seen
+        unique = OrderedDict()
+        for address in addresses:
+            unique.setdefault(str(address), address)
+
+        # serve any fresh entries directly from the cache
+        stale = []
+        for key, address in unique.items():
+            cached = None
+            if self._cache is not None and self._max_age is not None:
+                cached = self._cache.get(key, self._max_age)
+
+            if cached is not None:
+                yield key, BalanceResult(cached[0], cached[1], None)
+            else:
+                stale.append((key, address))
+
+        if len(stale) == 0:
+            return
+
+        workers = min(self._concurrency, 2 * len(stale))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for key, address in stale:
+                futures[executor.submit(_lookup, utils.get_balance, self._api, address)] = (key, 'balance')
+                futures[executor.submit(_lookup, utils.get_stake, self._api, address)] = (key, 'stake')
+
+            # an address is complete once both its balance and stake lookups have finished
+            partial = {}
+            for future in as_completed(futures):
+                key, field = futures[future]
+                lookups = partial.setdefault(key, {})
+                lookups[field] = future.result()
+                if len(lookups) < 2:
+                    continue
+
+                (balance, balance_error), (stake, stake_error) = lookups['balance'], lookups['stake']
+                result = BalanceResult(balance, stake, balance_error or stake_error)
+
+                # record the updated value
+                if self._cache is not None and result.error is None:
+                    self._cache.put(key, result.balance, result.stake)
+
+                yield key, result
+
+        if self._cache is not None:
+            self._cache.save()
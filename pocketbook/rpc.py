@@ -0,0 +1,157 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+
+
+class RpcError(RuntimeError):
+    pass
+
+
+def _on_terminate(signum, frame):
+    raise KeyboardInterrupt()
+
+
+def interrupt_on_terminate():
+    """
+    Treat termination (SIGTERM) in the same way as Ctrl-C, so that a server being run until interrupted is closed and
+    its socket is cleaned up
+    """
+    signal.signal(signal.SIGTERM, _on_terminate)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if len(line) == 0:
+                continue
+
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class RpcServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Minimal JSON RPC server listening on a Unix domain socket.
+
+    Requests and responses are single line JSON objects. A request has the form {"id": .., "method": .., "params": {}}
+    and the response is either {"id": .., "result": ..} or {"id": .., "error": ".."}. Multiple requests can be made
+    over the same connection and connections are served concurrently.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, methods: dict):
+        self._socket_path = socket_path
+        self._methods = dict(methods)
+
+        self._socket_id = None
+
+        # remove any stale socket left over from a previous run, but never one which is still being served
+        if os.path.lexists(socket_path):
+            _remove_stale_socket(socket_path)
+
+        # ensure that only the current user is able to connect to the socket
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+        # identify the socket created by this server, so that only it is removed when the server is closed
+        self._socket_id = _file_id(socket_path)
+
+    @property
+    def socket_path(self):
+        return self._socket_path
+
+    def dispatch(self, line: bytes) -> dict:
+        request_id = None
+        try:
+            request = json.loads(line.decode())
+            request_id = request.get('id')
+
+            method = self._methods.get(request.get('method'))
+            if method is None:
+                raise RpcError('Unknown method: {}'.format(request.get('method')))
+
+            return {'id': request_id, 'result': method(**(request.get('params') or {}))}
+        except Exception as ex:
+            return {'id': request_id, 'error': str(ex) or ex.__class__.__name__}
+
+    def server_close(self):
+        super().server_close()
+        if self._socket_id is not None and _file_id(self._socket_path) == self._socket_id:
+            os.remove(self._socket_path)
+        self._socket_id = None
+
+
+def _file_id(path: str):
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    return info.st_dev, info.st_ino
+
+
+def _remove_stale_socket(socket_path: str):
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise RuntimeError('Unable to listen on {}, it exists and is not a socket'.format(socket_path))
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        # nothing is listening on the socket
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+
+    raise RuntimeError('Unable to listen on {}, another server is already running'.format(socket_path))
+
+
+class RpcClient:
+    """
+    Client for the RpcServer, a single connection is used for all calls
+    """
+
+    def __init__(self, socket_path: str, timeout=None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(socket_path)
+        self._stream = self._socket.makefile('rwb')
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def call(self, method: str, **params):
+        with self._lock:
+            self._next_id += 1
+            request = {'id': self._next_id, 'method': method, 'params': params}
+            self._stream.write(json.dumps(request).encode() + b'\n')
+            self._stream.flush()
+
+            line = self._stream.readline()
+
+        if len(line) == 0:
+            raise RpcError('Connection closed by server')
+
+        response = json.loads(line.decode())
+        if 'error' in response:
+            raise RpcError(response['error'])
+
+        return response.get('result')
+
+    def close(self):
+        self._stream.close()
+        self._socket.close()
@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# below this number of operations the cost of starting the worker processes outweighs the gains
+MIN_PARALLEL_DECRYPTIONS = 2
+MIN_PARALLEL_SIGNATURES = 32
+MIN_PARALLEL_KEY_GENERATIONS = 2
+
+# the signers used by each of the worker processes, by private key
+_worker_keys = {}
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def choose_workers(operations: int, minimum: int, workers=None) -> int:
+    """
+    Determine the number of worker processes to be used for a given amount of work
+
+    :param operations: The number of decryption or signing operations to be performed
+    :param minimum: The minimum number of operations for which a process pool is worthwhile
+    :param workers: The maximum number of workers (defaults to the number of CPUs)
+    :return: The number of workers, 1 signals that the work should be performed in process
+    """
+    if operations < minimum:
+        return 1
+    return max(1, min(int(workers or default_workers()), operations))
+
+
+def _decrypt_key(key_data: str, password: str) -> bytes:
+    from fetchai.ledger.crypto import Entity
+
+    return Entity.loads(key_data, password).private_key_bytes
+
+
+def decrypt_keys(credentials: dict, workers=None) -> dict:
+    """
+    Decrypt a series of keys, in parallel if there is more than one
+
+    :param credentials: The dict of name to (encrypted key contents, password)
+    :param workers: The maximum number of worker processes
+    :return: The dict of name to Entity
+    """
+    from fetchai.ledger.crypto import Entity
+
+    names = list(credentials.keys())
+    key_data, passwords = zip(*[credentials[name] for name in names]) if len(names) > 0 else ((), ())
+
+    workers = choose_workers(len(names), MIN_PARALLEL_DECRYPTIONS, workers)
+    if workers == 1:
+        private_keys = list(map(_decrypt_key, key_data, passwords))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            private_keys = list(executor.map(_decrypt_key, key_data, passwords))
+
+    return {name: Entity(private_key) for name, private_key in zip(names, private_keys)}
+
+
+def decrypt_key_files(credentials: dict, workers=None) -> dict:
+    """
+    Decrypt a series of key files, in parallel if there is more than one
+
+    :param credentials: The dict of name to (key file path, password)
+    :param workers: The maximum number of worker processes
+    :return: The dict of name to Entity
+    """
+    contents = {}
+    for name, (key_file_path, password) in credentials.items():
+        with open(key_file_path, 'r') as key_file:
+            contents[name] = (key_file.read(), password)
+
+    return decrypt_keys(contents, workers=workers)
+
+
+def _generate_key_file(password: str):
+    from fetchai.ledger.crypto import Entity, Address
+
+    # only the encrypted key file leaves the worker process, never the private key itself
+    entity = Entity()
+    return entity.dumps(password), str(Address(entity)), entity.public_key
+
+
+def generate_key_files(password: str, count: int, workers=None):
+    """
+    Generate a series of new keys each encrypted with the same password, in parallel if there is more than one
+
+    :param password: The password used to encrypt the keys
+    :param count: The number of keys to be generated
+    :param workers: The maximum number of worker processes
+    :return: Generator of (encrypted key file contents, address, public key) tuples
+    """
+    workers = choose_workers(count, MIN_PARALLEL_KEY_GENERATIONS, workers)
+    if workers == 1:
+        for _ in range(count):
+            yield _generate_key_file(password)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_size = max(1, count // (4 * workers))
+            yield from executor.map(_generate_key_file, [password] * count, chunksize=chunk_size)
+
+
+def _start_worker(_):
+    return os.getpid()
+
+
+def _sign_payload(job):
+    from fetchai.ledger.crypto import Entity
+
+    private_key, payload = job
+    entity = _worker_keys.get(private_key)
+    if entity is None:
+        entity = _worker_keys[private_key] = Entity(private_key)
+    return entity.sign(payload)
+
+
+class SigningPool:
+    """
+    Signs transactions with a fixed set of signers.
+
+    When more than one worker is requested the signatures are generated in a pool of processes. The private key is
+    sent with each payload to be signed and each worker keeps the signers it has already set up. Signers whose keys are
+    not available locally (i.e. those held by the key agent) are always signed for in the calling process. The pool can
+    be used concurrently from multiple threads, however it must be created before any threads are started since the
+    worker processes are all started (forked) when the pool is created.
+    """
+
+    def __init__(self, signers, workers: int = 1):
+        from fetchai.ledger.crypto import Entity
+
+        self._signers = list(signers)
+        self._workers = workers
+        self._executor = None
+
+        # the private keys of the signers which are available locally
+        self._local = {id(signer): signer.private_key_bytes for signer in self._signers if isinstance(signer, Entity)}
+
+        if workers > 1 and len(self._local) > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+
+            # start all of the workers now, rather than on first use when the caller may have started threads
+            list(self._executor.map(_start_worker, range(workers)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def sign(self, tx):
+        """
+        Sign a transaction with all of the signers
+
+        :param tx: The transaction to be signed
+        """
+        self.sign_all([tx])
+
+    def sign_all(self, transactions):
+        """
+        Sign a series of transactions with all of the signers
+
+        :param transactions: The transactions to be signed
+        """
+        from fetchai.ledger.crypto import Identity
+
+        transactions = list(transactions)
+        if self._executor is None:
+            for tx in transactions:
+                for signer in self._signers:
+                    tx.sign(signer)
+            return
+
+        payloads = [tx.encode_payload() for tx in transactions]
+
+        remote = [signer for signer in self._signers if id(signer) not in self._local]
+        local = [signer for signer in self._signers if id(signer) in self._local]
+
+        jobs = [(self._local[id(signer)], payload) for payload in payloads for signer in local]
+        chunk_size = max(1, len(jobs) // (4 * self._workers))
+        signatures = iter(self._executor.map(_sign_payload, jobs, chunksize=chunk_size))
+
+        for tx, payload in zip(transactions, payloads):
+            for signer in local:
+                tx.add_signature(Identity(signer), next(signatures))
+            for signer in remote:
+                tx.add_signature(Identity(signer), signer.sign(payload))
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .storage import AddressStorage, KeyNotFoundError, KeyStorage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keys (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    address TEXT NOT NULL,
+    public_key TEXT,
+    key_data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_by_address ON keys (address);
+
+CREATE TABLE IF NOT EXISTS addresses (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    address TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS addresses_by_address ON addresses (address);
+"""
+
+
+class SqliteDatabase:
+    """
+    Connection to the SQLite database holding the keys and the address book.
+
+    Every mutation outside of a batch is committed immediately. Inside a batch all the mutations are made in a single
+    transaction, which is committed at the end of the batch or rolled back if the batch fails. Only the rows that are
+    needed are read, nothing is loaded up front.
+
+    The database can be shared between processes: readers are never blocked (write ahead logging) and every write
+    transaction takes the database write lock when it starts, waiting up to BUSY_TIMEOUT seconds for other writers.
+    """
+    BUSY_TIMEOUT = 30.0
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # the database contains the encrypted keys, so it must only be accessible to the owner
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._connection = sqlite3.connect(path, timeout=self.BUSY_TIMEOUT, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=FULL')
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def query(self, sql: str, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params=()) -> int:
+        """
+        Execute a statement (in its own transaction unless inside a batch)
+
+        :return: The number of rows changed
+        """
+        with self.batch():
+            return self._connection.execute(sql, params).rowcount
+
+    def execute_many(self, sql: str, params):
+        with self.batch():
+            self._connection.executemany(sql, params)
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            if self._batch_depth == 0:
+                self._connection.execute('BEGIN IMMEDIATE')
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._connection.execute('ROLLBACK')
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._connection.execute('COMMIT')
+
+
+class SqliteKeyStorage(KeyStorage):
+    """
+    Stores the metadata of each key, along with the encrypted key itself, as a row in the keys table.
+    """
+
+    def __init__(self, path: str):
+        self._db = SqliteDatabase(path)
+
+    def names(self):
+        return [row[0] for row in self._db.query('SELECT name FROM keys ORDER BY position')]
+
+    def items(self):
+        return self._db.query('SELECT name, address FROM keys ORDER BY position')
+
+    def get(self, name: str):
+        rows = self._db.query('SELECT name, address, public_key FROM keys WHERE name = ?', (name,))
+        if len(rows) == 0:
+            return None
+
+        name, address, public_key = rows[0]
+        metadata = {'name': name, 'address': address}
+        if public_key is not None:
+            metadata['public_key'] = public_key
+        return metadata
+
+    def lookup_name(self, address: str):
+        rows = self._db.query('SELECT name FROM keys WHERE address = ? ORDER BY position LIMIT 1', (str(address),))
+        return rows[0][0] if len(rows) > 0 else None
+
+    def read_key(self, name: str) -> str:
+        rows = self._db.query('SELECT key_data FROM keys WHERE name = ?', (name,))
+        if len(rows) == 0:
+            raise KeyNotFoundError()
+        return rows[0][0]
+
+    def add_all(self, keys) -> bool:
+        with self._db.batch():
+            # the check is made inside the write transaction so no other process can add the same names in between
+            for metadata, _ in keys:
+                if len(self._db.query('SELECT 1 FROM keys WHERE name = ?', (metadata['name'],))) > 0:
+                    return False
+
+            self._db.execute_many(
+                'INSERT INTO keys (name, address, public_key, key_data) VALUES (?, ?, ?, ?)',
+                [(metadata['name'], metadata['address'], metadata.get('public_key'), key_data)
+                 for metadata, key_data in keys])
+
+        return True
+
+    def rename(self, old: str, new: str) -> bool:
+        try:
+            return self._db.execute('UPDATE keys SET name = ? WHERE name = ?', (new, old)) > 0
+        except sqlite3.IntegrityError:
+            return False
+
+    def remove(self, name: str) -> bool:
+        return self._db.execute('DELETE FROM keys WHERE name = ?', (name,)) > 0
+
+    def batch(self):
+        return self._db.batch()
+
+    def close(self):
+        self._db.close()
+
+
+class SqliteAddressStorage(AddressStorage):
+    """
+    Stores each of the address book entries as a row in the addresses table.
+    """
+
+    def __init__(self, path: str):
+        self._db = SqliteDatabase(path)
+
+    def names(self):
+        return [row[0] for row in self._db.query('SELECT name FROM addresses ORDER BY position')]
+
+    def items(self):
+        return self._db.query('SELECT name, address FROM addresses ORDER BY position')
+
+    def get(self, name: str):
+        rows = self._db.query('SELECT address FROM addresses WHERE name = ?', (name,))
+        return rows[0][0] if len(rows) > 0 else None
+
+    def add(self, name: str, address: str) -> bool:
+        try:
+            self._db.execute('INSERT INTO addresses (name, address) VALUES (?, ?)', (name, address))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def rename(self, old: str, new: str) -> bool:
+        try:
+            return self._db.execute('UPDATE addresses SET name = ? WHERE name = ?', (new, old)) > 0
+        except sqlite3.IntegrityError:
+            return False
+
+    def remove(self, name: str) -> bool:
+        return self._db.execute('DELETE FROM addresses WHERE name = ?', (name,)) > 0
+
+    def batch(self):
+        return self._db.batch()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,490 @@
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from copy import deepcopy
+
+import toml
+
+from .journal import JournaledIndex, atomic_write
+
+TOML_STORAGE = 'toml'
+SQLITE_STORAGE = 'sqlite'
+STORAGE_BACKENDS = (TOML_STORAGE, SQLITE_STORAGE)
+
+# the backend used for a new (empty) key store root, can be overridden with the POCKETBOOK_STORAGE environment variable
+STORAGE_ENV = 'POCKETBOOK_STORAGE'
+
+KEY_INDEX_FILE_NAME = 'index.toml'
+ADDRESS_INDEX_FILE_NAME = 'addresses.toml'
+DATABASE_FILE_NAME = 'pocketbook.db'
+
+# the suffix added to the files of the previous backend, which are kept as a backup after a migration
+MIGRATED_SUFFIX = '.migrated'
+
+
+class KeyStoreError(Exception):
+    pass
+
+
+class DuplicateKeyNameError(KeyStoreError):
+    def __str__(self):
+        return 'Duplicate key name found'
+
+
+class KeyNotFoundError(KeyStoreError):
+    def __str__(self):
+        return 'Unable to find key in store'
+
+
+class UnableToDecodeKeyError(KeyStoreError):
+    def __str__(self):
+        return 'Unable to decode key from key store'
+
+
+class KeyFileExistsError(KeyStoreError):
+    def __init__(self, names):
+        super().__init__(names)
+        self.names = list(names)
+
+    def __str__(self):
+        return 'Key files already exist for: {}'.format(', '.join(self.names))
+
+
+class KeyStorage(ABC):
+    """
+    Interface for the storage of keys: the metadata of each key (name, address and public key) together with the
+    encrypted contents of the key itself.
+    """
+
+    @abstractmethod
+    def names(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def items(self):
+        """
+        :return: The list of (name, address) tuples for all the keys
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get(self, name: str):
+        """
+        :return: The metadata dict for the key or None if not present
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def lookup_name(self, address: str):
+        """
+        :return: The name of the key with the specified address or None if not present
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def read_key(self, name: str) -> str:
+        """
+        :return: The encrypted contents of the key
+        """
+        raise NotImplementedError()
+
+    def stray_keys(self, names):
+        """
+        :return: The list of the names which are not present but for which an encrypted key already exists (e.g. left
+                 behind by an earlier failure), keys with these names can not be added
+        """
+        return []
+
+    def add(self, metadata: dict, key_data: str) -> bool:
+        return self.add_all([(metadata, key_data)])
+
+    @abstractmethod
+    def add_all(self, keys) -> bool:
+        """
+        Add a series of keys, committing them together
+
+        :param keys: The list of (metadata, encrypted key contents) tuples
+        :return: True if successful, False (with no keys added) if any of the names are already present
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def rename(self, old: str, new: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def remove(self, name: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def batch(self):
+        """
+        Group a series of mutations together so that they are committed once
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class AddressStorage(ABC):
+    """
+    Interface for the storage of the address book: a mapping of name to address.
+    """
+
+    @abstractmethod
+    def names(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def items(self):
+        """
+        :return: The list of (name, address) tuples for all the addresses
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get(self, name: str):
+        """
+        :return: The address for the name or None if not present
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def add(self, name: str, address: str) -> bool:
+        """
+        :return: True if successful, False if the name is already present
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def rename(self, old: str, new: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def remove(self, name: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def batch(self):
+        """
+        Group a series of mutations together so that they are committed once
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+def storage_backend(root: str) -> str:
+    """
+    Determine the storage backend in use for a key store root
+
+    An existing database always takes precedence. Otherwise the TOML layout is used, unless the root is new and the
+    POCKETBOOK_STORAGE environment variable selects another backend.
+
+    :param root: The key store root
+    :return: The name of the storage backend
+    """
+    if os.path.exists(os.path.join(root, DATABASE_FILE_NAME)):
+        return SQLITE_STORAGE
+
+    requested = os.environ.get(STORAGE_ENV, TOML_STORAGE).strip().lower()
+    if requested not in STORAGE_BACKENDS:
+        raise RuntimeError('Unknown storage backend: {}'.format(requested))
+
+    existing = any(os.path.exists(os.path.join(root, name)) for name in (KEY_INDEX_FILE_NAME, ADDRESS_INDEX_FILE_NAME))
+    if existing:
+        return TOML_STORAGE
+
+    return requested
+
+
+def open_key_storage(root: str, backend=None) -> KeyStorage:
+    backend = backend or storage_backend(root)
+    if backend == SQLITE_STORAGE:
+        from .sqlite_storage import SqliteKeyStorage
+        return SqliteKeyStorage(os.path.join(root, DATABASE_FILE_NAME))
+    return TomlKeyStorage(root)
+
+
+def open_address_storage(root: str, backend=None) -> AddressStorage:
+    backend = backend or storage_backend(root)
+    if backend == SQLITE_STORAGE:
+        from .sqlite_storage import SqliteAddressStorage
+        return SqliteAddressStorage(os.path.join(root, DATABASE_FILE_NAME))
+    return TomlAddressStorage(root)
+
+
+class TomlKeyStorage(JournaledIndex, KeyStorage):
+    """
+    The original key store layout: an index.toml file listing the metadata of each key, and one <name>.key file
+    containing each of the encrypted keys.
+    """
+
+    def __init__(self, root: str):
+        self._root = root
+        self._index_path = os.path.join(self._root, KEY_INDEX_FILE_NAME)
+
+        os.makedirs(self._root, exist_ok=True)
+
+        self._init_journal(self._index_path)
+
+    def names(self):
+        return list(self._keys.keys())
+
+    def items(self):
+        return [(name, metadata['address']) for name, metadata in self._keys.items()]
+
+    def get(self, name: str):
+        return self._keys.get(name)
+
+    def lookup_name(self, address: str):
+        return self._addresses.get(str(address))
+
+    def read_key(self, name: str) -> str:
+        try:
+            with open(self._format_key_path(name), 'r') as key_file:
+                return key_file.read()
+        except FileNotFoundError:
+            raise KeyNotFoundError()
+
+    def stray_keys(self, names):
+        return [name for name in names if name not in self._keys and os.path.exists(self._format_key_path(name))]
+
+    def add_all(self, keys) -> bool:
+        with self._write_lock():
+            if any(metadata['name'] in self._keys for metadata, _ in keys):
+                return False
+
+            # never overwrite a key file which is not in the index
+            stray = self.stray_keys(metadata['name'] for metadata, _ in keys)
+            if len(stray) > 0:
+                raise KeyFileExistsError(stray)
+
+            records = []
+            for metadata, key_data in keys:
+                # dump out the file
+                atomic_write(self._format_key_path(metadata['name']), key_data)
+
+                self._insert_into_index(metadata)
+                records.append(dict(op='add', **metadata))
+
+            self._commit_all(records)
+
+        return True
+
+    def rename(self, old: str, new: str) -> bool:
+        with self._write_lock():
+            old_metadata = self._keys.get(old)
+            if old_metadata is None or new in self._keys:
+                return False
+
+            # move the key file
+            os.rename(self._format_key_path(old), self._format_key_path(new))
+
+            # remove the old entries to the metadata
+            self._remove_key_from_index(old)
+
+            # update and insert the new meta data into place
+            new_metadata = deepcopy(old_metadata)
+            new_metadata['name'] = new
+            self._insert_into_index(new_metadata)
+            self._commit({'op': 'rename', 'old': old, 'new': new})
+
+        return True
+
+    def remove(self, name: str) -> bool:
+        with self._write_lock():
+            if name not in self._keys:
+                return False
+
+            # remove the key path from the disk
+            key_file_path = self._format_key_path(name)
+            if not os.path.exists(key_file_path):
+                raise RuntimeError('Key not present on disk, unable to remove')
+            os.remove(key_file_path)
+
+            # update the index
+            self._remove_key_from_index(name)
+            self._commit({'op': 'remove', 'name': name})
+
+        return True
+
+    def _insert_into_index(self, metadata: dict):
+        self._keys[metadata['name']] = metadata
+        self._addresses[metadata['address']] = metadata['name']
+
+    def _remove_key_from_index(self, name: str):
+        metadata = self._keys.pop(name)
+        if self._addresses.get(metadata['address']) == name:
+            del self._addresses[metadata['address']]
+
+    def _format_key_path(self, name: str):
+        return os.path.join(self._root, '{}.key'.format(name))
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'r') as index_file:
+                index = toml.load(index_file)
+        else:
+            index = {'key': []}
+
+        # build the lookup tables (name -> metadata and address -> name) from the index
+        self._keys = OrderedDict()
+        self._addresses = {}
+        for item in index.get('key', []):
+            self._insert_into_index(item)
+
+    def _flush_index(self):
+        atomic_write(self._index_path, toml.dumps({'key': list(self._keys.values())}))
+
+    def _replay(self, record: dict):
+        op = record['op']
+        if op == 'add':
+            self._insert_into_index({k: v for k, v in record.items() if k != 'op'})
+        elif op == 'rename' and record['old'] in self._keys:
+            metadata = deepcopy(self._keys[record['old']])
+            metadata['name'] = record['new']
+            self._remove_key_from_index(record['old'])
+            self._insert_into_index(metadata)
+        elif op == 'remove' and record['name'] in self._keys:
+            self._remove_key_from_index(record['name'])
+
+
+class TomlAddressStorage(JournaledIndex, AddressStorage):
+    """
+    The original address book layout: a single addresses.toml file mapping each name to its address.
+    """
+
+    def __init__(self, root: str):
+        self._root = root
+        self._address_book_path = os.path.join(self._root, ADDRESS_INDEX_FILE_NAME)
+        self._init_journal(self._address_book_path)
+
+    def names(self):
+        return list(self._address_book.keys())
+
+    def items(self):
+        return list(self._address_book.items())
+
+    def get(self, name: str):
+        return self._address_book.get(name)
+
+    def add(self, name: str, address: str) -> bool:
+        with self._write_lock():
+            if name in self._address_book:
+                return False
+
+            self._address_book[name] = address
+            self._commit({'op': 'add', 'name': name, 'address': address})
+
+        return True
+
+    def rename(self, old: str, new: str) -> bool:
+        with self._write_lock():
+            if old not in self._address_book or new in self._address_book:
+                return False
+
+            self._address_book[new] = self._address_book[old]
+            del self._address_book[old]
+            self._commit({'op': 'rename', 'old': old, 'new': new})
+
+        return True
+
+    def remove(self, name: str) -> bool:
+        with self._write_lock():
+            if name not in self._address_book:
+                return False
+
+            del self._address_book[name]
+            self._commit({'op': 'remove', 'name': name})
+
+        return True
+
+    def _flush_index(self):
+        os.makedirs(self._root, exist_ok=True)
+        atomic_write(self._address_book_path, toml.dumps(self._address_book))
+
+    def _replay(self, record: dict):
+        op = record['op']
+        if op == 'add':
+            self._address_book[record['name']] = record['address']
+        elif op == 'rename' and record['old'] in self._address_book:
+            self._address_book[record['new']] = self._address_book.pop(record['old'])
+        elif op == 'remove':
+            self._address_book.pop(record['name'], None)
+
+    def _load_index(self):
+        if not os.path.exists(self._address_book_path):
+            self._address_book = {}
+            return
+        with open(self._address_book_path, 'r') as input_file:
+            self._address_book = toml.load(input_file)
+
+
+def migrate_storage(root: str, target: str):
+    """
+    Copy all the keys and addresses of a key store root from its current storage backend into another backend.
+
+    The original files are kept as a backup, renamed with a .migrated suffix so that they are not picked up (and do not
+    get in the way of migrating back later). A new database is built under a temporary name and only moved into place
+    once complete.
+
+    :param root: The key store root
+    :param target: The name of the target backend
+    :return: The tuple of (number of keys, number of addresses) copied
+    """
+    from .sqlite_storage import SqliteAddressStorage, SqliteKeyStorage
+
+    source = storage_backend(root)
+    if target not in STORAGE_BACKENDS:
+        raise RuntimeError('Unknown storage backend: {}'.format(target))
+    if source == target:
+        raise RuntimeError('The key store already uses the {} backend'.format(target))
+
+    source_keys = open_key_storage(root, source)
+    source_addresses = open_address_storage(root, source)
+    keys = [(source_keys.get(name), source_keys.read_key(name)) for name in source_keys.names()]
+    addresses = source_addresses.items()
+    source_keys.close()
+    source_addresses.close()
+
+    database_path = os.path.join(root, DATABASE_FILE_NAME)
+    if target == SQLITE_STORAGE:
+        temp_path = database_path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        target_keys, target_addresses = SqliteKeyStorage(temp_path), SqliteAddressStorage(temp_path)
+    else:
+        existing = [name for name in (KEY_INDEX_FILE_NAME, ADDRESS_INDEX_FILE_NAME)
+                    if os.path.exists(os.path.join(root, name))]
+        existing += ['{}.key'.format(metadata['name']) for metadata, _ in keys
+                     if os.path.exists(os.path.join(root, '{}.key'.format(metadata['name'])))]
+        if len(existing) > 0:
+            raise RuntimeError('Unable to migrate, files from the TOML backend are already present: {}'.format(
+                ', '.join(existing)))
+
+        target_keys, target_addresses = TomlKeyStorage(root), TomlAddressStorage(root)
+
+    target_keys.add_all(keys)
+    with target_addresses.batch():
+        for name, address in addresses:
+            target_addresses.add(name, address)
+    target_keys.close()
+    target_addresses.close()
+
+    if target == SQLITE_STORAGE:
+        os.replace(temp_path, database_path)
+
+        toml_files = [KEY_INDEX_FILE_NAME, ADDRESS_INDEX_FILE_NAME]
+        toml_files += ['{}.key'.format(metadata['name']) for metadata, _ in keys]
+        for name in toml_files:
+            path = os.path.join(root, name)
+            if os.path.exists(path):
+                os.replace(path, path + MIGRATED_SUFFIX)
+    else:
+        os.replace(database_path, database_path + MIGRATED_SUFFIX)
+
+    return len(keys), len(addresses)
@@ -1,84 +1,82 @@
-from colored import fg, bg, attr
-
-
-class Table:
-    def __init__(self, columns):
-        self._rows = []
-        self._columns = columns
-
-    def add_row(self, **kwargs):
-        self._rows.append(dict(**kwargs))
+import sys
 
-    def display(self, column_padding=1):
+from colored import fg, bg, attr
 
-        # Step 1. Determine the column lengths
-        column_lengths = [0] * len(self._columns)
-        for i, column in enumerate(self._columns):
+# the number of rendered rows which are collected together into a single write to the output
+DEFAULT_CHUNK_SIZE = 256
 
-            # header
-            column_lengths[i] = len(column)
+# the number of rows used to determine the column widths when streaming a table
+DEFAULT_SAMPLE_SIZE = 100
 
-            # row contents
-            for row in self._rows:
-                column_lengths[i] = max(column_lengths[i], len(str(row.get(column, ''))))
 
-            # allow a nice
-            column_lengths[i] += column_padding
+class _Renderer:
+    """
+    Renders the header and rows of a table as strings, so that many of them can be written to the output at once
+    """
 
-        # Step 2a. Print the header
-        self._start_header()
-        for i, column in enumerate(self._columns):
-            self._write_header(column, column_lengths[i])
-        self._end_header()
+    def __init__(self, columns, lengths):
+        self._columns = columns
+        self._lengths = lengths
+        self._header_start = fg(255)
+        self._row_starts = (fg(253) + bg(238), fg(251) + bg(235))
+        self._end = attr(0) + '\n'
 
-        # Step 2b. Print the table contents
-        for i, row in enumerate(self._rows):
-            self._start_row(i)
-            for j, column in enumerate(self._columns):
-                self._write_row_value(row.get(column, ''), i, column_lengths[j])
-            self._end_row(i)
+    def header(self):
+        values = []
+        for column, length in zip(self._columns, self._lengths):
+            value = Table._pad_value(column, length)
 
-    @classmethod
-    def _start_header(cls):
-        print(fg(255), end='')
+            # capitalise
+            values.append(value[0].upper() + value[1:])
 
-    @classmethod
-    def _write_header(cls, value, length):
-        value = cls._pad_value(value, length)
+        return self._header_start + ''.join(values) + self._end
 
-        # capitalise
-        value = value[0].upper() + value[1:]
-        print(value, end='')
+    def row(self, index, values):
+        cells = ''.join(Table._pad_value(value, length) for value, length in zip(values, self._lengths))
+        return self._row_starts[index & 1] + cells + self._end
 
-    @classmethod
-    def _end_header(cls):
-        print(attr(0))
 
-    @classmethod
-    def _start_row(cls, row):
-        if row & 1:
-            foreground = fg(251)
-            background = bg(235)
-        else:
-            foreground = fg(253)
-            background = bg(238)
+class Table:
+    def __init__(self, columns, stream=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param columns: The names of the columns of the table
+        :param stream: The output stream (defaults to stdout at the time of display)
+        :param chunk_size: The number of rows rendered before each write to the output
+        """
+        self._columns = list(columns)
+        self._stream = stream
+        self._chunk_size = max(1, int(chunk_size))
+
+        # rows are stored compactly as tuples of strings and the column widths are tracked as they are added, so that
+        # there is no need for another pass over the rows when they are displayed
+        self._rows = []
+        self._widths = [len(column) for column in self._columns]
 
-        print(foreground + background, end='')
+    def add_row(self, **kwargs):
+        values = tuple(str(kwargs.get(column, '')) for column in self._columns)
+        for i, value in enumerate(values):
+            if len(value) > self._widths[i]:
+                self._widths[i] = len(value)
+        self._rows.append(values)
 
-    @classmethod
-    def _write_row_value(cls, value, row, length):
-        value = cls._pad_value(value, length)
+    def display(self, column_padding=1):
+        stream = self._stream or sys.stdout
+        renderer = _Renderer(self._columns, [width + column_padding for width in self._widths])
 
-        print(value, end='')
+        chunk = [renderer.header()]
+        for i, values in enumerate(self._rows):
+            chunk.append(renderer.row(i, values))
+            if len(chunk) >= self._chunk_size:
+                stream.write(''.join(chunk))
+                chunk = []
 
-    @classmethod
-    def _end_row(cls, row):
-        print(attr(0))
+        if len(chunk) > 0:
+            stream.write(''.join(chunk))
+        stream.flush()
 
     @classmethod
     def _pad_value(cls, value, length):
         value = str(value)
-        in_value = str(value)
         value_len = len(value)
 
         if value_len > length:
@@ -88,3 +86,91 @@ class Table:
             value += ' ' * padding_len
 
         return value
+
+
+class StreamingTable:
+    """
+    Displays the rows of a table as they are added, without holding all of them in memory.
+
+    The column widths are either fixed up front or determined from a sample of the first rows. Until the sample is
+    complete the rows are buffered, after which each row is written as soon as it is added. Values in later rows which
+    are wider than the column are truncated.
+    """
+
+    def __init__(self, columns, widths=None, sample_size=DEFAULT_SAMPLE_SIZE, column_padding=1, stream=None,
+                 chunk_size=1):
+        """
+        :param columns: The names of the columns of the table
+        :param widths: Optional mapping of column name to fixed width, any other columns are sampled
+        :param sample_size: The number of rows used to determine the widths of the columns which are not fixed
+        :param column_padding: The space between each of the columns
+        :param stream: The output stream (defaults to stdout)
+        :param chunk_size: The number of rows rendered before each write to the output, once streaming
+        """
+        self._columns = list(columns)
+        self._fixed = dict(widths or {})
+        self._sample_size = max(0, int(sample_size))
+        self._column_padding = column_padding
+        self._stream = stream or sys.stdout
+        self._chunk_size = max(1, int(chunk_size))
+        self._renderer = None
+        self._sample = []
+        self._chunk = []
+        self._count = 0
+
+        # when every column width is known there is no need to sample anything
+        if all(column in self._fixed for column in self._columns):
+            self._start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_row(self, **kwargs):
+        values = tuple(str(kwargs.get(column, '')) for column in self._columns)
+
+        if self._renderer is None:
+            self._sample.append(values)
+            if len(self._sample) >= self._sample_size:
+                self._start()
+        else:
+            self._emit(values)
+
+    def close(self):
+        """
+        Write any buffered rows to the output (displaying the header if nothing has been written yet)
+        """
+        if self._renderer is None:
+            self._start()
+        self._flush()
+
+    def _start(self):
+        lengths = []
+        for i, column in enumerate(self._columns):
+            if column in self._fixed:
+                width = self._fixed[column]
+            else:
+                width = max([len(column)] + [len(values[i]) for values in self._sample])
+            lengths.append(width + self._column_padding)
+
+        self._renderer = _Renderer(self._columns, lengths)
+        self._chunk.append(self._renderer.header())
+
+        sample, self._sample = self._sample, []
+        for values in sample:
+            self._emit(values)
+        self._flush()
+
+    def _emit(self, values):
+        self._chunk.append(self._renderer.row(self._count, values))
+        self._count += 1
+        if len(self._chunk) >= self._chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if len(self._chunk) > 0:
+            self._stream.write(''.join(self._chunk))
+            self._chunk = []
+        self._stream.flush()
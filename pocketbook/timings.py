@@ -0,0 +1,147 @@
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+TEXT_TIMINGS = 'text'
+JSON_TIMINGS = 'json'
+TIMINGS_FORMATS = (TEXT_TIMINGS, JSON_TIMINGS)
+
+PERCENTILES = (50, 90, 99)
+
+# the active recorder, None when timings have not been requested
+_recorder = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+# shared by all of the spans when timings are disabled, so that instrumented code does no extra work
+_NULL_SPAN = _NullSpan()
+
+
+class Recorder:
+    """
+    Collects the durations of named spans. Spans can be recorded concurrently from multiple threads (for example the
+    balance queries) and the same name can be recorded many times, e.g. once per network request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = OrderedDict()
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, duration: float):
+        with self._lock:
+            self._durations.setdefault(name, []).append(duration)
+
+    def summary(self):
+        """
+        :return: The list of dicts (one per span name, in the order first recorded) of the count, total, mean,
+                 percentiles and max duration, all durations are in milliseconds
+        """
+        with self._lock:
+            durations = [(name, sorted(values)) for name, values in self._durations.items()]
+
+        summary = []
+        for name, values in durations:
+            entry = OrderedDict()
+            entry['name'] = name
+            entry['count'] = len(values)
+            entry['total_ms'] = _ms(sum(values))
+            entry['mean_ms'] = _ms(sum(values) / len(values))
+            for percentile in PERCENTILES:
+                entry['p{}_ms'.format(percentile)] = _ms(_percentile(values, percentile))
+            entry['max_ms'] = _ms(values[-1])
+            summary.append(entry)
+        return summary
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+def _percentile(ordered, percentile: int):
+    # nearest rank method, always returns one of the recorded values
+    rank = max(1, int(math.ceil(percentile / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def enable() -> Recorder:
+    """
+    Start recording timings for the remainder of the process
+    """
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+
+
+def recorder():
+    return _recorder
+
+
+def span(name: str):
+    """
+    Time the enclosed block of code (when timings are enabled)
+
+    :param name: The name of the span, spans with the same name are aggregated
+    :return: The context manager for the span
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return _recorder.span(name)
+
+
+def report(fmt=TEXT_TIMINGS, stream=None):
+    """
+    Output the summary of the recorded timings
+
+    :param fmt: Either text (a table) or json
+    :param stream: The output stream, defaults to stderr so that the output of the command itself is unaffected
+    """
+    from .table import Table
+
+    stream = stream or sys.stderr
+    summary = [] if _recorder is None else _recorder.summary()
+
+    if fmt == JSON_TIMINGS:
+        stream.write(json.dumps({'spans': summary}) + '\n')
+        stream.flush()
+        return
+
+    columns = ['Span', 'Count', 'Total (ms)', 'Mean', *['p{}'.format(p) for p in PERCENTILES], 'Max']
+    table = Table(columns, stream=stream)
+    for entry in summary:
+        row = {
+            'Span': entry['name'],
+            'Count': str(entry['count']),
+            'Total (ms)': '{:.1f}'.format(entry['total_ms']),
+            'Mean': '{:.1f}'.format(entry['mean_ms']),
+            'Max': '{:.1f}'.format(entry['max_ms']),
+        }
+        for percentile in PERCENTILES:
+            row['p{}'.format(percentile)] = '{:.1f}'.format(entry['p{}_ms'.format(percentile)])
+        table.add_row(**row)
+
+    stream.write('\nTimings:\n')
+    table.display()
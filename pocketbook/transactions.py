@@ -0,0 +1,84 @@
+# the default number of blocks for which a transaction is valid
+DEFAULT_VALIDITY_PERIOD = 100
+
+
+def build_transfer(from_address, destination, amount: int, charge_rate: int, signers):
+    """
+    Build an (unsigned) token transfer transaction
+
+    :param from_address: The address funding the transfer
+    :param destination: The address receiving the funds
+    :param amount: The canonical amount to be transferred
+    :param charge_rate: The canonical charge rate for the transaction
+    :param signers: The list of entities that will sign the transaction
+    :return: The transaction
+    """
+    from fetchai.ledger.api.token import TokenTxFactory
+    from fetchai.ledger.crypto import Address
+
+    tx = TokenTxFactory.transfer(Address(from_address), destination, amount, 0, signers)
+    tx.charge_rate = charge_rate
+    tx.charge_limit = len(signers)
+    return tx
+
+
+def determine_from_account(key_store, address_book, signers, from_address=None) -> str:
+    """
+    Check the signers of a transfer and determine the account which is funding it. A transfer with a single signer is
+    funded by that key unless another account is specified, multi-sig transfers must always specify the account.
+
+    :param key_store: The key store
+    :param address_book: The address book
+    :param signers: The names of the keys signing the transfer
+    :param from_address: The name of the funding account (if specified)
+    :return: The name of the funding account
+    """
+    if len(signers) == 0:
+        raise RuntimeError('Unable to determine from account')
+
+    for signer in signers:
+        if not key_store.has_key(signer):
+            raise RuntimeError('Unknown key: {}'.format(signer))
+
+    if from_address is None:
+        if len(signers) != 1:
+            raise RuntimeError('Unable to determine from account')
+        return signers[0]
+
+    if not (key_store.has_key(from_address) or address_book.has_address(from_address)):
+        raise RuntimeError('Unknown from address: {}'.format(from_address))
+
+    return from_address
+
+
+def check_funds(api, from_address, from_name, total: int):
+    """
+    Check that the source account is able to fund a transfer. Only the balance is queried, the stake is not needed.
+
+    :param api: The ledger API
+    :param from_address: The address funding the transfer
+    :param from_name: The name of the funding account (used in the error message)
+    :param total: The canonical total of the amount and fees
+    :return: The canonical balance of the funding account
+    """
+    from pocketbook.utils import format_canonical, get_balance
+
+    balance = get_balance(api, from_address)
+    if balance < total:
+        raise RuntimeError('Insufficient funds in {}: balance {} is less than required total {}'.format(
+            from_name, format_canonical(balance), format_canonical(total)))
+    return balance
+
+
+def tx_digest(tx) -> str:
+    """
+    Compute the digest of a signed transaction, i.e. the digest under which the ledger will track it
+
+    :param tx: The signed transaction
+    :return: The hex encoded digest
+    """
+    import hashlib
+
+    from fetchai.ledger.serialisation.transaction import encode_transaction
+
+    return hashlib.sha256(encode_transaction(tx)).hexdigest()
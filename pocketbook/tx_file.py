@@ -0,0 +1,62 @@
+import base64
+import json
+
+from .journal import atomic_write
+
+TX_FILE_FORMAT = 'pocketbook-tx'
+TX_FILE_VERSION = 1
+
+
+def write_tx_file(path: str, network: str, transactions):
+    """
+    Write a series of (partially) signed transactions to a file.
+
+    The first line of the file is a JSON header, identifying the format and the network that the transactions are
+    intended for. Each subsequent line is a single transaction in the ledger's own binary encoding (including any
+    signatures present so far), base64 encoded so that the file can be safely moved between machines as text.
+
+    :param path: The path to the output file
+    :param network: The name of the network the transactions are intended for
+    :param transactions: The transactions to be written
+    """
+    lines = [base64.b64encode(tx.encode_partial()).decode() for tx in transactions]
+    header = {'format': TX_FILE_FORMAT, 'version': TX_FILE_VERSION, 'network': network, 'count': len(lines)}
+
+    atomic_write(path, '\n'.join([json.dumps(header)] + lines) + '\n')
+
+
+def read_tx_file(path: str):
+    """
+    Read a transaction file
+
+    :param path: The path to the transaction file
+    :return: The tuple of (network, list of transactions)
+    """
+    from fetchai.ledger.transaction import Transaction
+
+    with open(path, 'r') as tx_file:
+        try:
+            header = json.loads(tx_file.readline())
+        except ValueError:
+            header = None
+
+        if not isinstance(header, dict) or header.get('format') != TX_FILE_FORMAT:
+            raise RuntimeError('{} is not a transaction file'.format(path))
+        if header.get('version') != TX_FILE_VERSION:
+            raise RuntimeError('Unsupported transaction file version: {}'.format(header.get('version')))
+
+        transactions = []
+        for line in tx_file:
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            try:
+                _, tx = Transaction.decode_partial(base64.b64decode(line))
+                transactions.append(tx)
+            except Exception:
+                raise RuntimeError('Unable to decode transaction {} in {}'.format(len(transactions) + 1, path))
+
+    if len(transactions) != header.get('count'):
+        raise RuntimeError('Transaction file {} is truncated'.format(path))
+
+    return header.get('network'), transactions
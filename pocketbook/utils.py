@@ -1,8 +1,10 @@
+from decimal import Decimal, InvalidOperation, localcontext
 from typing import Union
 
-from fetchai.ledger.crypto import Address
+from .timings import span
 
-CANONICAL_FET_UNIT = 1e10
+CANONICAL_FET_DECIMALS = 10
+CANONICAL_FET_UNIT = 10 ** CANONICAL_FET_DECIMALS
 MINIMUM_FRACTIONAL_FET = 1 / CANONICAL_FET_UNIT
 MAX_TOKEN_PADDING = 10
 
@@ -16,53 +18,133 @@ class ConversionError(RuntimeError):
         super().__init__(msg)
 
 
-def to_canonical(value: Union[float, int]) -> int:
-    value = float(value)
-    if value < 0:
+def _canonical_digits(amount: Decimal) -> int:
+    # the number of significant digits needed to represent the amount in canonical units exactly, the default decimal
+    # context only has 28 which would silently round large amounts
+    return max(len(amount.as_tuple().digits), amount.adjusted() + 1) + CANONICAL_FET_DECIMALS
+
+
+def parse_canonical(value: Union[str, int, float, Decimal]) -> int:
+    """
+    Exactly converts a token amount (in FET) into canonical units
+
+    Floats are converted via their shortest string representation, so that a value like 1.2 is interpreted as written
+    rather than as its nearest binary approximation.
+
+    :param value: The token amount as a decimal string, integer, float or Decimal
+    :return: The amount in canonical units
+    """
+    if isinstance(value, int):
+        return value * CANONICAL_FET_UNIT
+
+    try:
+        amount = Decimal(value if isinstance(value, Decimal) else str(value).strip())
+    except InvalidOperation:
+        raise ValueError('Unable to parse token amount: {}'.format(value))
+    if not amount.is_finite():
+        raise ValueError('Unable to parse token amount: {}'.format(value))
+
+    with localcontext() as context:
+        context.prec = max(context.prec, _canonical_digits(amount))
+        canonical = amount.scaleb(CANONICAL_FET_DECIMALS)
+        if canonical != canonical.to_integral_value():
+            raise ConversionError(
+                'Token amount {} has more than {} decimal places'.format(value, CANONICAL_FET_DECIMALS))
+
+    return int(canonical)
+
+
+def to_canonical(value: Union[str, int, float, Decimal]) -> int:
+    if isinstance(value, (int, float, Decimal)) and value < 0:
+        raise ConversionError('Unable to convert negative token amount: {}'.format(value))
+
+    if isinstance(value, (float, Decimal)) and 0 < value < MINIMUM_FRACTIONAL_FET:
+        raise ConversionError(
+            'Converted value {} is below minimum transfer value: {}'.format(value, MINIMUM_FRACTIONAL_FET))
+
+    canonical = parse_canonical(value)
+    if canonical < 0:
         raise ConversionError('Unable to convert negative token amount: {}'.format(value))
-    if value < MINIMUM_FRACTIONAL_FET:
+    if canonical == 0:
         raise ConversionError(
             'Converted value {} is below minimum transfer value: {}'.format(value, MINIMUM_FRACTIONAL_FET))
 
-    return int(value * CANONICAL_FET_UNIT)
+    return canonical
 
 
-def from_canonical(value: int) -> float:
+def from_canonical(value: int) -> Decimal:
     value = int(value)
     if value < 0:
         raise ConversionError('Unable to convert negative token amount: {}'.format(value))
 
-    return value / int(CANONICAL_FET_UNIT)
+    return Decimal(value).scaleb(-CANONICAL_FET_DECIMALS)
 
 
-def token_amount(value: float) -> str:
+def format_canonical(value: int) -> str:
     """
-    Converts a token amount into a fixed precision string value
-    :param value: The input value to display
+    Formats an amount in canonical units as a fixed precision decimal string (in FET), using integer arithmetic only
+
+    :param value: The amount in canonical units
+    :return: The formatted value, for example 12.3400000000
+    """
+    value = int(value)
+    sign = '-' if value < 0 else ''
+    whole, fraction = divmod(abs(value), CANONICAL_FET_UNIT)
+    return '{}{}.{:0{}d}'.format(sign, whole, fraction, CANONICAL_FET_DECIMALS)
+
+
+def canonical_token_amount(value: int) -> str:
+    """
+    Converts an amount in canonical units into a padded fixed precision string value for display
+    :param value: The amount in canonical units
     :return: The converted value
     """
-    padding = ' ' * (MAX_TOKEN_PADDING - min(len(str(int(value))), MAX_TOKEN_PADDING))
-    return '{}{:10.10f} FET'.format(padding, float(value))
+    formatted = format_canonical(value)
+    padding = ' ' * (MAX_TOKEN_PADDING - min(formatted.index('.'), MAX_TOKEN_PADDING))
+    return '{}{} FET'.format(padding, formatted)
 
 
-def get_balance(api, address):
-    balance = int(api.tokens.balance(address))
-    return from_canonical(balance)
+def token_amount(value: Union[int, float, Decimal]) -> str:
+    """
+    Converts a token amount into a fixed precision string value, rounded to the nearest canonical unit
+    :param value: The input value (in FET) to display
+    :return: The converted value
+    """
+    if isinstance(value, int):
+        return canonical_token_amount(parse_canonical(value))
 
+    try:
+        amount = Decimal(value if isinstance(value, Decimal) else str(value).strip())
+        with localcontext() as context:
+            context.prec = max(context.prec, _canonical_digits(amount))
+            amount = amount.quantize(Decimal(1).scaleb(-CANONICAL_FET_DECIMALS))
+    except InvalidOperation:
+        raise ValueError('Unable to display token amount: {}'.format(value))
+
+    return canonical_token_amount(parse_canonical(amount))
+
+
+def get_balance(api, address) -> int:
+    with span('network.balance'):
+        return int(api.tokens.balance(address))
 
-def get_stake(api, addresss):
-    stake = int(api.tokens.stake(addresss))
-    return from_canonical(stake)
+
+def get_stake(api, addresss) -> int:
+    with span('network.stake'):
+        return int(api.tokens.stake(addresss))
+
+
+def get_tx_status(api, digest: str):
+    with span('network.tx_status'):
+        return api.tx.status(digest)
 
 
 def create_api(name: str):
-    from fetchai.ledger.api import LedgerApi
+    from pocketbook.connection import ConnectionManager
 
     try:
-        if name == 'local':
-            return LedgerApi('127.0.0.1', 8000)
-        else:
-            return LedgerApi(network=name)
+        with span('api.create'):
+            return ConnectionManager().create(name)
     except:
         pass
 
@@ -70,6 +152,9 @@ def create_api(name: str):
 
 
 def checked_address(address):
+    # deferred import, loading the crypto libraries is expensive and not required by most commands
+    from fetchai.ledger.crypto import Address
+
     try:
         return Address(address)
     except:
@@ -0,0 +1,55 @@
+import os
+import threading
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.agent import KeyAgent
+from pocketbook.key_store import KeyStore
+from pocketbook.rpc import RpcServer
+from tests.utils import TemporaryPocketBookRoot, SUPER_SECURE_PASSWORD
+
+
+class AgentCommandTests(unittest.TestCase):
+
+    def create_args(self, action, socket, names=None):
+        args = Mock()
+        args.action = action
+        args.socket = socket
+        args.names = names or []
+        return args
+
+    def test_agent_not_running(self):
+        with TemporaryPocketBookRoot() as ctx:
+            from pocketbook.commands.agent import run_agent
+            with self.assertRaises(RuntimeError):
+                run_agent(self.create_args('list', os.path.join(ctx.root, 'agent.sock')))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_unlock_list_and_lock(self, mock_getpass, output):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            KeyStore(root=ctx.root).add_key('key1', SUPER_SECURE_PASSWORD, entity)
+
+            agent = KeyAgent(root=ctx.root)
+            server = RpcServer(os.path.join(ctx.root, 'agent.sock'), agent.methods())
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                from pocketbook.commands.agent import run_agent
+                run_agent(self.create_args('unlock', server.socket_path, ['key1']))
+                run_agent(self.create_args('list', server.socket_path))
+                run_agent(self.create_args('lock', server.socket_path))
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+        self.assertEqual(output.getvalue().splitlines(), [
+            'Unlocked key1 ({})'.format(Address(entity)),
+            'key1 {} (idle 0s)'.format(Address(entity)),
+            'Locked key1',
+        ])
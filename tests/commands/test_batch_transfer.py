@@ -0,0 +1,107 @@
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock, MagicMock
+
+from fetchai.ledger.crypto import Address, Entity
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore
+from pocketbook.payouts import ResultLedger, EXECUTED
+from tests.utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class BatchTransferCommandTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = TemporaryPocketBookRoot()
+        self.ctx.__enter__()
+        self.addCleanup(self.ctx.__exit__, None, None, None)
+
+        self.entity = Entity()
+        KeyStore(root=self.ctx.root).add_key('payer', SUPER_SECURE_PASSWORD, self.entity)
+        AddressBook(root=self.ctx.root).add('alice', SAMPLE_ADDRESS)
+
+        # redirect the default stores to the temporary root
+        for name, cls in (('KeyStore', KeyStore), ('AddressBook', AddressBook)):
+            patcher = patch('pocketbook.{}.{}'.format(cls.__module__.split('.')[-1], name),
+                            side_effect=lambda cls=cls: cls(root=self.ctx.root))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.api = MagicMock()
+        self.api.tokens.balance.return_value = 1000 * 10 ** 10
+        self.api.tokens.stake.return_value = 0
+        self.api.submit_signed_tx.side_effect = lambda tx: 'digest-{}'.format(id(tx))
+        self.api.tx.status.return_value = Mock(successful=True, failed=False)
+
+        patcher = patch('pocketbook.utils.create_api', return_value=self.api)
+        self.mock_create_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_payouts(self, contents):
+        path = os.path.join(self.ctx.root, 'payouts.csv')
+        with open(path, 'w') as payout_file:
+            payout_file.write(contents)
+        return path
+
+    def create_args(self, path):
+        args = Mock()
+        args.path = path
+        args.format = None
+        args.ledger = None
+        args.signers = ['payer']
+        args.from_address = None
+        args.charge_rate = 1
+        args.window = 4
+        args.workers = None
+        args.confirm_timeout = 1
+        args.yes = True
+        args.network = 'super-duper-net'
+        return args
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_payout_run(self, mock_getpass, output):
+        path = self.write_payouts('destination,amount\nalice,1.5\n{},2\n'.format(SAMPLE_ADDRESS))
+
+        from pocketbook.commands.batch_transfer import run_batch_transfer
+        self.assertEqual(run_batch_transfer(self.create_args(path)), 0)
+
+        # the key is unsealed once and all the payouts are submitted
+        mock_getpass.assert_called_once()
+        self.assertEqual(self.api.submit_signed_tx.call_count, 2)
+        self.assertEqual(ResultLedger(path + '.results.jsonl').summary(), {EXECUTED: 2})
+        self.assertIn('Executed 2 of 2 payouts', output.getvalue())
+
+        # running again does not pay anything twice
+        self.api.submit_signed_tx.reset_mock()
+        self.assertEqual(run_batch_transfer(self.create_args(path)), 0)
+        self.api.submit_signed_tx.assert_not_called()
+        self.assertIn('All payouts have already been executed', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_invalid_rows_abort_the_run(self, mock_getpass, output):
+        path = self.write_payouts('destination,amount\nalice,1\nbob,1\nalice,-1\n')
+
+        from pocketbook.commands.batch_transfer import run_batch_transfer
+        self.assertEqual(run_batch_transfer(self.create_args(path)), 1)
+
+        self.mock_create_api.assert_not_called()
+        self.assertIn('Row 2: invalid payout', output.getvalue())
+        self.assertIn('Row 3: invalid payout', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_insufficient_funds(self, mock_getpass, output):
+        path = self.write_payouts('destination,amount\nalice,999\nalice,2\n')
+
+        from pocketbook.commands.batch_transfer import run_batch_transfer
+        with self.assertRaises(RuntimeError):
+            run_batch_transfer(self.create_args(path))
+
+        # only the balance is needed to check the funds
+        self.api.tokens.balance.assert_called_once_with(Address(self.entity))
+        self.api.tokens.stake.assert_not_called()
+        self.api.submit_signed_tx.assert_not_called()
@@ -0,0 +1,54 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock
+
+from pocketbook.rpc import RpcClient
+
+
+class CallCommandTests(unittest.TestCase):
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.rpc.RpcClient', spec=RpcClient)
+    def test_call(self, MockRpcClient, output):
+        client = MockRpcClient.return_value.__enter__.return_value
+        client.call.return_value = {'name': 'foo'}
+
+        args = Mock()
+        args.socket = '/tmp/pocketbook.sock'
+        args.method = 'lookup'
+        args.params = ['name=foo']
+
+        from pocketbook.commands.call import run_call
+        run_call(args)
+
+        MockRpcClient.assert_called_once_with('/tmp/pocketbook.sock')
+        client.call.assert_called_once_with('lookup', name='foo')
+        self.assertEqual(output.getvalue(), '{\n  "name": "foo"\n}\n')
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', side_effect=['password1', 'password2'])
+    @patch('pocketbook.rpc.RpcClient', spec=RpcClient)
+    def test_transfer_collects_passwords(self, MockRpcClient, *args):
+        client = MockRpcClient.return_value.__enter__.return_value
+        client.call.return_value = {'digest': 'abc', 'status': 'executed'}
+
+        args = Mock()
+        args.socket = '/tmp/pocketbook.sock'
+        args.method = 'transfer'
+        args.params = ['destination=bar', 'amount=1.5', 'signers=["foo", "baz"]']
+
+        from pocketbook.commands.call import run_call
+        run_call(args)
+
+        client.call.assert_called_once_with('transfer', destination='bar', amount=1.5, signers=['foo', 'baz'],
+                                            passwords={'foo': 'password1', 'baz': 'password2'})
+
+    def test_invalid_params(self):
+        args = Mock()
+        args.socket = '/tmp/pocketbook.sock'
+        args.method = 'lookup'
+        args.params = ['foo']
+
+        from pocketbook.commands.call import run_call
+        with self.assertRaises(RuntimeError):
+            run_call(args)
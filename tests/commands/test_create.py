@@ -1,6 +1,6 @@
 import unittest
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 
 from fetchai.ledger.crypto import Entity
 
@@ -21,7 +21,7 @@ class CreateCommandTests(unittest.TestCase):
         MockEntity.is_strong_password.side_effect = [True]
 
         from pocketbook.commands.create import run_create
-        run_create(None)
+        run_create(Mock(count=None))
 
         key_store.add_key.assert_called_once_with('foo-bar', SUPER_SECURE_PASSWORD, entity)
 
@@ -37,7 +37,7 @@ class CreateCommandTests(unittest.TestCase):
         MockEntity.is_strong_password.side_effect = [True, True]
 
         from pocketbook.commands.create import run_create
-        run_create(None)
+        run_create(Mock(count=None))
 
         key_store.add_key.assert_called_once_with('foo-bar', SUPER_SECURE_PASSWORD, entity)
 
@@ -55,7 +55,7 @@ class CreateCommandTests(unittest.TestCase):
         MockEntity.is_strong_password.side_effect = [False, True]
 
         from pocketbook.commands.create import run_create
-        run_create(None)
+        run_create(Mock(count=None))
 
         key_store.add_key.assert_called_once_with('foo-bar', SUPER_SECURE_PASSWORD, entity)
 
@@ -73,8 +73,100 @@ class CreateCommandTests(unittest.TestCase):
         MockEntity.is_strong_password.side_effect = [True]
 
         from pocketbook.commands.create import run_create
-        run_create(None)
+        run_create(Mock(count=None))
 
         key_store.add_key.assert_called_once_with('foo-baz', SUPER_SECURE_PASSWORD, entity)
 
         self.assertIn('Key name already exists', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('fetchai.ledger.crypto.Entity', spec=Entity)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_bulk_create(self, MockKeyStore, MockEntity, output):
+        key_store = MockKeyStore()
+        key_store.has_key.return_value = False
+        key_store.stray_keys.return_value = []
+        MockEntity.is_strong_password.return_value = True
+
+        args = Mock()
+        args.count = 3
+        args.name_template = 'deposit-{:03}'
+        args.start = 7
+        args.password_file = None
+        args.password_env = 'POCKETBOOK_TEST_PASSWORD'
+        args.workers = 2
+
+        from pocketbook.commands.create import run_create
+        with patch.dict('os.environ', {'POCKETBOOK_TEST_PASSWORD': SUPER_SECURE_PASSWORD}):
+            run_create(args)
+
+        key_store.create_keys.assert_called_once_with(
+            ['deposit-007', 'deposit-008', 'deposit-009'], SUPER_SECURE_PASSWORD, workers=2)
+        self.assertIn('Created 3 keys (deposit-007 to deposit-009)', output.getvalue())
+
+    @patch('fetchai.ledger.crypto.Entity', spec=Entity)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_bulk_create_requires_placeholder(self, MockKeyStore, MockEntity):
+        args = Mock()
+        args.count = 2
+        args.name_template = 'deposit'
+        args.start = 1
+
+        from pocketbook.commands.create import run_create
+        with self.assertRaises(RuntimeError):
+            run_create(args)
+
+        MockKeyStore().create_keys.assert_not_called()
+
+    @patch('fetchai.ledger.crypto.Entity', spec=Entity)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_bulk_create_existing_names(self, MockKeyStore, MockEntity):
+        key_store = MockKeyStore()
+        key_store.has_key.side_effect = lambda name: name == 'key-2'
+
+        args = Mock()
+        args.count = 2
+        args.name_template = 'key-{}'
+        args.start = 1
+
+        from pocketbook.commands.create import run_create
+        with self.assertRaises(RuntimeError):
+            run_create(args)
+
+        key_store.create_keys.assert_not_called()
+
+    @patch('fetchai.ledger.crypto.Entity', spec=Entity)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_bulk_create_invalid_template(self, MockKeyStore, MockEntity):
+        for template in ('key-{name}', 'key-{1}', 'key-{:d'):
+            args = Mock()
+            args.count = 2
+            args.name_template = template
+            args.start = 1
+
+            from pocketbook.commands.create import run_create
+            with self.assertRaises(RuntimeError) as error_ctx:
+                run_create(args)
+            self.assertIn('Invalid name template: {}'.format(template), str(error_ctx.exception))
+
+        MockKeyStore().create_keys.assert_not_called()
+
+    @patch('fetchai.ledger.crypto.Entity', spec=Entity)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_bulk_create_stray_key_files(self, MockKeyStore, MockEntity):
+        key_store = MockKeyStore()
+        key_store.has_key.return_value = False
+        key_store.stray_keys.return_value = ['key-2']
+
+        args = Mock()
+        args.count = 2
+        args.name_template = 'key-{}'
+        args.start = 1
+
+        from pocketbook.commands.create import run_create
+        with self.assertRaises(RuntimeError) as error_ctx:
+            run_create(args)
+
+        self.assertIn('key-2', str(error_ctx.exception))
+        key_store.stray_keys.assert_called_once_with(['key-1', 'key-2'])
+        key_store.create_keys.assert_not_called()
@@ -0,0 +1,84 @@
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore
+from tests.utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class ExportCommandTests(unittest.TestCase):
+
+    def setup_stores(self, MockKeyStore, MockAddressBook):
+        key_store = MockKeyStore()
+        key_store.items.return_value = [('key1', 'key-address')]
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('addr1', SAMPLE_ADDRESS)]
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_csv_export(self, MockKeyStore, MockAddressBook, output):
+        self.setup_stores(MockKeyStore, MockAddressBook)
+
+        args = Mock()
+        args.path = '-'
+        args.format = None
+        args.addresses_only = False
+
+        from pocketbook.commands.export import run_export
+        run_export(args)
+
+        self.assertEqual(output.getvalue(),
+                         'name,type,address\nkey1,key,key-address\naddr1,addr,{}\n'.format(SAMPLE_ADDRESS))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_jsonl_addresses_only_export(self, MockKeyStore, MockAddressBook, output):
+        self.setup_stores(MockKeyStore, MockAddressBook)
+
+        args = Mock()
+        args.path = '-'
+        args.format = 'jsonl'
+        args.addresses_only = True
+
+        from pocketbook.commands.export import run_export
+        run_export(args)
+
+        self.assertEqual(output.getvalue(),
+                         '{{"name": "addr1", "type": "addr", "address": "{}"}}\n'.format(SAMPLE_ADDRESS))
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_export_can_be_imported(self, MockKeyStore, MockAddressBook, output):
+        self.setup_stores(MockKeyStore, MockAddressBook)
+        MockKeyStore().list_keys.return_value = []
+        MockAddressBook().keys.return_value = []
+
+        from pocketbook.commands.export import run_export
+        from pocketbook.commands.import_ import run_import
+        from pocketbook.formats import OUTPUT_FORMATS
+
+        for fmt in OUTPUT_FORMATS:
+            # with the format given explicitly and determined from the extension
+            for explicit in (True, False):
+                with self.subTest(fmt=fmt, explicit=explicit), TemporaryPocketBookRoot() as ctx:
+                    MockAddressBook().add.reset_mock()
+                    output.seek(0)
+                    output.truncate()
+
+                    args = Mock()
+                    args.path = os.path.join(ctx.root, 'export.{}'.format(fmt))
+                    args.format = fmt if explicit else None
+                    args.addresses_only = False
+                    run_export(args)
+
+                    args.format = None
+                    self.assertEqual(run_import(args), 0)
+
+                    self.assertEqual([(c[0][0], str(c[0][1])) for c in MockAddressBook().add.call_args_list],
+                                     [('addr1', SAMPLE_ADDRESS)])
+                    self.assertIn('Imported 1 addresses (0 duplicates, 1 keys skipped, 0 invalid)', output.getvalue())
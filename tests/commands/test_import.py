@@ -0,0 +1,84 @@
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore
+from tests.utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class ImportCommandTests(unittest.TestCase):
+
+    def run_import(self, contents, filename, MockKeyStore, MockAddressBook):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, filename)
+            with open(path, 'w') as input_file:
+                input_file.write(contents)
+
+            args = Mock()
+            args.path = path
+            args.format = None
+
+            from pocketbook.commands.import_ import run_import
+            return run_import(args)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_csv_import(self, MockKeyStore, MockAddressBook, output):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['key1']
+        address_book = MockAddressBook()
+        address_book.keys.return_value = ['existing']
+
+        contents = '\n'.join([
+            'name,type,address',
+            'foo,addr,{}'.format(SAMPLE_ADDRESS),
+            'key1,key,{}'.format(SAMPLE_ADDRESS),
+            'existing,addr,{}'.format(SAMPLE_ADDRESS),
+            'key1,addr,{}'.format(SAMPLE_ADDRESS),
+            'bar,addr,not-an-address',
+            'baz,addr,{}'.format(SAMPLE_ADDRESS),
+            'foo,addr,{}'.format(SAMPLE_ADDRESS),
+            ',addr,',
+        ]) + '\n'
+
+        exit_code = self.run_import(contents, 'sample.csv', MockKeyStore, MockAddressBook)
+        self.assertEqual(exit_code, 1)
+
+        # all the valid entries are added in a single batch
+        address_book.batch.assert_called_once_with()
+        self.assertEqual([(c[0][0], str(c[0][1])) for c in address_book.add.call_args_list],
+                         [('foo', SAMPLE_ADDRESS), ('baz', SAMPLE_ADDRESS)])
+
+        self.assertIn('Row 2: skipping key: key1', output.getvalue())
+        self.assertIn('Row 3: skipping duplicate name: existing', output.getvalue())
+        self.assertIn('Row 4: skipping duplicate name: key1', output.getvalue())
+        self.assertIn('Row 5: invalid entry: Unable to convert not-an-address', output.getvalue())
+        self.assertIn('Row 7: skipping duplicate name: foo', output.getvalue())
+        self.assertIn('Row 8: invalid entry: missing name or address', output.getvalue())
+        self.assertIn('Imported 2 addresses (3 duplicates, 1 keys skipped, 2 invalid)', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_jsonl_import(self, MockKeyStore, MockAddressBook, output):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = []
+        address_book = MockAddressBook()
+        address_book.keys.return_value = []
+
+        contents = '\n'.join([
+            '{{"name": "foo", "address": "{}"}}'.format(SAMPLE_ADDRESS),
+            '{"name": "bar", "addr',
+            '',
+            '{{"name": "baz", "address": "{}"}}'.format(SAMPLE_ADDRESS),
+        ]) + '\n'
+
+        exit_code = self.run_import(contents, 'sample.jsonl', MockKeyStore, MockAddressBook)
+        self.assertEqual(exit_code, 1)
+
+        self.assertEqual([c[0][0] for c in address_book.add.call_args_list], ['foo', 'baz'])
+        self.assertIn('Row 2: invalid entry: unable to parse row', output.getvalue())
+        self.assertIn('Imported 2 addresses (0 duplicates, 0 keys skipped, 1 invalid)', output.getvalue())
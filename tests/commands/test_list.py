@@ -1,11 +1,13 @@
+import json
 import unittest
 from io import StringIO
 from unittest.mock import patch, Mock, call
 
 from pocketbook.address_book import AddressBook
+from pocketbook.balance_cache import BalanceCache
 from pocketbook.key_store import KeyStore
 from pocketbook.table import Table
-from pocketbook.utils import create_api, get_balance, get_stake, token_amount
+from pocketbook.utils import canonical_token_amount, create_api, get_balance, get_stake
 from tests.utils import SAMPLE_ADDRESS
 
 
@@ -18,12 +20,17 @@ class ListCommandTests(unittest.TestCase):
         key_store = MockKeyStore()
         key_store.list_keys.return_value = []
 
+        args = Mock()
+        args.format = None
+        args.stream = False
+
         # run the command
         from pocketbook.commands.list import run_list
-        run_list(None)
+        run_list(args)
 
         self.assertIn('No keys present', output.getvalue())
 
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
     @patch('pocketbook.utils.get_stake', spec=get_stake)
     @patch('pocketbook.utils.get_balance', spec=get_balance)
     @patch('pocketbook.utils.create_api', spec=create_api)
@@ -39,8 +46,10 @@ class ListCommandTests(unittest.TestCase):
         address_book = MockAddressBook()
         address_book.items.return_value = [('other', 'another-address')]
 
-        mock_get_balance.side_effect = [10, 5]
-        mock_get_stake.side_effect = [5, 10]
+        balances = {SAMPLE_ADDRESS: 10, 'another-address': 5}
+        stakes = {SAMPLE_ADDRESS: 5, 'another-address': 10}
+        mock_get_balance.side_effect = lambda _, address: balances[address]
+        mock_get_stake.side_effect = lambda _, address: stakes[address]
 
         api = mock_create_api()
         mock_create_api.reset_mock()
@@ -48,7 +57,16 @@ class ListCommandTests(unittest.TestCase):
         args = Mock()
         args.verbose = False
         args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
         args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
 
         table = MockTable()
         MockTable.reset_mock()
@@ -61,17 +79,18 @@ class ListCommandTests(unittest.TestCase):
         mock_create_api.assert_called_once_with('bar-net')
         key_store.lookup_address.assert_called_once_with('sample')
 
-        self.assertEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
-        self.assertEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
+        self.assertCountEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
+        self.assertCountEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
 
         # check that we call the correct number of calls
         expected_row_calls = [
-            call(name='sample', type='key', balance=token_amount(10), stake=token_amount(5), address=SAMPLE_ADDRESS),
-            call(name='other', type='addr', balance=token_amount(5), stake=token_amount(10), address='another-address'),
+            call(name='sample', type='key', balance=canonical_token_amount(10), stake=canonical_token_amount(5), address=SAMPLE_ADDRESS),
+            call(name='other', type='addr', balance=canonical_token_amount(5), stake=canonical_token_amount(10), address='another-address'),
         ]
         self.assertEqual(table.add_row.call_args_list, expected_row_calls)
         table.display.assert_called_once_with()
 
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
     @patch('pocketbook.utils.get_stake', spec=get_stake)
     @patch('pocketbook.utils.get_balance', spec=get_balance)
     @patch('pocketbook.utils.create_api', spec=create_api)
@@ -87,8 +106,10 @@ class ListCommandTests(unittest.TestCase):
         address_book = MockAddressBook()
         address_book.items.return_value = [('other', 'another-address')]
 
-        mock_get_balance.side_effect = [10, 5]
-        mock_get_stake.side_effect = [5, 10]
+        balances = {SAMPLE_ADDRESS: 10, 'another-address': 5}
+        stakes = {SAMPLE_ADDRESS: 5, 'another-address': 10}
+        mock_get_balance.side_effect = lambda _, address: balances[address]
+        mock_get_stake.side_effect = lambda _, address: stakes[address]
 
         api = mock_create_api()
         mock_create_api.reset_mock()
@@ -96,7 +117,16 @@ class ListCommandTests(unittest.TestCase):
         args = Mock()
         args.verbose = True
         args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
         args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
 
         table = MockTable()
         MockTable.reset_mock()
@@ -109,18 +139,19 @@ class ListCommandTests(unittest.TestCase):
         mock_create_api.assert_called_once_with('bar-net')
         key_store.lookup_address.assert_called_once_with('sample')
 
-        self.assertEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
-        self.assertEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
+        self.assertCountEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
+        self.assertCountEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'another-address')])
 
         # check that we call the correct number of calls
         expected_row_calls = [
-            call(name='sample', type='key', balance=token_amount(10), stake=token_amount(5), address=SAMPLE_ADDRESS),
-            call(name='other', type='addr', balance=token_amount(5), stake=token_amount(10), address='another-address'),
+            call(name='sample', type='key', balance=canonical_token_amount(10), stake=canonical_token_amount(5), address=SAMPLE_ADDRESS),
+            call(name='other', type='addr', balance=canonical_token_amount(5), stake=canonical_token_amount(10), address='another-address'),
         ]
         self.assertEqual(table.add_row.call_args_list, expected_row_calls)
         table.display.assert_called_once_with()
 
 
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
     @patch('pocketbook.utils.get_stake', spec=get_stake)
     @patch('pocketbook.utils.get_balance', spec=get_balance)
     @patch('pocketbook.utils.create_api', spec=create_api)
@@ -136,8 +167,10 @@ class ListCommandTests(unittest.TestCase):
         address_book = MockAddressBook()
         address_book.items.return_value = [('sample2', 'address1'), ('other2', 'address2')]
 
-        mock_get_balance.side_effect = [10, 5]
-        mock_get_stake.side_effect = [5, 10]
+        balances = {SAMPLE_ADDRESS: 10, 'address1': 5}
+        stakes = {SAMPLE_ADDRESS: 5, 'address1': 10}
+        mock_get_balance.side_effect = lambda _, address: balances[address]
+        mock_get_stake.side_effect = lambda _, address: stakes[address]
 
         api = mock_create_api()
         mock_create_api.reset_mock()
@@ -145,7 +178,16 @@ class ListCommandTests(unittest.TestCase):
         args = Mock()
         args.verbose = False
         args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
         args.pattern = ['sample*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
 
         table = MockTable()
         MockTable.reset_mock()
@@ -158,13 +200,377 @@ class ListCommandTests(unittest.TestCase):
         mock_create_api.assert_called_once_with('bar-net')
         key_store.lookup_address.assert_called_once_with('sample1')
 
-        self.assertEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'address1')])
-        self.assertEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'address1')])
+        self.assertCountEqual(mock_get_balance.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'address1')])
+        self.assertCountEqual(mock_get_stake.call_args_list, [call(api, SAMPLE_ADDRESS), call(api, 'address1')])
 
         # check that we call the correct number of calls
         expected_row_calls = [
-            call(name='sample1', type='key', balance=token_amount(10), stake=token_amount(5), address=SAMPLE_ADDRESS),
-            call(name='sample2', type='addr', balance=token_amount(5), stake=token_amount(10), address='address1'),
+            call(name='sample1', type='key', balance=canonical_token_amount(10), stake=canonical_token_amount(5), address=SAMPLE_ADDRESS),
+            call(name='sample2', type='addr', balance=canonical_token_amount(5), stake=canonical_token_amount(10), address='address1'),
+        ]
+        self.assertEqual(table.add_row.call_args_list, expected_row_calls)
+        table.display.assert_called_once_with()
+
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.get_stake', spec=get_stake)
+    @patch('pocketbook.utils.get_balance', spec=get_balance)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.table.Table', spec=Table)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_failed_lookup_is_reported_inline(self, MockKeyStore, MockAddressBook, MockTable, mock_create_api,
+                                              mock_get_balance, mock_get_stake, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('other', 'another-address')]
+
+        def balance_lookup(_, address):
+            if address == SAMPLE_ADDRESS:
+                raise RuntimeError('timeout')
+            return 5
+
+        mock_get_balance.side_effect = balance_lookup
+        mock_get_stake.return_value = 10
+
+        args = Mock()
+        args.verbose = False
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
+
+        table = MockTable()
+        MockTable.reset_mock()
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        # the failure should not prevent the other rows from being displayed
+        expected_row_calls = [
+            call(name='sample', type='key', balance='Error: timeout', stake='', address=SAMPLE_ADDRESS),
+            call(name='other', type='addr', balance=canonical_token_amount(5), stake=canonical_token_amount(10), address='another-address'),
+        ]
+        self.assertEqual(table.add_row.call_args_list, expected_row_calls)
+        table.display.assert_called_once_with()
+
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.get_stake', spec=get_stake)
+    @patch('pocketbook.utils.get_balance', spec=get_balance)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.table.Table', spec=Table)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_cached_display(self, MockKeyStore, MockAddressBook, MockTable, mock_create_api, mock_get_balance,
+                            mock_get_stake, MockBalanceCache, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('other', 'another-address')]
+
+        # only the address book entry has a fresh cache entry
+        cache = MockBalanceCache()
+        cache.requires_refresh.return_value = True
+        cache.get.side_effect = lambda address, max_age: (5, 10) if address == 'another-address' else None
+
+        mock_get_balance.return_value = 10
+        mock_get_stake.return_value = 5
+
+        api = mock_create_api()
+        mock_create_api.reset_mock()
+
+        args = Mock()
+        args.verbose = False
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = True
+        args.max_age = 30
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
+
+        table = MockTable()
+        MockTable.reset_mock()
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        cache.requires_refresh.assert_called_once_with([SAMPLE_ADDRESS, 'another-address'], 30)
+        mock_create_api.assert_called_once_with('bar-net')
+
+        # only the stale entry is fetched from the network and updated in the cache
+        mock_get_balance.assert_called_once_with(api, SAMPLE_ADDRESS)
+        mock_get_stake.assert_called_once_with(api, SAMPLE_ADDRESS)
+        cache.put.assert_called_once_with(SAMPLE_ADDRESS, 10, 5)
+        cache.save.assert_called_once_with()
+
+        expected_row_calls = [
+            call(name='sample', type='key', balance=canonical_token_amount(10), stake=canonical_token_amount(5), address=SAMPLE_ADDRESS),
+            call(name='other', type='addr', balance=canonical_token_amount(5), stake=canonical_token_amount(10), address='another-address'),
+        ]
+        self.assertEqual(table.add_row.call_args_list, expected_row_calls)
+
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.table.Table', spec=Table)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_fully_cached_display_does_not_connect(self, MockKeyStore, MockAddressBook, MockTable, mock_create_api,
+                                                   MockBalanceCache, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = []
+
+        cache = MockBalanceCache()
+        cache.ttl = 60
+        cache.requires_refresh.return_value = False
+        cache.get.return_value = (10, 5)
+
+        args = Mock()
+        args.verbose = False
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = True
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = None
+
+        table = MockTable()
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        cache.requires_refresh.assert_called_once_with([SAMPLE_ADDRESS], 60)
+        mock_create_api.assert_not_called()
+        table.add_row.assert_called_once_with(name='sample', type='key', balance=canonical_token_amount(10),
+                                              stake=canonical_token_amount(5), address=SAMPLE_ADDRESS)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.get_stake', spec=get_stake)
+    @patch('pocketbook.utils.get_balance', spec=get_balance)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_jsonl_output(self, MockKeyStore, MockAddressBook, mock_create_api, mock_get_balance, mock_get_stake,
+                          MockBalanceCache, output, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('other', 'another-address'), ('alias', SAMPLE_ADDRESS)]
+
+        def get_balance(_, address):
+            if address == 'another-address':
+                raise RuntimeError('bad address')
+            return 100000000001
+
+        mock_get_balance.side_effect = get_balance
+        mock_get_stake.return_value = 5
+
+        cache = MockBalanceCache()
+        cache.requires_refresh.return_value = True
+
+        args = Mock()
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = 'jsonl'
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        records = sorted((json.loads(line) for line in output.getvalue().splitlines()), key=lambda r: r['name'])
+        self.assertEqual(records, [
+            {'name': 'alias', 'type': 'addr', 'address': SAMPLE_ADDRESS, 'balance': '10.0000000001',
+             'stake': '0.0000000005', 'error': None},
+            {'name': 'other', 'type': 'addr', 'address': 'another-address', 'balance': None, 'stake': None,
+             'error': 'bad address'},
+            {'name': 'sample', 'type': 'key', 'address': SAMPLE_ADDRESS, 'balance': '10.0000000001',
+             'stake': '0.0000000005', 'error': None},
+        ])
+
+        # each address is only queried once
+        self.assertEqual(mock_get_balance.call_count, 2)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_csv_output(self, MockKeyStore, MockAddressBook, mock_create_api, MockBalanceCache, output, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = []
+
+        cache = MockBalanceCache()
+        cache.ttl = 60
+        cache.requires_refresh.return_value = False
+        cache.get.return_value = (100000000000, 5)
+
+        args = Mock()
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = True
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = False
+        args.format = 'csv'
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        self.assertEqual(output.getvalue(), 'name,type,address,balance,stake,error\n'
+                                            'sample,key,{},10.0000000000,0.0000000005,\n'.format(SAMPLE_ADDRESS))
+        mock_create_api.assert_not_called()
+
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.get_stake', spec=get_stake)
+    @patch('pocketbook.utils.get_balance', spec=get_balance)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.table.Table', spec=Table)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_top_entries_with_total(self, MockKeyStore, MockAddressBook, MockTable, mock_create_api,
+                                    mock_get_balance, mock_get_stake, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('other', 'another-address'), ('third', 'third-address')]
+
+        balances = {SAMPLE_ADDRESS: 10, 'another-address': 50, 'third-address': 20}
+        mock_get_balance.side_effect = lambda _, address: balances[address]
+        mock_get_stake.return_value = 1
+
+        args = Mock()
+        args.verbose = False
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = True
+        args.group_by = None
+        args.sort = None
+        args.top = 2
+        args.stream = False
+        args.format = None
+
+        table = MockTable()
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        expected_row_calls = [
+            call(name='other', type='addr', balance=canonical_token_amount(50), stake=canonical_token_amount(1),
+                 address='another-address'),
+            call(name='third', type='addr', balance=canonical_token_amount(20), stake=canonical_token_amount(1),
+                 address='third-address'),
+            call(name='Total', type='total', balance=canonical_token_amount(80), stake=canonical_token_amount(3),
+                 address=''),
         ]
         self.assertEqual(table.add_row.call_args_list, expected_row_calls)
-        table.display.assert_called_once_with()
\ No newline at end of file
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.balance_cache.BalanceCache', spec=BalanceCache)
+    @patch('pocketbook.utils.get_stake', spec=get_stake)
+    @patch('pocketbook.utils.get_balance', spec=get_balance)
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_streamed_display(self, MockKeyStore, MockAddressBook, mock_create_api, mock_get_balance, mock_get_stake,
+                              MockBalanceCache, output, *args):
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = ['sample']
+        key_store.lookup_address.return_value = SAMPLE_ADDRESS
+
+        address_book = MockAddressBook()
+        address_book.items.return_value = [('other', 'another-address')]
+
+        balances = {SAMPLE_ADDRESS: 10, 'another-address': 5}
+        mock_get_balance.side_effect = lambda _, address: balances[address]
+        mock_get_stake.return_value = 1
+
+        cache = MockBalanceCache()
+        cache.requires_refresh.return_value = True
+
+        args = Mock()
+        args.verbose = True
+        args.network = 'bar-net'
+        args.concurrency = 4
+        args.cached = False
+        args.max_age = None
+        args.pattern = ['*']
+        args.sum = False
+        args.group_by = None
+        args.sort = None
+        args.top = None
+        args.stream = True
+        args.format = None
+
+        # run the command
+        from pocketbook.commands.list import run_list
+        run_list(args)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Name', lines[0])
+        self.assertEqual(sorted(SAMPLE_ADDRESS in line for line in lines[1:]), [False, True])
+        self.assertTrue(any(canonical_token_amount(5) in line and 'another-address' in line for line in lines[1:]))
+
+    def test_streaming_can_not_be_aggregated(self):
+        args = Mock()
+        args.stream = True
+        args.format = None
+        args.sum = True
+
+        from pocketbook.commands.list import run_list
+        with patch('pocketbook.key_store.KeyStore'), patch('pocketbook.address_book.AddressBook'):
+            with self.assertRaises(RuntimeError):
+                run_list(args)
@@ -0,0 +1,74 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock, MagicMock
+
+from pocketbook.pending import PendingStore
+from tests.utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class StatusCommandTests(unittest.TestCase):
+
+    def create_args(self, digests=None, once=False):
+        args = Mock()
+        args.network = 'super-duper-net'
+        args.digests = digests or []
+        args.concurrency = 2
+        args.once = once
+        args.max_wait = None
+        return args
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.utils.create_api')
+    def test_no_pending_transactions(self, mock_create_api, output):
+        with TemporaryPocketBookRoot() as ctx:
+            with patch('pocketbook.pending.PendingStore', side_effect=lambda: PendingStore(root=ctx.root)):
+                from pocketbook.commands.status import run_status
+                self.assertEqual(run_status(self.create_args()), 0)
+
+        mock_create_api.assert_not_called()
+        self.assertIn('No pending transactions', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.utils.create_api')
+    def test_completed_transactions_are_removed(self, mock_create_api, output):
+        api = MagicMock()
+        mock_create_api.return_value = api
+        api.tx.status.side_effect = lambda digest: {
+            'aa': Mock(status='Executed', successful=True, failed=False),
+            'bb': Mock(status='Pending', successful=False, failed=False),
+        }[digest]
+
+        with TemporaryPocketBookRoot() as ctx:
+            store = PendingStore(root=ctx.root)
+            store.add('aa', 'super-duper-net', destination=SAMPLE_ADDRESS)
+            store.add('bb', 'super-duper-net', destination=SAMPLE_ADDRESS)
+            store.add('cc', 'other-net', destination=SAMPLE_ADDRESS)
+
+            with patch('pocketbook.pending.PendingStore', side_effect=lambda: PendingStore(root=ctx.root)):
+                from pocketbook.commands.status import run_status
+                self.assertEqual(run_status(self.create_args(once=True)), 0)
+
+            self.assertEqual([digest for digest, _ in store.items()], ['bb', 'cc'])
+
+        self.assertEqual(api.tx.status.call_count, 2)
+        self.assertIn('1 executed, 0 failed, 1 pending', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('pocketbook.utils.create_api')
+    def test_failed_transaction(self, mock_create_api, output):
+        api = MagicMock()
+        mock_create_api.return_value = api
+        api.tx.status.return_value = Mock(status='Invalid', successful=False, failed=True)
+
+        with TemporaryPocketBookRoot() as ctx:
+            store = PendingStore(root=ctx.root)
+            store.add('aa', 'super-duper-net')
+            store.add('bb', 'super-duper-net')
+
+            with patch('pocketbook.pending.PendingStore', side_effect=lambda: PendingStore(root=ctx.root)):
+                from pocketbook.commands.status import run_status
+                self.assertEqual(run_status(self.create_args(digests=['0xaa'])), 1)
+
+            self.assertEqual([digest for digest, _ in store.items()], ['bb'])
+
+        api.tx.status.assert_called_once_with('aa')
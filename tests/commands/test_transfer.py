@@ -1,4 +1,6 @@
+import json
 import unittest
+from io import StringIO
 from unittest.mock import patch, Mock, MagicMock
 
 from fetchai.ledger.api.token import TokenTxFactory
@@ -31,14 +33,18 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
         key_store.load_key.return_value = person1.entity
 
         address_book = MockAddressBook()
         address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
         address_book.lookup_address.return_value = person2.address
 
         api = MagicMock()
         mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
         api.submit_signed_tx.side_effect = ['0xTransactionHexId']
 
         # setup tx and tx factory
@@ -51,6 +57,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = [person1.name]
         args.from_address = None
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         from pocketbook.commands.transfer import run_transfer
@@ -84,14 +92,18 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.side_effect = [[person1.name, person2.name]]
+        key_store.has_key.side_effect = lambda name: name in [person1.name, person2.name]
         key_store.load_key.side_effect = [person1.entity, person2.entity]
         key_store.lookup_address.side_effect = [person2.address]
 
         address_book = MockAddressBook()
         address_book.keys.return_value = []
+        address_book.has_address.side_effect = lambda name: name in []
 
         api = MagicMock()
         mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
         api.submit_signed_tx.side_effect = ['0xTransactionHexId']
 
         # setup tx and tx factory
@@ -104,6 +116,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 2
         args.signers = [person1.name]
         args.from_address = None
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         from pocketbook.commands.transfer import run_transfer
@@ -138,14 +152,19 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = [person1.name, person2.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name, person2.name]
         key_store.load_key.side_effect = [person1.entity]
         key_store.lookup_address.return_value = None
+        key_store.lookup_name.return_value = None
 
         address_book = MockAddressBook()
         address_book.keys.return_value = []
+        address_book.has_address.side_effect = lambda name: name in []
 
         api = MagicMock()
         mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
         api.submit_signed_tx.side_effect = ['0xTransactionHexId']
 
         # setup tx and tx factory
@@ -158,6 +177,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = [person1.name]
         args.from_address = None
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         from pocketbook.commands.transfer import run_transfer
@@ -192,15 +213,19 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = [person1.name, person2.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name, person2.name]
         key_store.load_key.side_effect = [person1.entity]
         key_store.lookup_address.return_value = person2.address
 
         address_book = MockAddressBook()
         address_book.keys.return_value = [multisig.name]
+        address_book.has_address.side_effect = lambda name: name in [multisig.name]
         address_book.lookup_address.return_value = multisig.address
 
         api = MagicMock()
         mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
         api.submit_signed_tx.side_effect = ['0xTransactionHexId']
 
         # setup tx and tx factory
@@ -213,6 +238,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = [person1.name]
         args.from_address = multisig.name
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         from pocketbook.commands.transfer import run_transfer
@@ -249,11 +276,13 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = []
+        key_store.has_key.side_effect = lambda name: name in []
         key_store.load_key.side_effect = [person1.entity]
         key_store.lookup_address.return_value = person2.address
 
         address_book = MockAddressBook()
         address_book.keys.return_value = [person1.name, person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person1.name, person2.name]
         address_book.lookup_address.return_value = person2.address
 
         args = Mock()
@@ -262,6 +291,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = [person1.name]
         args.from_address = person2.name
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         with self.assertRaises(RuntimeError):
@@ -284,11 +315,13 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
         key_store.load_key.side_effect = [person1.entity]
         key_store.lookup_address.return_value = person2.address
 
         address_book = MockAddressBook()
         address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
         address_book.lookup_address.return_value = person2.address
 
         args = Mock()
@@ -297,6 +330,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = [person1.name]
         args.from_address = 'some-one-missing'
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         with self.assertRaises(RuntimeError):
@@ -319,11 +354,13 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         key_store = MockKeyStore()
         key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
         key_store.load_key.side_effect = [person1.entity]
         key_store.lookup_address.return_value = person2.address
 
         address_book = MockAddressBook()
         address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
         address_book.lookup_address.return_value = person2.address
 
         args = Mock()
@@ -332,6 +369,8 @@ class TransferCommandUnitTests(unittest.TestCase):
         args.charge_rate = 1
         args.signers = []
         args.from_address = 'some-one-missing'
+        args.no_wait = False
+        args.format = None
         args.network = 'super-duper-net'
 
         with self.assertRaises(RuntimeError):
@@ -340,3 +379,163 @@ class TransferCommandUnitTests(unittest.TestCase):
 
         # mock_create_api.assert_called_once_with('super-duper-net')
         address_book.lookup_address.assert_called_once_with(person2.name)
+
+    @patch('getpass.getpass', side_effect=['weak-password'])
+    @patch('builtins.input', return_value='')
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('fetchai.ledger.api.token.TokenTxFactory', spec=TokenTxFactory)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_error_when_insufficient_funds(self, MockKeyStore, MockAddressBook, MockTxFactory, mock_create_api,
+                                           *args):
+        person1 = Person('Jane')
+        person2 = Person('Clare')
+
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
+        key_store.load_key.return_value = person1.entity
+
+        address_book = MockAddressBook()
+        address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
+        address_book.lookup_address.return_value = person2.address
+
+        api = MagicMock()
+        mock_create_api.return_value = api
+        api.tokens.balance.return_value = 10000000000
+        api.tokens.stake.return_value = 0
+
+        args = Mock()
+        args.destination = person2.name
+        args.amount = 20000000000
+        args.charge_rate = 1
+        args.signers = [person1.name]
+        args.from_address = None
+        args.no_wait = False
+        args.format = None
+        args.network = 'super-duper-net'
+
+        with self.assertRaises(RuntimeError):
+            from pocketbook.commands.transfer import run_transfer
+            run_transfer(args)
+
+        api.tokens.balance.assert_called_once_with(person1.address)
+        api.tokens.stake.assert_not_called()
+        MockTxFactory.transfer.assert_not_called()
+        api.submit_signed_tx.assert_not_called()
+
+    @patch('getpass.getpass', side_effect=['weak-password'])
+    @patch('builtins.input', return_value='')
+    @patch('pocketbook.pending.PendingStore')
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('fetchai.ledger.api.token.TokenTxFactory', spec=TokenTxFactory)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_transfer_without_waiting(self, MockKeyStore, MockAddressBook, MockTxFactory, mock_create_api,
+                                      MockPendingStore, *args):
+        person1 = Person('Jane')
+        person2 = Person('Clare')
+
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
+        key_store.load_key.return_value = person1.entity
+
+        address_book = MockAddressBook()
+        address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
+        address_book.lookup_address.return_value = person2.address
+
+        api = MagicMock()
+        mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
+        api.submit_signed_tx.side_effect = ['0xTransactionHexId']
+
+        tx = MagicMock()
+        MockTxFactory.transfer.side_effect = [tx]
+
+        args = Mock()
+        args.destination = person2.name
+        args.amount = 20000000000
+        args.charge_rate = 1
+        args.signers = [person1.name]
+        args.from_address = None
+        args.no_wait = True
+        args.format = None
+        args.network = 'super-duper-net'
+
+        from pocketbook.commands.transfer import run_transfer
+        run_transfer(args)
+
+        # the transaction is recorded rather than waited for
+        api.submit_signed_tx.assert_called_once_with(tx)
+        api.sync.assert_not_called()
+        MockPendingStore.return_value.add.assert_called_once_with(
+            '0xTransactionHexId', 'super-duper-net', **{
+                'from': person1.name,
+                'destination': str(person2.address),
+                'amount': 20000000000,
+            })
+
+    @patch('sys.stderr', new_callable=StringIO)
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', side_effect=['weak-password'])
+    @patch('builtins.input', return_value='')
+    @patch('pocketbook.utils.create_api', spec=create_api)
+    @patch('fetchai.ledger.api.token.TokenTxFactory', spec=TokenTxFactory)
+    @patch('pocketbook.address_book.AddressBook', spec=AddressBook)
+    @patch('pocketbook.key_store.KeyStore', spec=KeyStore)
+    def test_transfer_json_output(self, MockKeyStore, MockAddressBook, MockTxFactory, mock_create_api, mock_input,
+                                  mock_getpass, output, errors):
+        person1 = Person('Jane')
+        person2 = Person('Clare')
+
+        key_store = MockKeyStore()
+        key_store.list_keys.return_value = [person1.name]
+        key_store.has_key.side_effect = lambda name: name in [person1.name]
+        key_store.load_key.return_value = person1.entity
+
+        address_book = MockAddressBook()
+        address_book.keys.return_value = [person2.name]
+        address_book.has_address.side_effect = lambda name: name in [person2.name]
+        address_book.lookup_address.return_value = person2.address
+
+        api = MagicMock()
+        mock_create_api.return_value = api
+        api.tokens.balance.return_value = 100000000000
+        api.tokens.stake.return_value = 0
+        api.submit_signed_tx.side_effect = ['TransactionHexId']
+
+        tx = MagicMock()
+        MockTxFactory.transfer.side_effect = [tx]
+
+        args = Mock()
+        args.destination = person2.name
+        args.amount = 20000000000
+        args.charge_rate = 1
+        args.signers = [person1.name]
+        args.from_address = None
+        args.no_wait = False
+        args.format = 'json'
+        args.network = 'super-duper-net'
+
+        from pocketbook.commands.transfer import run_transfer
+        run_transfer(args)
+
+        # only the transfer record is written to stdout, the summary and prompt are moved to stderr
+        self.assertEqual(json.loads(output.getvalue()), [{
+            'network': 'super-duper-net',
+            'from': str(person1.address),
+            'destination': str(person2.address),
+            'amount': '2.0000000000',
+            'fee': '0.0000000001',
+            'total': '2.0000000001',
+            'digest': '0xTransactionHexId',
+            'status': 'executed',
+        }])
+        self.assertIn('Network....: super-duper-net', errors.getvalue())
+        self.assertIn('Press enter to continue', errors.getvalue())
+        mock_input.assert_called_once_with()
+        api.sync.assert_called_once_with('TransactionHexId')
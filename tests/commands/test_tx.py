@@ -0,0 +1,163 @@
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch, Mock, MagicMock
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore
+from pocketbook.pending import PendingStore
+from pocketbook.tx_file import read_tx_file
+from tests.utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class TxCommandTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = TemporaryPocketBookRoot()
+        self.ctx.__enter__()
+        self.addCleanup(self.ctx.__exit__, None, None, None)
+
+        self.entity = Entity()
+        KeyStore(root=self.ctx.root).add_key('payer', SUPER_SECURE_PASSWORD, self.entity)
+        AddressBook(root=self.ctx.root).add('alice', SAMPLE_ADDRESS)
+
+        # redirect the default stores to the temporary root
+        for target, cls in (('pocketbook.key_store.KeyStore', KeyStore),
+                            ('pocketbook.address_book.AddressBook', AddressBook),
+                            ('pocketbook.pending.PendingStore', PendingStore)):
+            patcher = patch(target, side_effect=lambda cls=cls: cls(root=self.ctx.root))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.api = MagicMock()
+        self.api.tokens.current_block_number.return_value = 1000
+        self.api.submit_signed_tx.side_effect = lambda tx: 'digest-{}'.format(sum(tx.transfers.values()))
+        self.api.tx.status.return_value = Mock(status='Executed', successful=True, failed=False)
+
+        patcher = patch('pocketbook.utils.create_api', return_value=self.api)
+        self.mock_create_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.tx_path = os.path.join(self.ctx.root, 'transfers.tx')
+
+    def run_tx(self, action, **kwargs):
+        args = Mock()
+        args.tx_action = action
+        args.network = 'super-duper-net'
+        for name, value in kwargs.items():
+            setattr(args, name, value)
+
+        from pocketbook.commands.tx import run_tx
+        return run_tx(args)
+
+    def build(self, valid_from=None):
+        payouts_path = os.path.join(self.ctx.root, 'payouts.csv')
+        with open(payouts_path, 'w') as payouts_file:
+            payouts_file.write('destination,amount\nalice,1\n{},2\n'.format(SAMPLE_ADDRESS))
+
+        return self.run_tx('build', output=self.tx_path, payouts=payouts_path, format=None, destination=None,
+                           amount=None, from_address=None, charge_rate=1, valid_from=valid_from,
+                           validity_period=100, signers=['payer'])
+
+    def sign(self):
+        return self.run_tx('sign', input=self.tx_path, output=None, workers=None, yes=True, signers=['payer'])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_build_offline(self, output):
+        self.build(valid_from=500)
+        self.mock_create_api.assert_not_called()
+
+        network, transactions = read_tx_file(self.tx_path)
+        self.assertEqual(network, 'super-duper-net')
+        self.assertEqual(len(transactions), 2)
+        for tx, amount in zip(transactions, (10000000000, 20000000000)):
+            self.assertEqual(tx.from_address, Address(self.entity))
+            self.assertEqual(tx.transfers, {Address(SAMPLE_ADDRESS): amount})
+            self.assertEqual((tx.valid_from, tx.valid_until), (500, 600))
+            self.assertTrue(tx.is_incomplete)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_build_sign_and_broadcast(self, mock_getpass, output):
+        self.build()
+        self.api.tokens.current_block_number.assert_called_once_with()
+
+        # signing happens without any network access
+        self.mock_create_api.reset_mock()
+        self.sign()
+        self.mock_create_api.assert_not_called()
+        mock_getpass.assert_called_once()
+
+        _, transactions = read_tx_file(self.tx_path)
+        for tx in transactions:
+            self.assertFalse(tx.is_incomplete)
+            self.assertTrue(tx.is_valid())
+
+        exit_code = self.run_tx('broadcast', input=self.tx_path, concurrency=2, no_wait=False, timeout=120)
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(self.api.submit_signed_tx.call_count, 2)
+        self.assertIn('2 executed, 0 failed or unconfirmed', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_broadcast_without_waiting(self, mock_getpass, output):
+        self.build()
+        self.sign()
+
+        self.assertEqual(self.run_tx('broadcast', input=self.tx_path, concurrency=2, no_wait=True), 0)
+        self.api.tx.status.assert_not_called()
+
+        pending = PendingStore(root=self.ctx.root).items()
+        self.assertEqual(sorted(digest for digest, _ in pending), ['digest-10000000000', 'digest-20000000000'])
+
+        # the from account is recorded by name, as it is for the transfer command
+        self.assertEqual({details['from'] for _, details in pending}, {'payer'})
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_broadcast_wait_times_out(self, mock_getpass, output):
+        self.build()
+        self.sign()
+
+        self.api.tx.status.return_value = Mock(status='Pending', successful=False, failed=False)
+        with patch('pocketbook.pending.time.sleep'), \
+                patch('pocketbook.pending.time.monotonic', side_effect=[0.0, 0.0, 60.0, 121.0]):
+            exit_code = self.run_tx('broadcast', input=self.tx_path, concurrency=2, no_wait=False, timeout=120)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn('TX: 0xdigest-10000000000 unconfirmed after 120s', output.getvalue())
+        self.assertIn('TX: 0xdigest-20000000000 unconfirmed after 120s', output.getvalue())
+        self.assertIn('0 executed, 2 failed or unconfirmed', output.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_unsigned_transactions_are_not_broadcast(self, output):
+        self.build()
+
+        with self.assertRaises(RuntimeError):
+            self.run_tx('broadcast', input=self.tx_path, concurrency=2, no_wait=False, timeout=120)
+        self.api.submit_signed_tx.assert_not_called()
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_expired_transactions_are_not_broadcast(self, mock_getpass, output):
+        self.build()
+        self.sign()
+
+        self.api.tokens.current_block_number.return_value = 1100
+        with self.assertRaises(RuntimeError):
+            self.run_tx('broadcast', input=self.tx_path, concurrency=2, no_wait=False, timeout=120)
+        self.api.submit_signed_tx.assert_not_called()
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_broadcast_to_wrong_network(self, output):
+        self.build()
+        self.mock_create_api.reset_mock()
+
+        args = Mock(tx_action='broadcast', network='other-net', input=self.tx_path, concurrency=2, no_wait=False,
+                    timeout=120)
+        with self.assertRaises(RuntimeError):
+            from pocketbook.commands.tx import run_tx
+            run_tx(args)
+        self.mock_create_api.assert_not_called()
@@ -45,6 +45,8 @@ class AddressBookTests(unittest.TestCase):
 
             self.assertIn('sample', address_book.keys())
             self.assertNotIn('foo', address_book.keys())
+            self.assertTrue(address_book.has_address('sample'))
+            self.assertFalse(address_book.has_address('foo'))
 
     def test_get_items(self):
         with TemporaryPocketBookRoot() as ctx:
@@ -0,0 +1,132 @@
+import base64
+import os
+import threading
+import unittest
+from unittest.mock import patch, Mock
+
+from fetchai.ledger.crypto import Entity, Address, Identity
+
+from pocketbook.agent import KeyAgent, RemoteSigner, unseal_keys
+from pocketbook.key_store import KeyStore
+from pocketbook.rpc import RpcServer, RpcClient
+from pocketbook.transactions import build_transfer
+from .utils import FakeClock, TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class KeyAgentTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ctx = TemporaryPocketBookRoot()
+        self.ctx.__enter__()
+        self.addCleanup(self.ctx.__exit__, None, None, None)
+
+        self.entity = Entity()
+        KeyStore(root=self.ctx.root).add_key('key1', SUPER_SECURE_PASSWORD, self.entity)
+
+        self.clock = FakeClock()
+        self.agent = KeyAgent(root=self.ctx.root, idle_timeout=60, clock=self.clock)
+
+    def start_server(self):
+        server = RpcServer(os.path.join(self.ctx.root, 'agent.sock'), self.agent.methods())
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        return server.socket_path
+
+    def test_unlock_and_sign(self):
+        self.assertIsNone(self.agent.identity('key1'))
+        self.assertEqual(self.agent.unlock('key1', SUPER_SECURE_PASSWORD), str(Address(self.entity)))
+        self.assertEqual(self.agent.identity('key1'), self.entity.public_key)
+
+        signature = self.agent.sign('key1', base64.b64encode(b'payload').decode())
+        self.assertTrue(self.entity.verify(b'payload', base64.b64decode(signature)))
+
+    def test_bad_password(self):
+        with self.assertRaises(Exception):
+            self.agent.unlock('key1', 'not-the-password')
+        self.assertEqual(self.agent.list(), [])
+
+    def test_lock(self):
+        self.agent.unlock('key1', SUPER_SECURE_PASSWORD)
+        self.assertEqual(self.agent.lock(['key1', 'unknown']), ['key1'])
+        self.assertIsNone(self.agent.identity('key1'))
+
+        with self.assertRaises(RuntimeError):
+            self.agent.sign('key1', base64.b64encode(b'payload').decode())
+
+    def test_idle_timeout(self):
+        self.agent.unlock('key1', SUPER_SECURE_PASSWORD)
+
+        # using the key resets the idle timer
+        self.clock.now = 50
+        self.assertIsNotNone(self.agent.identity('key1'))
+        self.clock.now = 100
+        self.assertEqual(self.agent.list(), [{'name': 'key1', 'address': str(Address(self.entity)), 'idle': 50}])
+
+        self.clock.now = 111
+        self.assertEqual(self.agent.expire(), ['key1'])
+        self.assertEqual(self.agent.list(), [])
+
+    def test_remote_signing(self):
+        self.agent.unlock('key1', SUPER_SECURE_PASSWORD)
+        socket_path = self.start_server()
+
+        with RpcClient(socket_path) as client:
+            public_key = client.call('identity', name='key1')
+
+        signer = RemoteSigner(socket_path, 'key1', public_key)
+        self.assertEqual(Address(signer), Address(self.entity))
+
+        # a transaction signed through the agent is valid
+        tx = build_transfer(Address(signer), Address(SAMPLE_ADDRESS), 100, 1, [signer])
+        tx.sign(signer)
+        self.assertTrue(tx.is_valid())
+
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_unseal_keys_prefers_the_agent(self, mock_getpass):
+        other = Entity()
+        key_store = KeyStore(root=self.ctx.root)
+        key_store.add_key('key2', SUPER_SECURE_PASSWORD, other)
+
+        self.agent.unlock('key1', SUPER_SECURE_PASSWORD)
+        socket_path = self.start_server()
+
+        signers = unseal_keys(key_store, ['key2', 'key1'], socket_path=socket_path)
+        self.assertEqual(list(signers.keys()), ['key2', 'key1'])
+        self.assertIsInstance(signers['key1'], RemoteSigner)
+        self.assertIsInstance(signers['key2'], Entity)
+        self.assertEqual(Identity(signers['key2']), Identity(other))
+        mock_getpass.assert_called_once()
+
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_unseal_keys_ignores_a_different_agent_key(self, mock_getpass):
+        self.agent.unlock('key1', SUPER_SECURE_PASSWORD)
+        socket_path = self.start_server()
+
+        # the key store of the agent is not the same as the one being used
+        with TemporaryPocketBookRoot() as other_ctx:
+            key_store = KeyStore(root=other_ctx.root)
+            other = Entity()
+            key_store.add_key('key1', SUPER_SECURE_PASSWORD, other)
+
+            with patch('sys.stderr'):
+                signers = unseal_keys(key_store, ['key1'], socket_path=socket_path)
+
+        self.assertIsInstance(signers['key1'], Entity)
+        self.assertEqual(Identity(signers['key1']), Identity(other))
+        mock_getpass.assert_called_once()
+
+    @patch('getpass.getpass', return_value=SUPER_SECURE_PASSWORD)
+    def test_unseal_keys_without_agent(self, mock_getpass):
+        key_store = Mock()
+        key_store.load_key.return_value = self.entity
+
+        signers = unseal_keys(key_store, ['key1'], socket_path=os.path.join(self.ctx.root, 'missing.sock'))
+        self.assertEqual(signers, {'key1': self.entity})
+        key_store.load_key.assert_called_once_with('key1', SUPER_SECURE_PASSWORD)
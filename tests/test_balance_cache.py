@@ -0,0 +1,79 @@
+import os
+import unittest
+
+from pocketbook.balance_cache import BalanceCache
+from .utils import FakeClock, TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class BalanceCacheTests(unittest.TestCase):
+
+    def test_no_writing_without_updates(self):
+        with TemporaryPocketBookRoot() as ctx:
+            cache = BalanceCache('mainnet', root=ctx.root)
+            cache.save()
+            self.assertEqual(len(os.listdir(ctx.root)), 0)
+
+    def test_entries_are_persisted(self):
+        with TemporaryPocketBookRoot() as ctx:
+            clock = FakeClock(1000.0)
+            cache = BalanceCache('mainnet', root=ctx.root, clock=clock)
+            cache.put(SAMPLE_ADDRESS, 11520000000000000001, 20000000000)
+            cache.save()
+
+            self.assertTrue(os.path.isfile(os.path.join(ctx.root, BalanceCache.CACHE_FILE_NAME)))
+
+            recovered = BalanceCache('mainnet', root=ctx.root, clock=clock)
+            self.assertEqual(recovered.get(SAMPLE_ADDRESS), (11520000000000000001, 20000000000))
+
+    def test_legacy_float_entries_are_ignored(self):
+        with TemporaryPocketBookRoot() as ctx:
+            cache = BalanceCache('mainnet', root=ctx.root)
+            cache.put(SAMPLE_ADDRESS, 10.5, 2.0)
+            self.assertIsNone(cache.get(SAMPLE_ADDRESS))
+
+    def test_entries_are_per_network(self):
+        with TemporaryPocketBookRoot() as ctx:
+            cache = BalanceCache('mainnet', root=ctx.root)
+            cache.put(SAMPLE_ADDRESS, 10, 2)
+            cache.save()
+
+            other = BalanceCache('testnet', root=ctx.root)
+            self.assertIsNone(other.get(SAMPLE_ADDRESS))
+
+    def test_stale_entries(self):
+        with TemporaryPocketBookRoot() as ctx:
+            clock = FakeClock(1000.0)
+            cache = BalanceCache('mainnet', root=ctx.root, ttl=60, clock=clock)
+            cache.put(SAMPLE_ADDRESS, 10, 2)
+
+            clock.now += 30
+            self.assertEqual(cache.get(SAMPLE_ADDRESS), (10, 2))
+            self.assertIsNone(cache.get(SAMPLE_ADDRESS, max_age=10))
+            self.assertFalse(cache.requires_refresh([SAMPLE_ADDRESS], 60))
+            self.assertTrue(cache.requires_refresh([SAMPLE_ADDRESS], None))
+
+            clock.now += 31
+            self.assertIsNone(cache.get(SAMPLE_ADDRESS))
+            self.assertTrue(cache.requires_refresh([SAMPLE_ADDRESS], 60))
+
+    def test_oldest_entries_are_evicted(self):
+        with TemporaryPocketBookRoot() as ctx:
+            clock = FakeClock(1000.0)
+            cache = BalanceCache('mainnet', root=ctx.root, max_entries=2, clock=clock)
+            for n in range(4):
+                cache.put('address{}'.format(n), n, n, timestamp=clock.now + n)
+            cache.save()
+
+            recovered = BalanceCache('mainnet', root=ctx.root, clock=clock)
+            self.assertIsNone(recovered.get('address0'))
+            self.assertIsNone(recovered.get('address1'))
+            self.assertEqual(recovered.get('address2'), (2, 2))
+            self.assertEqual(recovered.get('address3'), (3, 3))
+
+    def test_damaged_cache_is_ignored(self):
+        with TemporaryPocketBookRoot() as ctx:
+            with open(os.path.join(ctx.root, BalanceCache.CACHE_FILE_NAME), 'w') as cache_file:
+                cache_file.write('[[[ not toml')
+
+            cache = BalanceCache('mainnet', root=ctx.root)
+            self.assertIsNone(cache.get(SAMPLE_ADDRESS))
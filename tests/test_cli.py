@@ -0,0 +1,14 @@
+import subprocess
+import sys
+import unittest
+
+
+class CliImportTests(unittest.TestCase):
+
+    def test_cli_does_not_import_sdk(self):
+        # the ledger SDK (and its crypto dependencies) should only be loaded by the commands that need it
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, pocketbook.cli; print(any(m.startswith("fetchai") for m in sys.modules))'
+        ])
+        self.assertEqual(output.decode().strip(), 'False')
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch, MagicMock, call
+
+from pocketbook.connection import ConnectionManager, EndpointCache, shared_session
+from .utils import FakeClock, TemporaryPocketBookRoot
+
+
+class EndpointCacheTests(unittest.TestCase):
+
+    def test_expiry(self):
+        with TemporaryPocketBookRoot() as ctx:
+            clock = FakeClock(1000.0)
+            cache = EndpointCache(root=ctx.root, ttl=60, clock=clock)
+            self.assertIsNone(cache.get('mainnet'))
+
+            cache.put('mainnet', 'https://foo.bar', 443)
+            self.assertEqual(EndpointCache(root=ctx.root, clock=clock).get('mainnet'), ('https://foo.bar', 443))
+
+            clock.now += 61
+            self.assertIsNone(cache.get('mainnet'))
+
+    def test_invalidate(self):
+        with TemporaryPocketBookRoot() as ctx:
+            cache = EndpointCache(root=ctx.root)
+            cache.put('mainnet', 'https://foo.bar', 443)
+            cache.put('testnet', 'https://foo.baz', 443)
+
+            cache.invalidate('mainnet')
+            self.assertIsNone(cache.get('mainnet'))
+            self.assertEqual(cache.get('testnet'), ('https://foo.baz', 443))
+
+
+class ConnectionManagerTests(unittest.TestCase):
+
+    @patch('fetchai.ledger.api.bootstrap.server_from_name', return_value=('https://foo.bar', 443))
+    def test_resolve_is_cached(self, mock_server_from_name):
+        with TemporaryPocketBookRoot() as ctx:
+            self.assertEqual(ConnectionManager(root=ctx.root).resolve('mainnet'), ('https://foo.bar', 443))
+            self.assertEqual(ConnectionManager(root=ctx.root).resolve('mainnet'), ('https://foo.bar', 443))
+            mock_server_from_name.assert_called_once_with('mainnet')
+
+            self.assertEqual(ConnectionManager(root=ctx.root).resolve('local'), ('127.0.0.1', 8000))
+
+    @patch('fetchai.ledger.api.bootstrap.server_from_name', return_value=('https://new.host', 443))
+    @patch('fetchai.ledger.api.LedgerApi')
+    def test_stale_endpoint_is_refreshed(self, MockLedgerApi, mock_server_from_name):
+        with TemporaryPocketBookRoot() as ctx:
+            EndpointCache(root=ctx.root).put('mainnet', 'https://old.host', 443)
+            MockLedgerApi.side_effect = [RuntimeError('connection refused'), MagicMock()]
+
+            ConnectionManager(root=ctx.root).create('mainnet')
+
+            self.assertEqual(MockLedgerApi.call_args_list, [call('https://old.host', 443),
+                                                            call('https://new.host', 443)])
+            self.assertEqual(EndpointCache(root=ctx.root).get('mainnet'), ('https://new.host', 443))
+
+    @patch('fetchai.ledger.api.LedgerApi')
+    def test_endpoints_share_a_session(self, MockLedgerApi):
+        with TemporaryPocketBookRoot() as ctx:
+            api = ConnectionManager(root=ctx.root, pool_size=4, timeout=5).create('local')
+
+            session = api.tokens._session
+            for endpoint in (api.contracts, api.tx, api.server):
+                self.assertIs(endpoint._session, session)
+
+            adapter = session.get_adapter('https://foo.bar')
+            self.assertEqual(adapter._pool_maxsize, 4)
+
+            with patch('requests.adapters.HTTPAdapter.send') as mock_send:
+                adapter.send(MagicMock(), timeout=None)
+                self.assertEqual(mock_send.call_args[1]['timeout'], 5)
+
+    @patch('fetchai.ledger.api.LedgerApi')
+    def test_session_is_shared_by_the_process(self, MockLedgerApi):
+        with TemporaryPocketBookRoot() as ctx:
+            first = ConnectionManager(root=ctx.root, pool_size=4, timeout=5).create('local')
+            second = ConnectionManager(root=ctx.root, pool_size=4, timeout=5).create('local')
+
+            self.assertIs(first.tokens._session, second.tokens._session)
+            self.assertIs(first.tokens._session, shared_session(4, 5))
+
+    def test_version_check_uses_the_shared_session(self):
+        from fetchai.ledger.api import ServerApi, common
+
+        sessions = []
+
+        def version(server):
+            sessions.append(server._session)
+            return '1.0.0'
+
+        original = common.requests
+        with TemporaryPocketBookRoot() as ctx, patch.object(ServerApi, 'version', autospec=True, side_effect=version):
+            api = ConnectionManager(root=ctx.root, pool_size=4, timeout=5).create('local')
+
+        session = shared_session(4, 5)
+        self.assertEqual(sessions, [session])
+        for endpoint in (api.tokens, api.contracts, api.tx, api.server):
+            self.assertIs(endpoint._session, session)
+
+        # the SDK is restored once the API has been created
+        self.assertIs(common.requests, original)
@@ -0,0 +1,169 @@
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.address_book import AddressBook
+from pocketbook.daemon import Daemon
+from pocketbook.key_store import KeyStore
+from pocketbook.pending import PendingStore
+from pocketbook.utils import to_canonical
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class DaemonTests(unittest.TestCase):
+
+    def setUp(self):
+        self.api = MagicMock()
+        self.api.tokens.balance.return_value = to_canonical(10)
+        self.api.tokens.stake.return_value = to_canonical(2)
+        self.api.submit_signed_tx.return_value = 'digest'
+        self.api.tokens.current_block_number.return_value = 1000
+
+        patcher = patch('pocketbook.utils.create_api', return_value=self.api)
+        self.mock_create_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def populate(self, ctx):
+        entity = Entity()
+        KeyStore(root=ctx.root).add_key('key1', SUPER_SECURE_PASSWORD, entity)
+        AddressBook(root=ctx.root).add('addr1', SAMPLE_ADDRESS)
+        return entity
+
+    def test_api_is_created_once(self):
+        with TemporaryPocketBookRoot() as ctx:
+            daemon = Daemon('foo-net', root=ctx.root)
+            self.mock_create_api.assert_not_called()
+
+            self.assertIs(daemon.api, self.api)
+            self.assertIs(daemon.api, self.api)
+            self.mock_create_api.assert_called_once_with('foo-net')
+
+    def test_list(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            entries = daemon.list()
+            self.assertEqual(entries, [
+                {'name': 'key1', 'type': 'key', 'address': str(Address(entity)), 'balance': '10.0000000000', 'stake': '2.0000000000',
+                 'error': None},
+                {'name': 'addr1', 'type': 'addr', 'address': SAMPLE_ADDRESS, 'balance': '10.0000000000', 'stake': '2.0000000000',
+                 'error': None},
+            ])
+
+            self.assertEqual(daemon.list(pattern='addr*', balances=False),
+                             [{'name': 'addr1', 'type': 'addr', 'address': SAMPLE_ADDRESS}])
+
+    def test_lookup(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            self.assertEqual(daemon.lookup(name='key1'),
+                             {'name': 'key1', 'type': 'key', 'address': str(Address(entity))})
+            self.assertIsNone(daemon.lookup(name='missing'))
+            self.assertEqual(daemon.lookup(address=SAMPLE_ADDRESS), {'address': SAMPLE_ADDRESS, 'names': ['addr1']})
+
+            with self.assertRaises(RuntimeError):
+                daemon.lookup()
+
+    def test_balance(self):
+        with TemporaryPocketBookRoot() as ctx:
+            self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            result = daemon.balance(['addr1', SAMPLE_ADDRESS])
+            self.assertEqual(result['addr1'], {'address': SAMPLE_ADDRESS, 'balance': '10.0000000000', 'stake': '2.0000000000', 'error': None})
+            self.assertEqual(result[SAMPLE_ADDRESS], result['addr1'])
+
+            # both targets refer to the same address so only a single query is made
+            self.api.tokens.balance.assert_called_once_with(SAMPLE_ADDRESS)
+
+            with self.assertRaises(RuntimeError):
+                daemon.balance(['not-a-name-or-address'])
+
+    def test_reload(self):
+        with TemporaryPocketBookRoot() as ctx:
+            daemon = Daemon('foo-net', root=ctx.root)
+            self.assertIsNone(daemon.lookup(name='addr1'))
+
+            self.populate(ctx)
+            with patch.object(KeyStore, 'close') as mock_key_store_close, \
+                    patch.object(AddressBook, 'close') as mock_address_book_close:
+                self.assertTrue(daemon.reload())
+
+            # the previous stores are closed rather than leaked
+            mock_key_store_close.assert_called_once_with()
+            mock_address_book_close.assert_called_once_with()
+            self.assertIsNotNone(daemon.lookup(name='addr1'))
+
+    def test_transfer(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            result = daemon.transfer('addr1', 1.5, ['key1'], {'key1': SUPER_SECURE_PASSWORD}, wait=False)
+            self.assertEqual(result, {'digest': 'digest', 'status': 'submitted'})
+
+            tx = self.api.submit_signed_tx.call_args[0][0]
+            self.assertEqual(tx.from_address, Address(entity))
+            self.assertEqual(tx.transfers, {Address(SAMPLE_ADDRESS): to_canonical(1.5)})
+            self.assertTrue(tx.is_valid())
+            self.assertEqual((tx.valid_from, tx.valid_until), (1000, 1100))
+            self.api.sync.assert_not_called()
+
+            # transfers which are not waited for are tracked by the status command
+            pending = PendingStore(root=ctx.root).items()
+            self.assertEqual([digest for digest, _ in pending], ['digest'])
+            self.assertEqual(pending[0][1]['from'], 'key1')
+            self.assertEqual(pending[0][1]['destination'], SAMPLE_ADDRESS)
+            self.assertEqual(pending[0][1]['network'], 'foo-net')
+
+            result = daemon.transfer('addr1', 1, 'key1', {'key1': SUPER_SECURE_PASSWORD})
+            self.assertEqual(result['status'], 'executed')
+            self.api.sync.assert_called_once_with('digest')
+
+            # the chain height is only queried once for both transfers
+            self.api.tokens.current_block_number.assert_called_once_with()
+
+    def test_keys_are_decrypted_without_the_lock(self):
+        with TemporaryPocketBookRoot() as ctx:
+            self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            from pocketbook.key_store import unseal_key
+
+            def unseal(sealed, password):
+                # another thread is able to take the lock while the key is being decrypted
+                acquired = []
+
+                def take_lock():
+                    acquired.append(daemon._lock.acquire(timeout=5))
+                    if acquired[0]:
+                        daemon._lock.release()
+
+                thread = threading.Thread(target=take_lock)
+                thread.start()
+                thread.join()
+                self.assertEqual(acquired, [True])
+                return unseal_key(sealed, password)
+
+            with patch('pocketbook.key_store.unseal_key', side_effect=unseal) as mock_unseal:
+                daemon.transfer('addr1', 1, ['key1'], {'key1': SUPER_SECURE_PASSWORD})
+            mock_unseal.assert_called_once()
+
+    def test_transfer_errors(self):
+        with TemporaryPocketBookRoot() as ctx:
+            self.populate(ctx)
+            daemon = Daemon('foo-net', root=ctx.root)
+
+            with self.assertRaises(RuntimeError):
+                daemon.transfer('addr1', 1, ['unknown'], {})
+            with self.assertRaises(RuntimeError):
+                daemon.transfer('addr1', 1, ['key1', 'key1'], {})
+            with self.assertRaises(RuntimeError):
+                daemon.transfer('addr1', 1, ['key1'], {}, from_address='unknown')
+
+            self.api.submit_signed_tx.assert_not_called()
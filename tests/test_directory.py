@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.address_book import AddressBook
+from pocketbook.directory import Directory, Entry
+from pocketbook.key_store import KeyStore
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class DirectoryTests(unittest.TestCase):
+
+    def test_lookups(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            key_address = str(Address(entity))
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('key1', SUPER_SECURE_PASSWORD, entity)
+            address_book = AddressBook(root=ctx.root)
+            address_book.add('addr1', SAMPLE_ADDRESS)
+            address_book.add('addr2', key_address)
+
+            directory = Directory(key_store, address_book)
+
+            self.assertEqual(len(directory), 3)
+            self.assertIn('addr1', directory)
+            self.assertEqual(directory.entry('key1'), Entry('key1', 'key', key_address))
+            self.assertEqual(directory.lookup_address('addr1'), SAMPLE_ADDRESS)
+            self.assertIsNone(directory.lookup_address('missing'))
+
+            # keys are preferred over address book entries for the same address
+            self.assertEqual(directory.lookup_name(key_address), 'key1')
+            self.assertEqual(directory.lookup_name(Address(entity)), 'key1')
+            self.assertEqual(directory.lookup_names(key_address), ['key1', 'addr2'])
+            self.assertEqual(directory.lookup_name(SAMPLE_ADDRESS), 'addr1')
+            self.assertIsNone(directory.lookup_name(Address(Entity())))
+
+    def test_index_is_built_lazily(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            address_book = AddressBook(root=ctx.root)
+
+            with patch.object(address_book, 'items', wraps=address_book.items) as mock_items:
+                directory = Directory(key_store, address_book)
+                mock_items.assert_not_called()
+
+                directory.lookup_name(SAMPLE_ADDRESS)
+                directory.lookup_name(SAMPLE_ADDRESS)
+                mock_items.assert_called_once_with()
+
+    def test_incremental_updates(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            address_book = AddressBook(root=ctx.root)
+            directory = Directory(key_store, address_book)
+
+            # force the index to be built
+            self.assertEqual(len(directory), 0)
+
+            entity = Entity()
+            directory.add_key('key1', SUPER_SECURE_PASSWORD, entity)
+            directory.add_address('addr1', SAMPLE_ADDRESS)
+            self.assertEqual(directory.lookup_name(Address(entity)), 'key1')
+            self.assertEqual(directory.lookup_name(SAMPLE_ADDRESS), 'addr1')
+
+            self.assertTrue(directory.rename('key1', 'key2'))
+            self.assertTrue(directory.rename('addr1', 'addr2'))
+            self.assertFalse(directory.rename('missing', 'other'))
+            self.assertEqual(directory.lookup_name(Address(entity)), 'key2')
+            self.assertEqual(directory.lookup_name(SAMPLE_ADDRESS), 'addr2')
+            self.assertNotIn('key1', directory)
+
+            self.assertTrue(directory.remove('addr2'))
+            self.assertFalse(directory.remove('addr2'))
+            self.assertIsNone(directory.lookup_name(SAMPLE_ADDRESS))
+
+            # the underlying stores must have been updated
+            self.assertEqual(key_store.list_keys(), ['key2'])
+            self.assertEqual(list(address_book.keys()), [])
+
+            # and a freshly built index must agree with the incrementally updated one
+            fresh = Directory(KeyStore(root=ctx.root), AddressBook(root=ctx.root))
+            self.assertEqual(fresh.lookup_name(Address(entity)), 'key2')
+            self.assertEqual(len(fresh), len(directory))
+
+    def test_name_used_for_a_key_and_an_address(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            address_book = AddressBook(root=ctx.root)
+
+            entity = Entity()
+            key_store.add_key('shared', SUPER_SECURE_PASSWORD, entity)
+            address_book.add('shared', SAMPLE_ADDRESS)
+
+            directory = Directory(key_store, address_book)
+            self.assertEqual(len(directory), 2)
+            self.assertEqual(directory.entry('shared'), Entry('shared', 'key', str(Address(entity))))
+            self.assertEqual(directory.lookup_name(SAMPLE_ADDRESS), 'shared')
+
+            # removing the name only removes the key, the address book entry is still indexed
+            self.assertTrue(directory.remove('shared'))
+            self.assertEqual(directory.entry('shared'), Entry('shared', 'addr', SAMPLE_ADDRESS))
+            self.assertIsNone(directory.lookup_name(Address(entity)))
+            self.assertEqual(directory.lookup_name(SAMPLE_ADDRESS), 'shared')
+            self.assertEqual(len(directory), 1)
+            self.assertEqual(list(address_book.keys()), ['shared'])
+
+    def test_rename_onto_a_name_in_the_other_store(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            address_book = AddressBook(root=ctx.root)
+
+            entity = Entity()
+            key_store.add_key('key1', SUPER_SECURE_PASSWORD, entity)
+            key_store.add_key('key2', SUPER_SECURE_PASSWORD, Entity())
+            address_book.add('addr1', SAMPLE_ADDRESS)
+
+            directory = Directory(key_store, address_book)
+
+            # names only conflict within the same store
+            self.assertFalse(directory.rename('key1', 'key2'))
+            self.assertTrue(directory.rename('key1', 'addr1'))
+
+            self.assertEqual(directory.entry('addr1'), Entry('addr1', 'key', str(Address(entity))))
+            self.assertEqual(directory.lookup_names(SAMPLE_ADDRESS), ['addr1'])
+            self.assertEqual(sorted(key_store.list_keys()), ['addr1', 'key2'])
+            self.assertEqual(list(address_book.keys()), ['addr1'])
@@ -0,0 +1,52 @@
+import json
+import unittest
+from io import StringIO
+
+from pocketbook.formats import detect_format, read_records, RecordWriter
+
+
+class FormatsTests(unittest.TestCase):
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format('foo.csv'), 'csv')
+        self.assertEqual(detect_format('foo.CSV'), 'csv')
+        self.assertEqual(detect_format('foo.jsonl'), 'jsonl')
+        self.assertEqual(detect_format('foo.ndjson'), 'jsonl')
+        self.assertEqual(detect_format('foo.json'), 'json')
+        self.assertEqual(detect_format('-'), 'csv')
+        self.assertEqual(detect_format('-', default='jsonl'), 'jsonl')
+
+    def test_round_trip(self):
+        records = [{'name': 'foo', 'address': 'bar'}, {'name': 'baz', 'address': 'qux'}]
+        for fmt in ('csv', 'jsonl', 'json'):
+            output = StringIO()
+            writer = RecordWriter(output, fmt, ['name', 'address'])
+            for record in records:
+                writer.write(record)
+            writer.close()
+
+            recovered = list(read_records(StringIO(output.getvalue()), fmt))
+            self.assertEqual(recovered, [(1, records[0]), (2, records[1])])
+
+    def test_json_array_is_written_on_close(self):
+        output = StringIO()
+        writer = RecordWriter(output, 'json', ['name', 'address'])
+        writer.write({'name': 'foo', 'address': 'bar', 'extra': 'ignored'})
+        writer.write({'name': 'baz'})
+        self.assertEqual(output.getvalue(), '')
+
+        writer.close()
+        self.assertEqual(json.loads(output.getvalue()),
+                         [{'name': 'foo', 'address': 'bar'}, {'name': 'baz', 'address': None}])
+
+    def test_invalid_json_array(self):
+        self.assertEqual(list(read_records(StringIO('[{"name": "foo"}, "bar"]'), 'json')),
+                         [(1, {'name': 'foo'}), (2, None)])
+        self.assertEqual(list(read_records(StringIO('{"name": "foo"}'), 'json')), [(1, None)])
+        self.assertEqual(list(read_records(StringIO('[{"name": '), 'json')), [(1, None)])
+
+    def test_unknown_format(self):
+        with self.assertRaises(RuntimeError):
+            RecordWriter(StringIO(), 'xml', ['name'])
+        with self.assertRaises(RuntimeError):
+            list(read_records(StringIO(), 'xml'))
@@ -0,0 +1,162 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import toml
+
+from pocketbook.address_book import AddressBook
+from pocketbook.journal import Journal, JournaledIndex, atomic_write
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class AtomicWriteTests(unittest.TestCase):
+
+    def test_write(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.txt')
+            atomic_write(path, 'first')
+            atomic_write(path, 'second')
+
+            with open(path, 'r') as input_file:
+                self.assertEqual(input_file.read(), 'second')
+
+            # no temporary files should be left behind
+            self.assertEqual(os.listdir(ctx.root), ['sample.txt'])
+
+    def test_failed_write_preserves_original(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.txt')
+            atomic_write(path, 'first')
+
+            with patch('os.replace', side_effect=OSError('disk full')):
+                with self.assertRaises(OSError):
+                    atomic_write(path, 'second')
+
+            with open(path, 'r') as input_file:
+                self.assertEqual(input_file.read(), 'first')
+            self.assertEqual(os.listdir(ctx.root), ['sample.txt'])
+
+
+class JournalTests(unittest.TestCase):
+
+    def test_append_and_read(self):
+        with TemporaryPocketBookRoot() as ctx:
+            journal = Journal(os.path.join(ctx.root, 'sample.journal'))
+            journal.append({'op': 'add', 'name': 'foo'})
+            journal.append({'op': 'remove', 'name': 'foo'})
+            self.assertEqual(len(journal), 2)
+
+            recovered = Journal(os.path.join(ctx.root, 'sample.journal'))
+            self.assertEqual(len(recovered), 2)
+            self.assertEqual(recovered.read(), [{'op': 'add', 'name': 'foo'}, {'op': 'remove', 'name': 'foo'}])
+
+            recovered.clear()
+            self.assertEqual(len(recovered), 0)
+            self.assertEqual(os.listdir(ctx.root), [])
+
+    def test_unsynced_appends(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.journal')
+            journal = Journal(path)
+
+            with patch('pocketbook.journal.os.fsync') as mock_fsync:
+                for n in range(5):
+                    journal.append({'op': 'add', 'name': 'foo{}'.format(n)}, sync=False)
+                mock_fsync.assert_not_called()
+
+                # the records are readable before they are synced, and are all synced together
+                self.assertEqual(len(Journal(path).read()), 5)
+                journal.sync()
+                mock_fsync.assert_called_once()
+
+    def test_truncated_record_is_ignored(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.journal')
+            journal = Journal(path)
+            journal.append({'op': 'add', 'name': 'foo'})
+
+            with open(path, 'a') as journal_file:
+                journal_file.write('{"op": "add", "na')
+
+            self.assertEqual(Journal(path).read(), [{'op': 'add', 'name': 'foo'}])
+
+
+class JournaledIndexTests(unittest.TestCase):
+
+    def load_index(self, ctx):
+        with open(os.path.join(ctx.root, AddressBook.INDEX_FILE_NAME), 'r') as index_file:
+            return toml.load(index_file)
+
+    def test_index_hooks_are_abstract(self):
+        class Incomplete(JournaledIndex):
+            def _load_index(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_batch_writes_index_once(self):
+        with TemporaryPocketBookRoot() as ctx:
+            address_book = AddressBook(root=ctx.root)
+
+            with patch.object(address_book._storage, '_flush_index', wraps=address_book._storage._flush_index) as mock_flush:
+                with address_book.batch():
+                    for n in range(10):
+                        address_book.add('address{}'.format(n), SAMPLE_ADDRESS)
+                    address_book.rename('address0', 'renamed')
+                    address_book.remove('address1')
+
+                mock_flush.assert_called_once_with()
+
+            index = self.load_index(ctx)
+            self.assertEqual(len(index), 9)
+            self.assertIn('renamed', index)
+            self.assertNotIn('address1', index)
+
+            # the journal is discarded once compacted
+            self.assertEqual(sorted(os.listdir(ctx.root)), [AddressBook.INDEX_FILE_NAME, AddressBook.INDEX_FILE_NAME + '.lock'])
+
+    def test_batch_syncs_journal_once(self):
+        def count_syncs(ctx, size):
+            address_book = AddressBook(root=ctx.root)
+            with patch('pocketbook.journal.os.fsync', wraps=os.fsync) as mock_fsync:
+                with address_book.batch():
+                    for n in range(size):
+                        address_book.add('address-{}-{}'.format(size, n), SAMPLE_ADDRESS)
+            return mock_fsync.call_count
+
+        # the number of syncs does not depend on the number of mutations in the batch
+        with TemporaryPocketBookRoot() as ctx:
+            self.assertEqual(count_syncs(ctx, 2), count_syncs(ctx, 50))
+
+    def test_journal_is_compacted_when_threshold_reached(self):
+        with TemporaryPocketBookRoot() as ctx:
+            address_book = AddressBook(root=ctx.root)
+            address_book._storage.COMPACT_THRESHOLD = 3
+
+            with address_book.batch():
+                for n in range(4):
+                    address_book.add('address{}'.format(n), SAMPLE_ADDRESS)
+
+                # the first three entries should have been compacted into the index
+                self.assertEqual(len(self.load_index(ctx)), 3)
+
+            self.assertEqual(len(self.load_index(ctx)), 4)
+
+    def test_interrupted_batch_is_recovered(self):
+        with TemporaryPocketBookRoot() as ctx:
+            address_book = AddressBook(root=ctx.root)
+            address_book.add('existing', SAMPLE_ADDRESS)
+
+            # simulate a crash part way through a batch
+            with patch.object(address_book._storage, '_compact'):
+                with address_book.batch():
+                    address_book.add('pending', SAMPLE_ADDRESS)
+                    address_book.rename('existing', 'moved')
+
+            self.assertEqual(list(self.load_index(ctx).keys()), ['existing'])
+
+            recovered = AddressBook(root=ctx.root)
+            self.assertEqual(set(recovered.keys()), {'moved', 'pending'})
+            self.assertEqual(set(self.load_index(ctx).keys()), {'moved', 'pending'})
+            self.assertEqual(sorted(os.listdir(ctx.root)), [AddressBook.INDEX_FILE_NAME, AddressBook.INDEX_FILE_NAME + '.lock'])
@@ -5,7 +5,8 @@ from unittest.mock import patch
 import toml
 from fetchai.ledger.crypto import Entity, Address
 
-from pocketbook.key_store import KeyStore, DuplicateKeyNameError, KeyNotFoundError, UnableToDecodeKeyError
+from pocketbook.key_store import KeyStore, DuplicateKeyNameError, KeyNotFoundError, UnableToDecodeKeyError, \
+    KeyFileExistsError
 from .utils import TemporaryPocketBookRoot, SUPER_SECURE_PASSWORD
 
 
@@ -135,6 +136,38 @@ class KeyStoreTests(KeyStoreTestCase):
             with self.assertRaises(UnableToDecodeKeyError):
                 key_store.load_key('sample', '!' + SUPER_SECURE_PASSWORD)
 
+    def test_missing_key_file(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, Entity())
+            os.remove(os.path.join(ctx.root, 'sample.key'))
+
+            with self.assertRaises(KeyNotFoundError):
+                key_store.load_key('sample', SUPER_SECURE_PASSWORD)
+
+    def test_stray_key_file_is_not_overwritten(self):
+        with TemporaryPocketBookRoot() as ctx:
+            stray_path = os.path.join(ctx.root, 'sample.key')
+            with open(stray_path, 'w') as stray_file:
+                stray_file.write('stray')
+
+            key_store = KeyStore(root=ctx.root)
+            with self.assertRaises(KeyFileExistsError) as error_ctx:
+                key_store.add_key('sample', SUPER_SECURE_PASSWORD, Entity())
+
+            self.assertEqual(error_ctx.exception.names, ['sample'])
+            self.assertEqual(str(error_ctx.exception), 'Key files already exist for: sample')
+            self.assertFalse(key_store.has_key('sample'))
+
+            # bulk creation is checked before any of the keys are generated
+            self.assertEqual(key_store.stray_keys(['other', 'sample']), ['sample'])
+            with patch('pocketbook.signing.generate_key_files') as mock_generate:
+                with self.assertRaises(KeyFileExistsError):
+                    key_store.create_keys(['other', 'sample'], SUPER_SECURE_PASSWORD)
+            mock_generate.assert_not_called()
+            with open(stray_path, 'r') as stray_file:
+                self.assertEqual(stray_file.read(), 'stray')
+
     def test_duplicate_key_error_message(self):
         error = DuplicateKeyNameError()
         self.assertEqual(str(error), 'Duplicate key name found')
@@ -225,9 +258,139 @@ class KeyStoreTests(KeyStoreTestCase):
             key_store.add_key('sample', SUPER_SECURE_PASSWORD, entity)
 
             # corrupt the files
-            key_path = key_store._format_key_path('sample')
+            key_path = key_store._storage._format_key_path('sample')
             self.assertTrue(os.path.isfile(key_path))
             os.remove(key_path)
 
             with self.assertRaises(RuntimeError):
                 key_store.remove_key('sample')
+
+    def test_has_key(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, Entity())
+
+            self.assertTrue(key_store.has_key('sample'))
+            self.assertFalse(key_store.has_key('other'))
+
+    def test_reverse_lookup(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            address = Address(entity)
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, entity)
+
+            self.assertEqual(key_store.lookup_name(address), 'sample')
+            self.assertEqual(key_store.lookup_name(str(address)), 'sample')
+            self.assertIsNone(key_store.lookup_name(Address(Entity())))
+
+            # reloaded stores should also have the reverse index
+            key_store2 = KeyStore(root=ctx.root)
+            self.assertEqual(key_store2.lookup_name(address), 'sample')
+
+    def test_lookups_are_updated_on_rename_and_remove(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            address = Address(entity)
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, entity)
+
+            self.assertTrue(key_store.rename_key('sample', 'sample2'))
+            self.assertIsNone(key_store.lookup_address('sample'))
+            self.assertEqual(key_store.lookup_address('sample2'), str(address))
+            self.assertEqual(key_store.lookup_name(address), 'sample2')
+
+            self.assertTrue(key_store.remove_key('sample2'))
+            self.assertIsNone(key_store.lookup_address('sample2'))
+            self.assertIsNone(key_store.lookup_name(address))
+
+    def test_interrupted_batch_is_recovered(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity1 = Entity()
+            entity2 = Entity()
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample1', SUPER_SECURE_PASSWORD, entity1)
+
+            # simulate a crash before the batch is compacted into the index
+            with patch.object(key_store._storage, '_compact'):
+                with key_store.batch():
+                    key_store.add_key('sample2', SUPER_SECURE_PASSWORD, entity2)
+                    key_store.rename_key('sample1', 'sample3')
+
+            recovered = KeyStore(root=ctx.root)
+            self.assertEqual(set(recovered.list_keys()), {'sample2', 'sample3'})
+            self.assertKeyIsPresentOnDisk('sample2', SUPER_SECURE_PASSWORD, entity2, ctx)
+            self.assertKeyIsPresentOnDisk('sample3', SUPER_SECURE_PASSWORD, entity1, ctx)
+            self.assertKeyIsNotPresentOnDisk('sample1', ctx)
+
+    def test_concurrent_key_stores_do_not_lose_keys(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity1 = Entity()
+            entity2 = Entity()
+
+            # both stores are loaded before either of them are written to
+            first = KeyStore(root=ctx.root)
+            second = KeyStore(root=ctx.root)
+
+            first.add_key('sample1', SUPER_SECURE_PASSWORD, entity1)
+            second.add_key('sample2', SUPER_SECURE_PASSWORD, entity2)
+
+            with self.assertRaises(DuplicateKeyNameError):
+                second.add_key('sample1', SUPER_SECURE_PASSWORD, Entity())
+
+            self.assertEqual(set(KeyStore(root=ctx.root).list_keys()), {'sample1', 'sample2'})
+            self.assertKeyIsPresentOnDisk('sample1', SUPER_SECURE_PASSWORD, entity1, ctx)
+            self.assertKeyIsPresentOnDisk('sample2', SUPER_SECURE_PASSWORD, entity2, ctx)
+
+    def test_load_multiple_keys(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity1 = Entity()
+            entity2 = Entity()
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample1', SUPER_SECURE_PASSWORD, entity1)
+            key_store.add_key('sample2', SUPER_SECURE_PASSWORD, entity2)
+
+            entities = key_store.load_keys({'sample1': SUPER_SECURE_PASSWORD, 'sample2': SUPER_SECURE_PASSWORD},
+                                           workers=2)
+            self.assertEqual(entities['sample1'].private_key_hex, entity1.private_key_hex)
+            self.assertEqual(entities['sample2'].private_key_hex, entity2.private_key_hex)
+
+            with self.assertRaises(KeyNotFoundError):
+                key_store.load_keys({'sample1': SUPER_SECURE_PASSWORD, 'missing': SUPER_SECURE_PASSWORD})
+
+    def test_public_key_lookup(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            KeyStore(root=ctx.root).add_key('sample', SUPER_SECURE_PASSWORD, entity)
+
+            key_store = KeyStore(root=ctx.root)
+            self.assertEqual(key_store.lookup_public_key('sample'), entity.public_key)
+            self.assertIsNone(key_store.lookup_public_key('unknown'))
+
+    def test_create_multiple_keys(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('existing', SUPER_SECURE_PASSWORD, Entity())
+
+            storage = key_store._storage
+            with patch.object(storage, '_flush_index', wraps=storage._flush_index) as flush:
+                addresses = key_store.create_keys(['new1', 'new2'], SUPER_SECURE_PASSWORD, workers=2)
+
+            # the index is only written once for the whole series of keys
+            flush.assert_called_once()
+
+            recovered = KeyStore(root=ctx.root)
+            self.assertEqual(recovered.list_keys(), ['existing', 'new1', 'new2'])
+            self.assertEqual([recovered.lookup_address('new1'), recovered.lookup_address('new2')], addresses)
+
+            entity = recovered.load_key('new2', SUPER_SECURE_PASSWORD)
+            self.assertEqual(recovered.lookup_public_key('new2'), entity.public_key)
+
+            with self.assertRaises(DuplicateKeyNameError):
+                key_store.create_keys(['new3', 'existing'], SUPER_SECURE_PASSWORD)
+            with self.assertRaises(DuplicateKeyNameError):
+                key_store.create_keys(['new3', 'new3'], SUPER_SECURE_PASSWORD)
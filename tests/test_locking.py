@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import unittest
+
+from pocketbook.address_book import AddressBook
+from pocketbook.locking import FileLock
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+def _add_addresses(root: str, prefix: str, count: int):
+    # each operation is made by a separate instance, as independent invocations of the tool would
+    for n in range(count):
+        AddressBook(root=root).add('{}-{}'.format(prefix, n), SAMPLE_ADDRESS)
+
+
+class FileLockTests(unittest.TestCase):
+
+    def test_shared_lock_does_not_create_lock_file(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.lock')
+            with FileLock(path).shared():
+                pass
+            self.assertFalse(os.path.exists(path))
+
+    def test_exclusive_lock_creates_lock_file(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.lock')
+            with FileLock(path).exclusive():
+                self.assertTrue(os.path.exists(path))
+
+            # shared locks can be taken by many readers at once
+            first, second = FileLock(path), FileLock(path)
+            with first.shared(), second.shared():
+                pass
+
+    def test_nested_acquisition(self):
+        with TemporaryPocketBookRoot() as ctx:
+            lock = FileLock(os.path.join(ctx.root, 'sample.lock'))
+            with lock.exclusive():
+                with lock.exclusive():
+                    pass
+                with lock.shared():
+                    pass
+
+            with lock.exclusive():
+                with lock.shared():
+                    pass
+
+    def test_shared_lock_can_not_be_upgraded(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'sample.lock')
+            lock = FileLock(path)
+            with lock.exclusive():
+                pass
+
+            with lock.shared():
+                with self.assertRaises(RuntimeError):
+                    with lock.exclusive():
+                        pass
+
+
+class ConcurrentAccessTests(unittest.TestCase):
+
+    def test_stale_instances_do_not_lose_entries(self):
+        with TemporaryPocketBookRoot() as ctx:
+            first = AddressBook(root=ctx.root)
+            second = AddressBook(root=ctx.root)
+
+            first.add('first', SAMPLE_ADDRESS)
+            second.add('second', SAMPLE_ADDRESS)
+            first.rename('first', 'renamed')
+
+            self.assertEqual(set(AddressBook(root=ctx.root).keys()), {'renamed', 'second'})
+
+    def test_stale_instance_detects_duplicate(self):
+        with TemporaryPocketBookRoot() as ctx:
+            first = AddressBook(root=ctx.root)
+            second = AddressBook(root=ctx.root)
+
+            first.add('sample', SAMPLE_ADDRESS)
+            with self.assertRaises(RuntimeError):
+                second.add('sample', SAMPLE_ADDRESS)
+
+    def test_concurrent_processes(self):
+        with TemporaryPocketBookRoot() as ctx:
+            processes = [
+                multiprocessing.Process(target=_add_addresses, args=(ctx.root, 'writer{}'.format(n), 10))
+                for n in range(4)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+            self.assertEqual(len(AddressBook(root=ctx.root).keys()), 40)
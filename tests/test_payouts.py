@@ -0,0 +1,194 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock, Mock
+
+import requests
+from fetchai.ledger.api import ApiError
+
+from pocketbook.payouts import Payout, ResultLedger, BatchTransferEngine, SUBMITTED, EXECUTED, FAILED
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+def status(successful=False, failed=False):
+    return Mock(successful=successful, failed=failed, status='Executed' if successful else 'Unknown')
+
+
+class ResultLedgerTests(unittest.TestCase):
+
+    def test_pending_on_fresh_ledger(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payouts = [Payout(1, None, SAMPLE_ADDRESS, 100), Payout(2, None, SAMPLE_ADDRESS, 200)]
+
+            to_submit, to_confirm = ledger.pending(payouts)
+            self.assertEqual(to_submit, payouts)
+            self.assertEqual(to_confirm, {})
+
+    def test_resume(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'results.jsonl')
+            payouts = [Payout(row, None, SAMPLE_ADDRESS, row * 100) for row in range(1, 5)]
+
+            ledger = ResultLedger(path)
+            ledger.record(payouts[0], SUBMITTED, digest='d1')
+            ledger.record(payouts[0], EXECUTED, digest='d1')
+            ledger.record(payouts[1], SUBMITTED, digest='d2')
+            ledger.record(payouts[2], FAILED, error=RuntimeError('boom'))
+
+            # reload the ledger from disk
+            ledger = ResultLedger(path)
+            to_submit, to_confirm = ledger.pending(payouts)
+
+            self.assertEqual(to_submit, [payouts[2], payouts[3]])
+            self.assertEqual(to_confirm, {'d2': payouts[1]})
+            self.assertEqual(ledger.summary(), {EXECUTED: 1, SUBMITTED: 1, FAILED: 1})
+
+    def test_modified_payout_file_is_detected(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            ledger.record(Payout(1, None, SAMPLE_ADDRESS, 100), EXECUTED, digest='d1')
+
+            with self.assertRaises(RuntimeError):
+                ledger.pending([Payout(1, None, SAMPLE_ADDRESS, 101)])
+
+
+class BatchTransferEngineTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('pocketbook.transactions.build_transfer')
+        self.build_transfer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.build_transfer.side_effect = lambda _f, _d, amount, _c, _s: Mock(amount=amount)
+
+        # the mock transactions can not be encoded, so the digest is derived from the amount
+        patcher = patch('pocketbook.transactions.tx_digest', side_effect=lambda tx: 'digest-{}'.format(tx.amount))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.api = MagicMock()
+        self.api.tokens.current_block_number.return_value = 1000
+        self.signer = Mock()
+
+    def create_engine(self, ledger, **kwargs):
+        return BatchTransferEngine(self.api, ledger, 'from', [self.signer], 1, sleep=Mock(), **kwargs)
+
+    def test_submit_and_confirm(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payouts = [Payout(row, None, SAMPLE_ADDRESS, row * 100) for row in range(1, 4)]
+
+            self.api.submit_signed_tx.side_effect = lambda tx: 'digest-{}'.format(tx.amount)
+
+            engine = self.create_engine(ledger, window=2)
+            submitted = engine.submit(payouts)
+
+            self.assertEqual(submitted, {'digest-100': payouts[0], 'digest-200': payouts[1], 'digest-300': payouts[2]})
+            self.assertEqual(ledger.summary(), {SUBMITTED: 3})
+            self.api.tokens.current_block_number.assert_called_once_with()
+
+            # the first poll reports one transaction as still pending
+            polls = {'digest-100': [status(successful=True)],
+                     'digest-200': [status(), status(successful=True)],
+                     'digest-300': [status(failed=True)]}
+            self.api.tx.status.side_effect = lambda digest: polls[digest].pop(0)
+
+            remaining = engine.confirm(submitted)
+            self.assertEqual(remaining, {})
+            self.assertEqual(ledger.summary(), {EXECUTED: 2, FAILED: 1})
+
+    def test_submission_is_recorded_before_it_is_sent(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            def submit_signed_tx(_tx):
+                record = ledger.latest(1)
+                self.assertEqual(record['status'], SUBMITTED)
+                self.assertEqual(record['digest'], 'digest-100')
+                return 'digest-100'
+
+            self.api.submit_signed_tx.side_effect = submit_signed_tx
+
+            engine = self.create_engine(ledger)
+            self.assertEqual(engine.submit([payout]), {'digest-100': payout})
+            self.assertEqual(ledger.latest(1)['valid_until'], 1100)
+
+    def test_rejected_submission_is_retried(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'results.jsonl')
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            self.api.submit_signed_tx.side_effect = ApiError('rejected')
+
+            engine = self.create_engine(ResultLedger(path))
+            self.assertEqual(engine.submit([payout]), {})
+
+            ledger = ResultLedger(path)
+            self.assertEqual(ledger.latest(1)['status'], FAILED)
+            self.assertEqual(ledger.latest(1)['error'], 'rejected')
+            self.assertEqual(ledger.pending([payout]), ([payout], {}))
+
+    def test_build_failure_is_retried(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            self.build_transfer.side_effect = RuntimeError('unable to build')
+
+            engine = self.create_engine(ledger)
+            self.assertEqual(engine.submit([payout]), {})
+            self.assertEqual(ledger.latest(1)['status'], FAILED)
+            self.api.submit_signed_tx.assert_not_called()
+            self.assertEqual(ledger.pending([payout]), ([payout], {}))
+
+    def test_uncertain_submission_is_confirmed_on_resume(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'results.jsonl')
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            # the request times out, but the ledger may still have received the transaction
+            self.api.submit_signed_tx.side_effect = requests.exceptions.ReadTimeout('timed out')
+
+            engine = self.create_engine(ResultLedger(path))
+            self.assertEqual(engine.submit([payout]), {'digest-100': payout})
+
+            ledger = ResultLedger(path)
+            self.assertEqual(ledger.latest(1)['status'], SUBMITTED)
+            self.assertEqual(ledger.latest(1)['error'], 'timed out')
+            self.assertEqual(ledger.pending([payout]), ([], {'digest-100': payout}))
+
+    def test_ledger_digest_is_recorded(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            self.api.submit_signed_tx.return_value = 'other-digest'
+
+            engine = self.create_engine(ledger)
+            self.assertEqual(engine.submit([payout]), {'other-digest': payout})
+            self.assertEqual(ledger.latest(1)['digest'], 'other-digest')
+
+    def test_confirmation_timeout(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payout = Payout(1, None, SAMPLE_ADDRESS, 100)
+
+            self.api.tx.status.return_value = status()
+
+            engine = self.create_engine(ledger, timeout=0)
+            self.assertEqual(engine.confirm({'digest': payout}), {'digest': payout})
+
+    def test_expired_transaction_is_retried(self):
+        with TemporaryPocketBookRoot() as ctx:
+            ledger = ResultLedger(os.path.join(ctx.root, 'results.jsonl'))
+            payouts = [Payout(1, None, SAMPLE_ADDRESS, 100), Payout(2, None, SAMPLE_ADDRESS, 200)]
+            ledger.record(payouts[0], SUBMITTED, digest='d1', valid_until=900)
+            ledger.record(payouts[1], SUBMITTED, digest='d2', valid_until=1100)
+
+            self.api.tx.status.return_value = status()
+
+            engine = self.create_engine(ledger, timeout=0)
+            self.assertEqual(engine.confirm({'d1': payouts[0], 'd2': payouts[1]}), {'d2': payouts[1]})
+            self.assertEqual(ledger.latest(1)['status'], FAILED)
+            self.assertEqual(ledger.latest(2)['status'], SUBMITTED)
+            self.assertEqual(ledger.pending(payouts), ([payouts[0]], {'d2': payouts[1]}))
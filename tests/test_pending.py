@@ -0,0 +1,109 @@
+import multiprocessing
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from pocketbook import timings
+from pocketbook.pending import PendingStore, StatusPoller
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+def status(value):
+    return Mock(status=value, successful=value == 'Executed', failed=value not in ('Executed', 'Pending'))
+
+
+def _add_pending(root: str, prefix: str, count: int):
+    # each transfer is recorded by a separate instance, as independent invocations of the tool would
+    for n in range(count):
+        PendingStore(root=root).add('{}-{}'.format(prefix, n), 'foo-net')
+
+
+class PendingStoreTests(unittest.TestCase):
+
+    def test_add_and_remove(self):
+        with TemporaryPocketBookRoot() as ctx:
+            clock = Mock(side_effect=[1, 2, 3])
+            store = PendingStore(root=ctx.root, clock=clock)
+            store.add('aa', 'foo-net', destination=SAMPLE_ADDRESS, amount=10)
+            store.add('bb', 'bar-net')
+            store.add('cc', 'foo-net')
+
+            # changes are visible to other instances (i.e. other processes)
+            other = PendingStore(root=ctx.root)
+            self.assertEqual(len(other), 3)
+            self.assertEqual([digest for digest, _ in other.items(network='foo-net')], ['aa', 'cc'])
+            self.assertEqual(other.items()[0], ('aa', {
+                'network': 'foo-net', 'destination': SAMPLE_ADDRESS, 'amount': 10, 'submitted': 1}))
+
+            self.assertEqual(other.remove(['aa', 'unknown']), ['aa'])
+            self.assertEqual([digest for digest, _ in store.items()], ['bb', 'cc'])
+
+    def test_concurrent_processes(self):
+        with TemporaryPocketBookRoot() as ctx:
+            processes = [
+                multiprocessing.Process(target=_add_pending, args=(ctx.root, 'writer{}'.format(n), 10))
+                for n in range(4)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+
+            self.assertEqual(len(PendingStore(root=ctx.root)), 40)
+
+    def test_empty_store(self):
+        with TemporaryPocketBookRoot() as ctx:
+            store = PendingStore(root=ctx.root)
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.items(), [])
+            self.assertEqual(store.remove(['aa']), [])
+
+
+class StatusPollerTests(unittest.TestCase):
+
+    def test_backoff(self):
+        api = MagicMock()
+        polls = {
+            'aa': [status('Executed')],
+            'bb': [status('Pending'), status('Pending'), status('Pending'), status('Failed')],
+        }
+        api.tx.status.side_effect = lambda digest: polls[digest].pop(0)
+
+        sleep = Mock()
+        on_complete = Mock()
+        poller = StatusPoller(api, interval=1, max_interval=3, sleep=sleep)
+        self.assertEqual(poller.poll(['aa', 'bb'], on_complete), [])
+
+        # the poll interval grows up to the maximum
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2, 3])
+        self.assertEqual([c[0][0] for c in on_complete.call_args_list], ['aa', 'bb'])
+
+    def test_errors_are_retried(self):
+        api = MagicMock()
+        api.tx.status.side_effect = [RuntimeError('unavailable'), status('Executed')]
+
+        on_complete = Mock()
+        poller = StatusPoller(api, sleep=Mock())
+        self.assertEqual(poller.poll(['aa'], on_complete), [])
+        on_complete.assert_called_once()
+
+    def test_timeout(self):
+        api = MagicMock()
+        api.tx.status.return_value = status('Pending')
+
+        sleep = Mock()
+        poller = StatusPoller(api, timeout=0, sleep=sleep)
+        self.assertEqual(poller.poll(['aa'], Mock()), ['aa'])
+        sleep.assert_not_called()
+
+    def test_status_requests_are_timed(self):
+        api = MagicMock()
+        api.tx.status.side_effect = [status('Pending'), status('Executed')]
+
+        recorder = timings.enable()
+        self.addCleanup(timings.disable)
+
+        StatusPoller(api, sleep=Mock()).poll(['aa'], Mock())
+
+        entry, = [entry for entry in recorder.summary() if entry['name'] == 'network.tx_status']
+        self.assertEqual(entry['count'], 2)
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import Mock
+
+from pocketbook.planner import ValidityPlanner
+from .utils import FakeClock
+
+
+class ValidityPlannerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.current_block = Mock(side_effect=[1000, 1050])
+        self.planner = ValidityPlanner(self.current_block, validity_period=100, refresh_margin=10, block_interval=1.0,
+                                       clock=self.clock)
+
+    def test_height_is_fetched_once_per_burst(self):
+        transactions = [Mock() for _ in range(50)]
+        for tx in transactions:
+            self.assertEqual(self.planner.plan(tx), 1100)
+
+        self.current_block.assert_called_once_with()
+        for tx in transactions:
+            self.assertEqual((tx.valid_from, tx.valid_until), (1000, 1100))
+
+    def test_counters_are_unique(self):
+        transactions = [Mock() for _ in range(50)]
+        for tx in transactions:
+            self.planner.plan(tx)
+
+        self.assertEqual(len({tx.counter for tx in transactions}), len(transactions))
+
+    def test_refresh_near_expiry(self):
+        tx = Mock()
+        self.planner.plan(tx)
+
+        # still well within the window
+        self.clock.now = 89.0
+        self.planner.plan(tx)
+        self.assertEqual(self.current_block.call_count, 1)
+
+        # within the refresh margin of the end of the window
+        self.clock.now = 90.0
+        self.assertEqual(self.planner.plan(tx), 1150)
+        self.assertEqual(self.current_block.call_count, 2)
+
+    def test_invalidate(self):
+        tx = Mock()
+        self.planner.plan(tx)
+        self.planner.invalidate()
+        self.planner.plan(tx)
+
+        self.assertEqual(self.current_block.call_count, 2)
+        self.assertEqual(tx.valid_from, 1050)
@@ -0,0 +1,64 @@
+import unittest
+
+from pocketbook.portfolio import Portfolio, PortfolioEntry, Totals
+from pocketbook.query import BalanceResult
+
+
+class PortfolioTests(unittest.TestCase):
+
+    def populate(self, portfolio):
+        portfolio.add('a', 'key', 'address-a', BalanceResult(5, 1, None))
+        portfolio.add('b', 'key', 'address-b', BalanceResult(20, 0, None))
+        portfolio.add('c', 'addr', 'address-c', BalanceResult(10, 7, None))
+        portfolio.add('alias', 'addr', 'address-a', BalanceResult(5, 1, None))
+        portfolio.add('bad', 'addr', 'address-d', BalanceResult(None, None, RuntimeError('bad address')))
+        return portfolio
+
+    def test_display_order_is_preserved(self):
+        portfolio = self.populate(Portfolio())
+        self.assertEqual([row.name for row in portfolio.rows()], ['a', 'b', 'c', 'alias', 'bad'])
+
+    def test_totals_count_each_address_once(self):
+        portfolio = self.populate(Portfolio())
+        self.assertEqual(portfolio.totals, Totals(35, 8, 3, 1))
+
+        rows = list(portfolio.rows(include_totals=True))
+        self.assertEqual(rows[-1], PortfolioEntry('Total', 'total', '', 35, 8, None))
+
+    def test_sorting(self):
+        self.assertEqual([row.name for row in self.populate(Portfolio(sort='balance')).rows()],
+                         ['b', 'c', 'a', 'alias', 'bad'])
+        self.assertEqual([row.name for row in self.populate(Portfolio(sort='stake')).rows()],
+                         ['c', 'a', 'alias', 'b', 'bad'])
+        self.assertEqual([row.name for row in self.populate(Portfolio(sort='name')).rows()],
+                         ['a', 'alias', 'b', 'bad', 'c'])
+
+    def test_top_entries(self):
+        self.assertEqual([row.name for row in self.populate(Portfolio(top=2)).rows()], ['b', 'c'])
+        self.assertEqual([row.name for row in self.populate(Portfolio(sort='name', top=2)).rows()], ['a', 'alias'])
+
+        # the totals always cover every entry
+        self.assertEqual(self.populate(Portfolio(top=1)).totals.balance, 35)
+
+    def test_grouping(self):
+        portfolio = self.populate(Portfolio(group_by='type', sort='balance'))
+
+        rows = [(row.name, row.type, row.balance) for row in portfolio.rows(include_totals=True)]
+        self.assertEqual(rows, [
+            ('b', 'key', 20),
+            ('a', 'key', 5),
+            ('key', 'subtotal', 25),
+            ('c', 'addr', 10),
+            ('alias', 'addr', 5),
+            ('bad', 'addr', None),
+            ('addr', 'subtotal', 15),
+            ('Total', 'total', 35),
+        ])
+
+    def test_invalid_options(self):
+        with self.assertRaises(RuntimeError):
+            Portfolio(sort='address')
+        with self.assertRaises(RuntimeError):
+            Portfolio(group_by='name')
+        with self.assertRaises(RuntimeError):
+            Portfolio(top=0)
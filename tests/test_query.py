@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import MagicMock
+
+from fetchai.ledger.crypto import Address, Entity
+
+from pocketbook.query import BalanceQuery, BalanceResult
+from pocketbook.utils import to_canonical
+
+
+class BalanceQueryTests(unittest.TestCase):
+
+    def test_empty(self):
+        api = MagicMock()
+        self.assertEqual(len(BalanceQuery(api).fetch([])), 0)
+        api.tokens.balance.assert_not_called()
+
+    def test_results_are_in_input_order(self):
+        addresses = ['address{}'.format(n) for n in range(20)]
+        balances = {address: to_canonical(n + 1) for n, address in enumerate(addresses)}
+
+        api = MagicMock()
+        api.tokens.balance.side_effect = lambda address: balances[address]
+        api.tokens.stake.side_effect = lambda address: balances[address] * 2
+
+        results = BalanceQuery(api, concurrency=4).fetch(addresses)
+
+        self.assertEqual(list(results.keys()), addresses)
+        self.assertEqual(list(results.values()), [BalanceResult(to_canonical(n + 1), to_canonical(2 * (n + 1)), None)
+                                                 for n in range(20)])
+
+    def test_failures_are_captured(self):
+        error = RuntimeError('bad address')
+
+        def balance(address):
+            if address == 'bad':
+                raise error
+            return to_canonical(1)
+
+        api = MagicMock()
+        api.tokens.balance.side_effect = balance
+        api.tokens.stake.return_value = to_canonical(2)
+
+        results = BalanceQuery(api, concurrency=2).fetch(['good', 'bad'])
+
+        self.assertEqual(results['good'], BalanceResult(to_canonical(1), to_canonical(2), None))
+        self.assertIsNone(results['bad'].balance)
+        self.assertEqual(results['bad'].stake, to_canonical(2))
+        self.assertIs(results['bad'].error, error)
+
+    def test_duplicate_addresses_are_only_queried_once(self):
+        entity = Entity()
+        address = Address(entity)
+
+        api = MagicMock()
+        api.tokens.balance.return_value = to_canonical(3)
+        api.tokens.stake.return_value = to_canonical(4)
+
+        results = BalanceQuery(api).fetch([address, str(address), 'other', address])
+
+        self.assertEqual(list(results.keys()), [str(address), 'other'])
+        self.assertEqual(results[str(address)], BalanceResult(to_canonical(3), to_canonical(4), None))
+        self.assertEqual(api.tokens.balance.call_count, 2)
+        self.assertEqual(api.tokens.stake.call_count, 2)
+
+    def test_stream_yields_each_address_once(self):
+        api = MagicMock()
+        api.tokens.balance.return_value = to_canonical(3)
+        api.tokens.stake.return_value = to_canonical(4)
+
+        results = list(BalanceQuery(api, concurrency=4).stream(['a', 'b', 'a', 'c']))
+
+        self.assertEqual(sorted(key for key, _ in results), ['a', 'b', 'c'])
+        self.assertTrue(all(result == BalanceResult(to_canonical(3), to_canonical(4), None) for _, result in results))
+
+    def test_stream_serves_cached_entries_first(self):
+        cache = MagicMock()
+        cache.get.side_effect = lambda address, _: (1, 2) if address == 'cached' else None
+
+        api = MagicMock()
+        api.tokens.balance.return_value = to_canonical(3)
+        api.tokens.stake.return_value = to_canonical(4)
+
+        results = list(BalanceQuery(api, cache=cache, max_age=60).stream(['fresh', 'cached']))
+
+        self.assertEqual(results, [('cached', BalanceResult(1, 2, None)),
+                                   ('fresh', BalanceResult(to_canonical(3), to_canonical(4), None))])
+        api.tokens.balance.assert_called_once_with('fresh')
+        cache.put.assert_called_once_with('fresh', to_canonical(3), to_canonical(4))
+        cache.save.assert_called_once_with()
@@ -0,0 +1,109 @@
+import os
+import signal
+import socket
+import stat
+import threading
+import unittest
+
+from pocketbook.rpc import RpcServer, RpcClient, RpcError, interrupt_on_terminate
+from .utils import TemporaryPocketBookRoot
+
+
+class RpcTests(unittest.TestCase):
+
+    def start_server(self, ctx, methods):
+        server = RpcServer(os.path.join(ctx.root, 'test.sock'), methods)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        return server
+
+    def test_round_trip(self):
+        with TemporaryPocketBookRoot() as ctx:
+            server = self.start_server(ctx, {'add': lambda a, b: a + b, 'ping': lambda: 'pong'})
+
+            with RpcClient(server.socket_path) as client:
+                self.assertEqual(client.call('add', a=1, b=2), 3)
+                self.assertEqual(client.call('ping'), 'pong')
+
+    def test_errors(self):
+        def failure():
+            raise RuntimeError('bad things')
+
+        with TemporaryPocketBookRoot() as ctx:
+            server = self.start_server(ctx, {'fail': failure})
+
+            with RpcClient(server.socket_path) as client:
+                with self.assertRaises(RpcError) as error_ctx:
+                    client.call('fail')
+                self.assertEqual(str(error_ctx.exception), 'bad things')
+
+                with self.assertRaises(RpcError) as error_ctx:
+                    client.call('missing')
+                self.assertEqual(str(error_ctx.exception), 'Unknown method: missing')
+
+    def test_socket_is_private(self):
+        with TemporaryPocketBookRoot() as ctx:
+            server = self.start_server(ctx, {})
+
+            mode = stat.S_IMODE(os.stat(server.socket_path).st_mode)
+            self.assertEqual(mode & 0o077, 0)
+
+    def test_stale_socket_is_replaced(self):
+        with TemporaryPocketBookRoot() as ctx:
+            # a socket left behind by a server which is no longer running
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(os.path.join(ctx.root, 'test.sock'))
+            stale.close()
+
+            server = self.start_server(ctx, {'ping': lambda: 'pong'})
+            with RpcClient(server.socket_path) as client:
+                self.assertEqual(client.call('ping'), 'pong')
+
+    def test_running_server_is_not_replaced(self):
+        with TemporaryPocketBookRoot() as ctx:
+            server = self.start_server(ctx, {'ping': lambda: 'pong'})
+
+            with self.assertRaises(RuntimeError):
+                RpcServer(server.socket_path, {})
+
+            # the socket of the running server is untouched
+            with RpcClient(server.socket_path) as client:
+                self.assertEqual(client.call('ping'), 'pong')
+
+    def test_other_files_are_not_replaced(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'test.sock')
+            with open(path, 'w') as other:
+                other.write('not a socket')
+
+            with self.assertRaises(RuntimeError):
+                RpcServer(path, {})
+            self.assertTrue(os.path.isfile(path))
+
+    def test_close_only_removes_its_own_socket(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'test.sock')
+            server = RpcServer(path, {})
+
+            # the socket has since been replaced, e.g. by another server
+            os.remove(path)
+            with open(path, 'w') as other:
+                other.write('replacement')
+
+            server.server_close()
+            self.assertTrue(os.path.isfile(path))
+
+    def test_termination_interrupts(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous)
+
+        interrupt_on_terminate()
+        with self.assertRaises(KeyboardInterrupt):
+            signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
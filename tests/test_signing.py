@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.signing import SigningPool, choose_workers, decrypt_key_files
+from pocketbook.transactions import build_transfer
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+def create_transfers(signers, count):
+    source = Address(signers[0])
+    return [build_transfer(source, Address(SAMPLE_ADDRESS), amount + 1, 1, signers) for amount in range(count)]
+
+
+class SigningTests(unittest.TestCase):
+
+    def test_choose_workers(self):
+        self.assertEqual(choose_workers(1, 2), 1)
+        self.assertEqual(choose_workers(10, 2, workers=4), 4)
+        self.assertEqual(choose_workers(3, 2, workers=4), 3)
+        self.assertEqual(choose_workers(10, 20, workers=4), 1)
+
+    def test_parallel_decryption(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entities = [Entity() for _ in range(3)]
+            credentials = {}
+            for index, entity in enumerate(entities):
+                path = os.path.join(ctx.root, 'key{}.key'.format(index))
+                with open(path, 'w') as key_file:
+                    key_file.write(entity.dumps(SUPER_SECURE_PASSWORD))
+                credentials['key{}'.format(index)] = (path, SUPER_SECURE_PASSWORD)
+
+            loaded = decrypt_key_files(credentials, workers=2)
+
+            self.assertEqual(list(loaded.keys()), ['key0', 'key1', 'key2'])
+            for index, entity in enumerate(entities):
+                self.assertEqual(loaded['key{}'.format(index)].private_key_hex, entity.private_key_hex)
+
+    def test_serial_signing(self):
+        signers = [Entity() for _ in range(3)]
+        transactions = create_transfers(signers, 2)
+
+        with SigningPool(signers) as pool:
+            pool.sign_all(transactions)
+
+        for tx in transactions:
+            self.assertTrue(tx.is_valid())
+
+    def test_parallel_signing(self):
+        signers = [Entity() for _ in range(3)]
+        transactions = create_transfers(signers, 5)
+
+        with SigningPool(signers, workers=2) as pool:
+            pool.sign_all(transactions[:4])
+            pool.sign(transactions[4])
+
+        for tx in transactions:
+            self.assertTrue(tx.is_valid())
+
+    def test_workers_are_started_with_the_pool(self):
+        with SigningPool([Entity()], workers=2) as pool:
+            # all the workers exist before the pool is first used (e.g. from another thread)
+            self.assertEqual(len(pool._executor._processes), 2)
@@ -0,0 +1,149 @@
+import os
+import stat
+import unittest
+from unittest.mock import patch
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore, DuplicateKeyNameError, KeyNotFoundError
+from pocketbook.sqlite_storage import SqliteAddressStorage, SqliteKeyStorage
+from pocketbook.storage import DATABASE_FILE_NAME, STORAGE_ENV, AddressStorage, KeyStorage, TomlAddressStorage, \
+    migrate_storage, storage_backend
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class SqliteStorageTests(unittest.TestCase):
+
+    def open_key_store(self, ctx):
+        return KeyStore(root=ctx.root, storage=SqliteKeyStorage(os.path.join(ctx.root, DATABASE_FILE_NAME)))
+
+    def open_address_book(self, ctx):
+        return AddressBook(root=ctx.root, storage=SqliteAddressStorage(os.path.join(ctx.root, DATABASE_FILE_NAME)))
+
+    def test_interfaces_are_abstract(self):
+        with self.assertRaises(TypeError):
+            KeyStorage()
+        with self.assertRaises(TypeError):
+            AddressStorage()
+
+    def test_keys(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+            address = Address(entity)
+
+            key_store = self.open_key_store(ctx)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, entity)
+            key_store.add_key('other', SUPER_SECURE_PASSWORD, Entity())
+
+            with self.assertRaises(DuplicateKeyNameError):
+                key_store.add_key('sample', SUPER_SECURE_PASSWORD, Entity())
+
+            # the keys are stored in the database rather than in separate files
+            self.assertFalse(os.path.exists(os.path.join(ctx.root, 'sample.key')))
+            self.assertEqual(stat.S_IMODE(os.stat(os.path.join(ctx.root, DATABASE_FILE_NAME)).st_mode), 0o600)
+
+            recovered = self.open_key_store(ctx)
+            self.assertEqual(recovered.list_keys(), ['sample', 'other'])
+            self.assertEqual(recovered.lookup_address('sample'), str(address))
+            self.assertEqual(recovered.lookup_public_key('sample'), entity.public_key)
+            self.assertEqual(recovered.lookup_name(address), 'sample')
+            self.assertEqual(recovered.load_key('sample', SUPER_SECURE_PASSWORD).private_key_hex,
+                             entity.private_key_hex)
+
+            with self.assertRaises(KeyNotFoundError):
+                recovered.load_key('missing', SUPER_SECURE_PASSWORD)
+
+            self.assertTrue(recovered.rename_key('sample', 'renamed'))
+            self.assertFalse(recovered.rename_key('renamed', 'other'))
+            self.assertEqual(recovered.lookup_name(address), 'renamed')
+            self.assertTrue(recovered.remove_key('renamed'))
+            self.assertFalse(recovered.remove_key('renamed'))
+            self.assertIsNone(recovered.lookup_name(address))
+            self.assertEqual(recovered.list_keys(), ['other'])
+
+    def test_addresses(self):
+        with TemporaryPocketBookRoot() as ctx:
+            address_book = self.open_address_book(ctx)
+            address_book.add('sample', SAMPLE_ADDRESS)
+            address_book.add('other', SAMPLE_ADDRESS)
+
+            with self.assertRaises(RuntimeError):
+                address_book.add('sample', SAMPLE_ADDRESS)
+
+            recovered = self.open_address_book(ctx)
+            self.assertEqual(recovered.items(), [('sample', SAMPLE_ADDRESS), ('other', SAMPLE_ADDRESS)])
+            self.assertEqual(recovered.lookup_address('other'), SAMPLE_ADDRESS)
+            self.assertTrue(recovered.rename('sample', 'renamed'))
+            self.assertFalse(recovered.rename('renamed', 'other'))
+            self.assertTrue(recovered.remove('other'))
+            self.assertEqual(recovered.keys(), ['renamed'])
+
+    def test_batches_are_transactional(self):
+        with TemporaryPocketBookRoot() as ctx:
+            address_book = self.open_address_book(ctx)
+            address_book.add('existing', SAMPLE_ADDRESS)
+
+            with self.assertRaises(RuntimeError):
+                with address_book.batch():
+                    address_book.add('pending', SAMPLE_ADDRESS)
+                    address_book.rename('existing', 'moved')
+                    raise RuntimeError('interrupted')
+
+            self.assertEqual(self.open_address_book(ctx).keys(), ['existing'])
+
+            with address_book.batch():
+                for n in range(10):
+                    address_book.add('address{}'.format(n), SAMPLE_ADDRESS)
+
+            self.assertEqual(len(self.open_address_book(ctx).keys()), 11)
+
+    def test_backend_selection(self):
+        with TemporaryPocketBookRoot() as ctx:
+            self.assertEqual(storage_backend(ctx.root), 'toml')
+
+            with patch.dict('os.environ', {STORAGE_ENV: 'sqlite'}):
+                self.assertEqual(storage_backend(ctx.root), 'sqlite')
+
+                # the requested backend only applies to new roots
+                AddressBook(root=ctx.root, storage=TomlAddressStorage(ctx.root)).add('sample', SAMPLE_ADDRESS)
+                self.assertEqual(storage_backend(ctx.root), 'toml')
+
+            with patch.dict('os.environ', {STORAGE_ENV: 'sqlite'}):
+                with TemporaryPocketBookRoot() as other:
+                    self.assertIsInstance(KeyStore(root=other.root)._storage, SqliteKeyStorage)
+                    self.assertTrue(os.path.isfile(os.path.join(other.root, DATABASE_FILE_NAME)))
+
+    def test_migration(self):
+        with TemporaryPocketBookRoot() as ctx:
+            entity = Entity()
+
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('sample', SUPER_SECURE_PASSWORD, entity)
+            AddressBook(root=ctx.root).add('other', SAMPLE_ADDRESS)
+            self.assertEqual(storage_backend(ctx.root), 'toml')
+
+            self.assertEqual(migrate_storage(ctx.root, 'sqlite'), (1, 1))
+            self.assertEqual(storage_backend(ctx.root), 'sqlite')
+
+            key_store = KeyStore(root=ctx.root)
+            self.assertIsInstance(key_store._storage, SqliteKeyStorage)
+            self.assertEqual(key_store.load_key('sample', SUPER_SECURE_PASSWORD).private_key_hex,
+                             entity.private_key_hex)
+            self.assertEqual(AddressBook(root=ctx.root).items(), [('other', SAMPLE_ADDRESS)])
+            key_store.close()
+
+            with self.assertRaises(RuntimeError):
+                migrate_storage(ctx.root, 'sqlite')
+
+            # the original TOML files are kept as a backup, moved aside so that they are no longer picked up
+            for name in ('index.toml', 'addresses.toml', 'sample.key'):
+                self.assertFalse(os.path.exists(os.path.join(ctx.root, name)))
+                self.assertTrue(os.path.isfile(os.path.join(ctx.root, name + '.migrated')))
+
+            # and so migrating back is possible
+            self.assertEqual(migrate_storage(ctx.root, 'toml'), (1, 1))
+            self.assertEqual(storage_backend(ctx.root), 'toml')
+            self.assertEqual(KeyStore(root=ctx.root).load_key('sample', SUPER_SECURE_PASSWORD).private_key_hex,
+                             entity.private_key_hex)
+            self.assertEqual(AddressBook(root=ctx.root).items(), [('other', SAMPLE_ADDRESS)])
@@ -1,8 +1,8 @@
 import unittest
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 
-from pocketbook.table import Table
+from pocketbook.table import StreamingTable, Table
 
 
 class TableTests(unittest.TestCase):
@@ -37,3 +37,50 @@ class TableTests(unittest.TestCase):
     def test_invalid_padding_case(self):
         truncated = Table._pad_value('LongWords', 5)
         self.assertEqual(truncated, 'LongW')
+
+    def test_rows_are_written_in_chunks(self):
+        output = StringIO()
+        output.write = Mock(wraps=output.write)
+
+        table = Table(['foo'], stream=output, chunk_size=2)
+        for n in range(5):
+            table.add_row(foo=n)
+        table.display()
+
+        # the header and 5 rows are written in 3 chunks
+        self.assertEqual(output.write.call_count, 3)
+        self.assertEqual(len(output.getvalue().splitlines()), 6)
+
+
+class StreamingTableTests(unittest.TestCase):
+
+    def test_output_matches_table_when_sampling_all_rows(self):
+        table = Table(['foo', 'bar'], stream=StringIO())
+        streaming = StreamingTable(['foo', 'bar'], stream=StringIO())
+        for n in range(10):
+            table.add_row(foo=n, bar='x' * n)
+            streaming.add_row(foo=n, bar='x' * n)
+        table.display()
+        streaming.close()
+
+        self.assertEqual(streaming._stream.getvalue(), table._stream.getvalue())
+
+    def test_fixed_widths_stream_immediately(self):
+        output = StringIO()
+        table = StreamingTable(['foo'], widths={'foo': 3}, stream=output)
+        self.assertEqual(output.getvalue(), '\x1b[38;5;255mFoo \x1b[0m\n')
+
+        table.add_row(foo='abcdef')
+        self.assertEqual(output.getvalue(), '\x1b[38;5;255mFoo \x1b[0m\n\x1b[38;5;253m\x1b[48;5;238mabcd\x1b[0m\n')
+
+    def test_rows_stream_after_sample(self):
+        output = StringIO()
+        with StreamingTable(['foo'], sample_size=2, stream=output) as table:
+            table.add_row(foo='ab')
+            self.assertEqual(output.getvalue(), '')
+
+            table.add_row(foo='a')
+            table.add_row(foo='abcdef')
+            self.assertEqual(output.getvalue().splitlines()[-1], '\x1b[38;5;253m\x1b[48;5;238mabcd\x1b[0m')
+
+        self.assertEqual(len(output.getvalue().splitlines()), 4)
@@ -0,0 +1,79 @@
+import io
+import json
+import unittest
+
+from pocketbook import timings
+
+
+class TimingsTests(unittest.TestCase):
+
+    def tearDown(self):
+        timings.disable()
+
+    def test_disabled_spans_are_not_recorded(self):
+        self.assertIsNone(timings.recorder())
+        with timings.span('sample'):
+            pass
+
+        # the same shared no-op context is used for every span
+        self.assertIs(timings.span('first'), timings.span('second'))
+        self.assertIsNone(timings.recorder())
+
+    def test_spans_are_recorded(self):
+        recorder = timings.enable()
+        for _ in range(3):
+            with timings.span('network.balance'):
+                pass
+        with timings.span('api.create'):
+            pass
+
+        summary = recorder.summary()
+        self.assertEqual([entry['name'] for entry in summary], ['network.balance', 'api.create'])
+        self.assertEqual(summary[0]['count'], 3)
+        self.assertEqual(summary[1]['count'], 1)
+
+    def test_span_is_recorded_on_error(self):
+        recorder = timings.enable()
+        with self.assertRaises(RuntimeError):
+            with timings.span('failing'):
+                raise RuntimeError('failed')
+
+        self.assertEqual(recorder.summary()[0]['count'], 1)
+
+    def test_percentiles(self):
+        recorder = timings.enable()
+        for n in range(1, 101):
+            recorder.record('sample', n / 1000.0)
+
+        entry, = recorder.summary()
+        self.assertEqual(entry['count'], 100)
+        self.assertEqual(entry['total_ms'], 5050.0)
+        self.assertEqual(entry['mean_ms'], 50.5)
+        self.assertEqual(entry['p50_ms'], 50.0)
+        self.assertEqual(entry['p90_ms'], 90.0)
+        self.assertEqual(entry['p99_ms'], 99.0)
+        self.assertEqual(entry['max_ms'], 100.0)
+
+    def test_json_report(self):
+        recorder = timings.enable()
+        recorder.record('sample', 0.002)
+
+        output = io.StringIO()
+        timings.report(timings.JSON_TIMINGS, stream=output)
+
+        spans = json.loads(output.getvalue())['spans']
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]['name'], 'sample')
+        self.assertEqual(spans[0]['p99_ms'], 2.0)
+
+    def test_text_report(self):
+        recorder = timings.enable()
+        recorder.record('network.stake', 0.0125)
+
+        output = io.StringIO()
+        timings.report(stream=output)
+
+        text = output.getvalue()
+        self.assertIn('Timings:', text)
+        self.assertIn('network.stake', text)
+        self.assertIn('12.5', text)
@@ -0,0 +1,40 @@
+import unittest
+
+from fetchai.ledger.crypto import Entity
+
+from pocketbook.address_book import AddressBook
+from pocketbook.key_store import KeyStore
+from pocketbook.transactions import determine_from_account
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS, SUPER_SECURE_PASSWORD
+
+
+class DetermineFromAccountTests(unittest.TestCase):
+
+    def test_from_account(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('key1', SUPER_SECURE_PASSWORD, Entity())
+            key_store.add_key('key2', SUPER_SECURE_PASSWORD, Entity())
+            address_book = AddressBook(root=ctx.root)
+            address_book.add('multisig', SAMPLE_ADDRESS)
+
+            # a single signer funds the transfer unless another account is specified
+            self.assertEqual(determine_from_account(key_store, address_book, ['key1']), 'key1')
+            self.assertEqual(determine_from_account(key_store, address_book, ['key1'], 'key2'), 'key2')
+            self.assertEqual(determine_from_account(key_store, address_book, ['key1', 'key2'], 'multisig'), 'multisig')
+
+    def test_errors(self):
+        with TemporaryPocketBookRoot() as ctx:
+            key_store = KeyStore(root=ctx.root)
+            key_store.add_key('key1', SUPER_SECURE_PASSWORD, Entity())
+            key_store.add_key('key2', SUPER_SECURE_PASSWORD, Entity())
+            address_book = AddressBook(root=ctx.root)
+
+            with self.assertRaisesRegex(RuntimeError, 'Unknown key: missing'):
+                determine_from_account(key_store, address_book, ['key1', 'missing'], 'key1')
+            with self.assertRaisesRegex(RuntimeError, 'Unknown from address: missing'):
+                determine_from_account(key_store, address_book, ['key1'], 'missing')
+            with self.assertRaisesRegex(RuntimeError, 'Unable to determine from account'):
+                determine_from_account(key_store, address_book, ['key1', 'key2'])
+            with self.assertRaisesRegex(RuntimeError, 'Unable to determine from account'):
+                determine_from_account(key_store, address_book, [], 'key1')
@@ -0,0 +1,68 @@
+import os
+import unittest
+
+from fetchai.ledger.crypto import Entity, Address
+
+from pocketbook.transactions import build_transfer
+from pocketbook.tx_file import read_tx_file, write_tx_file
+from .utils import TemporaryPocketBookRoot, SAMPLE_ADDRESS
+
+
+class TxFileTests(unittest.TestCase):
+
+    def create_transactions(self, signers, count):
+        transactions = []
+        for amount in range(1, count + 1):
+            tx = build_transfer(Address(signers[0]), Address(SAMPLE_ADDRESS), amount, 1, signers)
+            tx.valid_from = 10
+            tx.valid_until = 110
+            transactions.append(tx)
+        return transactions
+
+    def test_round_trip(self):
+        signers = [Entity(), Entity()]
+        transactions = self.create_transactions(signers, 3)
+
+        # partially sign one of the transactions
+        transactions[1].sign(signers[0])
+
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'transfers.tx')
+            write_tx_file(path, 'foo-net', transactions)
+
+            network, recovered = read_tx_file(path)
+
+        self.assertEqual(network, 'foo-net')
+        self.assertEqual(recovered, transactions)
+        self.assertEqual(recovered[1].present_signers, {signers[0]})
+        self.assertEqual(recovered[0].present_signers, set())
+
+        # the recovered transactions can be signed and are then valid
+        for tx in recovered:
+            for signer in signers:
+                tx.sign(signer)
+            self.assertFalse(tx.is_incomplete)
+            self.assertTrue(tx.is_valid())
+
+    def test_invalid_file(self):
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'transfers.tx')
+            with open(path, 'w') as tx_file:
+                tx_file.write('name,address\n')
+
+            with self.assertRaises(RuntimeError):
+                read_tx_file(path)
+
+    def test_truncated_file(self):
+        signers = [Entity()]
+        with TemporaryPocketBookRoot() as ctx:
+            path = os.path.join(ctx.root, 'transfers.tx')
+            write_tx_file(path, 'foo-net', self.create_transactions(signers, 3))
+
+            with open(path, 'r') as tx_file:
+                lines = tx_file.readlines()
+            with open(path, 'w') as tx_file:
+                tx_file.writelines(lines[:-1])
+
+            with self.assertRaises(RuntimeError):
+                read_tx_file(path)
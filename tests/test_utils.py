@@ -1,11 +1,12 @@
 import unittest
+from decimal import Decimal
 from typing import Union
 from unittest.mock import MagicMock, patch
 
 from fetchai.ledger.crypto import Address, Entity
 
 from pocketbook.utils import get_balance, get_stake, NetworkUnavailableError, checked_address, to_canonical, \
-    from_canonical, token_amount, ConversionError
+    from_canonical, token_amount, ConversionError, canonical_token_amount, format_canonical
 
 
 class UtilsTests(unittest.TestCase):
@@ -15,7 +16,7 @@ class UtilsTests(unittest.TestCase):
         api.tokens.balance.return_value = to_canonical(10)
 
         balance = get_balance(api, 'some address')
-        self.assertEqual(balance, 10)
+        self.assertEqual(balance, to_canonical(10))
 
         api.tokens.balance.assert_called_once_with('some address')
 
@@ -24,37 +25,49 @@ class UtilsTests(unittest.TestCase):
         api.tokens.stake.return_value = to_canonical(5)
 
         stake = get_stake(api, 'some address')
-        self.assertEqual(stake, 5)
+        self.assertEqual(stake, to_canonical(5))
 
         api.tokens.stake.assert_called_once_with('some address')
 
+    @patch('pocketbook.connection.EndpointCache')
+    @patch('fetchai.ledger.api.bootstrap.server_from_name', return_value=('https://foo.bar', 443))
     @patch('fetchai.ledger.api.LedgerApi')
-    def test_create_api(self, MockLedgerApi):
+    def test_create_api(self, MockLedgerApi, mock_server_from_name, MockEndpointCache):
+        endpoint_cache = MockEndpointCache.return_value
+        endpoint_cache.get.return_value = None
+
         # normal use
         from pocketbook.utils import create_api
         create_api('super-duper-net')
 
-        MockLedgerApi.assert_called_once_with(network='super-duper-net')
+        mock_server_from_name.assert_called_once_with('super-duper-net')
+        endpoint_cache.put.assert_called_once_with('super-duper-net', 'https://foo.bar', 443)
+        MockLedgerApi.assert_called_once_with('https://foo.bar', 443)
         MockLedgerApi.reset_mock()
 
+    @patch('pocketbook.connection.EndpointCache')
     @patch('fetchai.ledger.api.LedgerApi')
-    def test_create_api_local(self, MockLedgerApi):
+    def test_create_api_local(self, MockLedgerApi, MockEndpointCache):
         # normal use
         from pocketbook.utils import create_api
         create_api('local')
 
         MockLedgerApi.assert_called_once_with('127.0.0.1', 8000)
+        MockEndpointCache.return_value.get.assert_not_called()
         MockLedgerApi.reset_mock()
 
+    @patch('pocketbook.connection.EndpointCache')
+    @patch('fetchai.ledger.api.bootstrap.server_from_name', return_value=('https://foo.bar', 443))
+    @patch('fetchai.ledger.api.LedgerApi', side_effect=[RuntimeError('Bad Error'), RuntimeError('Bad Error')])
+    def test_error_on_create_api(self, MockLedgerApi, mock_server_from_name, MockEndpointCache):
+        MockEndpointCache.return_value.get.return_value = None
 
-    @patch('fetchai.ledger.api.LedgerApi', side_effect=[RuntimeError('Bad Error')])
-    def test_error_on_create_api(self, MockLedgerApi):
         # internal error case
         from pocketbook.utils import create_api
         with self.assertRaises(NetworkUnavailableError):
             create_api('super-duper-net')
 
-        MockLedgerApi.assert_called_once_with(network='super-duper-net')
+        MockLedgerApi.assert_called_with('https://foo.bar', 443)
 
     def test_valid_address(self):
         entity = Entity()
@@ -75,7 +88,7 @@ class FetConversionTests(unittest.TestCase):
     def assertIsConvertible(self, canonical: int, value: Union[int, float]):
         converted_canonical = to_canonical(value)
         self.assertEqual(canonical, converted_canonical)
-        self.assertEqual(float(value), from_canonical(converted_canonical))
+        self.assertEqual(Decimal(str(value)), from_canonical(converted_canonical))
 
     def test_canonical_conversions(self):
         self.assertIsConvertible(10000000000, 1)
@@ -105,6 +118,14 @@ class FetConversionTests(unittest.TestCase):
         self.assertEqual(token_amount(1e6), '   1000000.0000000000 FET')
         self.assertEqual(token_amount(1e9), '1000000000.0000000000 FET')
 
+    def test_token_amount_is_rounded_for_display(self):
+        self.assertEqual(token_amount(1 / 3), '         0.3333333333 FET')
+        self.assertEqual(token_amount(2 / 3), '         0.6666666667 FET')
+        self.assertEqual(token_amount(Decimal('1.00000000005')), '         1.0000000000 FET')
+        self.assertEqual(token_amount(1e-11), '         0.0000000000 FET')
+        self.assertEqual(token_amount(Decimal('123456789012345678901.00000000005')),
+                         '123456789012345678901.0000000000 FET')
+
     def test_invalid_negative_to_canonical(self):
         with self.assertRaises(ConversionError):
             to_canonical(-10)
@@ -120,3 +141,28 @@ class FetConversionTests(unittest.TestCase):
     def test_invalid_negative_from_canonical(self):
         with self.assertRaises(ConversionError):
             from_canonical(-10)
+
+    def test_exact_decimal_strings(self):
+        self.assertEqual(to_canonical('0.1'), 1000000000)
+        self.assertEqual(to_canonical('1152000000.0000000001'), 11520000000000000001)
+        self.assertEqual(from_canonical(11520000000000000001), Decimal('1152000000.0000000001'))
+
+    def test_large_exact_decimal_strings(self):
+        # more significant digits than the default decimal context
+        self.assertEqual(to_canonical('123456789012345678901.0000000001'), 1234567890123456789010000000001)
+        self.assertEqual(to_canonical(Decimal('123456789012345678901.0000000001')), 1234567890123456789010000000001)
+        self.assertEqual(to_canonical(10 ** 30), 10 ** 40)
+        with self.assertRaises(ConversionError):
+            to_canonical('123456789012345678901.00000000001')
+
+    def test_invalid_excess_precision_to_canonical(self):
+        with self.assertRaises(ConversionError):
+            to_canonical('1.00000000001')
+
+    def test_format_canonical(self):
+        self.assertEqual(format_canonical(0), '0.0000000000')
+        self.assertEqual(format_canonical(1), '0.0000000001')
+        self.assertEqual(format_canonical(11520000000000000001), '1152000000.0000000001')
+        self.assertEqual(format_canonical(-12000000000), '-1.2000000000')
+        self.assertEqual(canonical_token_amount(12000000000), '         1.2000000000 FET')
+        self.assertEqual(canonical_token_amount(11520000000000000001), '1152000000.0000000001 FET')
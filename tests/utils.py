@@ -6,6 +6,14 @@ SAMPLE_ADDRESS = '2w9uqXLFvCve9TjfoRb2nuztuTx54E1S3AjuB9hWCMMGX5kp4W'
 SUPER_SECURE_PASSWORD = 'Fetch!Ai-ToTh3M00n!'
 
 
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
 class TemporaryPocketBookRoot:
     def __init__(self):
         self._root = None